@@ -0,0 +1,131 @@
+# benchmarks/bench_async_engine.py
+"""
+Thread-per-scrape Selenium against the asyncio DevTools engine (cdp.py)
+running the same scrape shape: open a page, type a query, press Enter,
+wait for the product grid and extract it.
+
+    python benchmarks/bench_async_engine.py [scrapes ...]
+
+The page is a local fixture whose grid renders 300 ms after Enter, standing
+in for a vendor's search API, so the run measures how well each engine
+overlaps waiting. The thread path is capped by its executor (THREADS
+workers, one pooled Chrome each); the async path runs every scrape as a
+coroutine on one event loop and a couple of shared Chrome processes.
+"""
+import os
+import sys
+import time
+import asyncio
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from selenium.webdriver.common.by import By
+from selenium.webdriver.common.keys import Keys
+from selenium.webdriver.support.ui import WebDriverWait
+
+from browser import DriverPool, ProcessBackend
+from extract import collect_products
+from cdp import PagePool, COUNT_JS, collect_products as collect_products_async
+
+
+THREADS = 4
+
+PAGE_HTML = """<!doctype html><html><head><title>fixture</title></head><body>
+<input id="q" placeholder="Search"><div id="grid"></div><script>
+document.getElementById('q').addEventListener('keydown', e => {
+  if (e.key !== 'Enter') return;
+  setTimeout(() => {
+    const grid = document.getElementById('grid');
+    for (let i = 0; i < 50; i++) {
+      const c = document.createElement('div');
+      c.className = 'card';
+      c.innerHTML = `<div class="name">${e.target.value} ${i}</div><div class="price">₹${40 + i}</div>`;
+      grid.appendChild(c);
+    }
+  }, 300);
+});
+</script></body></html>"""
+
+CARD = ("css", "#grid .card")
+FIELDS = {"name": ("css", ".name", None), "price": ("css", ".price", None)}
+
+
+def thread_scrape(pool, url, query):
+    with pool.driver() as driver:
+        driver.get(url)
+        box = WebDriverWait(driver, 10).until(lambda d: d.find_element(By.ID, "q"))
+        box.send_keys(query)
+        box.send_keys(Keys.ENTER)
+        WebDriverWait(driver, 10).until(lambda d: d.find_elements(By.CSS_SELECTOR, CARD[1]))
+        return collect_products(driver, CARD, FIELDS)
+
+
+def run_threads(n, url):
+    pool = DriverPool(size=THREADS, backend=ProcessBackend())
+    peak_threads = 0
+    try:
+        # Warm the pool so browser startup isn't part of the comparison
+        for driver in [pool.acquire() for _ in range(THREADS)]:
+            pool.release(driver)
+
+        started = time.time()
+        with ThreadPoolExecutor(max_workers=THREADS) as executor:
+            futures = [executor.submit(thread_scrape, pool, url, f"milk {i}") for i in range(n)]
+            while not all(f.done() for f in futures):
+                peak_threads = max(peak_threads, threading.active_count())
+                time.sleep(0.05)
+            rows = sum(len(f.result()) for f in futures)
+        return time.time() - started, rows, peak_threads
+    finally:
+        pool.close()
+
+
+async def async_scrape(pages, url, query):
+    async with pages.page() as page:
+        await page.goto(url)
+        await page.call("document.getElementById('q').focus()")
+        await page.type_text(query, delay=0)
+        await page.press_enter()
+        await page.wait(COUNT_JS, *CARD, timeout=10)
+        return await collect_products_async(page, CARD, FIELDS)
+
+
+async def run_async(n, url):
+    pages = PagePool()
+    try:
+        async with pages.page():
+            pass  # launch Chrome before timing
+
+        started = time.time()
+        results = await asyncio.gather(*(async_scrape(pages, url, f"milk {i}") for i in range(n)))
+        return time.time() - started, sum(map(len, results)), threading.active_count()
+    finally:
+        await pages.close()
+
+
+def main():
+    levels = [int(a) for a in sys.argv[1:]] or [4, 16, 32]
+
+    with tempfile.NamedTemporaryFile("w", suffix=".html", delete=False) as f:
+        f.write(PAGE_HTML)
+    url = f"file://{f.name}"
+
+    print(f"{'engine':>7} {'scrapes':>7} {'wall s':>7} {'scrapes/s':>9} {'threads':>7}")
+    try:
+        for n in levels:
+            wall, rows, threads = run_threads(n, url)
+            assert rows == 50 * n
+            print(f"{'thread':>7} {n:>7} {wall:>7.2f} {n / wall:>9.1f} {threads:>7}")
+
+            wall, rows, threads = asyncio.run(run_async(n, url))
+            assert rows == 50 * n
+            print(f"{'cdp':>7} {n:>7} {wall:>7.2f} {n / wall:>9.1f} {threads:>7}")
+    finally:
+        os.unlink(f.name)
+
+
+if __name__ == "__main__":
+    main()
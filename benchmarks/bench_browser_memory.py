@@ -0,0 +1,68 @@
+# benchmarks/bench_browser_memory.py
+"""
+Memory per concurrent scrape: one Chrome per scrape ("process") against
+tabs in isolated browser contexts on shared Chrome processes ("context").
+
+    python benchmarks/bench_browser_memory.py [concurrency ...]
+
+Each scrape loads a local 200-card product grid, so no vendor site or
+network is involved. Memory is PSS (RSS when PSS is unavailable) summed
+over every chromedriver and Chrome process involved.
+"""
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from browser import DriverPool, ProcessBackend, ContextBackend
+from resources import tree_memory_mb
+
+
+GRID_HTML = """<!doctype html><html><body><div id="grid"></div><script>
+const grid = document.getElementById('grid');
+for (let i = 0; i < 200; i++) {
+  const c = document.createElement('div');
+  c.className = 'card';
+  c.innerHTML = `<div class="name">Product ${i}</div><div class="price">₹${40 + i}</div>`
+              + `<canvas width="150" height="150"></canvas>`;
+  grid.appendChild(c);
+}
+</script></body></html>"""
+
+
+def measure(backend, concurrency, url):
+    pool = DriverPool(size=concurrency, backend=backend)
+    drivers = [pool.acquire() for _ in range(concurrency)]
+    try:
+        for d in drivers:
+            d.get(url)
+            assert d.execute_script("return document.querySelectorAll('.card').length") == 200
+
+        roots = {pid for d in drivers for pid in backend.root_pids(d)}
+        return tree_memory_mb(*roots)
+    finally:
+        for d in drivers:
+            pool.release(d)
+        pool.close()
+
+
+def main():
+    levels = [int(a) for a in sys.argv[1:]] or [1, 4, 8]
+
+    with tempfile.NamedTemporaryFile("w", suffix=".html", delete=False) as f:
+        f.write(GRID_HTML)
+    url = f"file://{f.name}"
+
+    print(f"{'backend':>8} {'scrapes':>7} {'total MB':>9} {'MB/scrape':>9}")
+    try:
+        for n in levels:
+            for backend in (ProcessBackend(), ContextBackend()):
+                total = measure(backend, n, url)
+                print(f"{backend.name:>8} {n:>7} {total:>9.0f} {total / n:>9.1f}")
+    finally:
+        os.unlink(f.name)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+# benchmarks/bench_cold_start.py
+"""
+Cold start as Cloud Run sees it: start a fresh server process, wait for it
+to answer, then time the first /search until it returns products.
+
+    python benchmarks/bench_cold_start.py [product] [location]
+
+Run with PREWARM_BROWSER=1 in the environment to compare against the
+pre-launched browser. Reports the server's own /startup figures next to
+the timings seen from outside.
+"""
+import os
+import sys
+import time
+import socket
+import subprocess
+
+import requests
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def main():
+    product = sys.argv[1] if len(sys.argv) > 1 else "milk"
+    location = sys.argv[2] if len(sys.argv) > 2 else "Koramangala, Bengaluru"
+    port = free_port()
+    base = f"http://127.0.0.1:{port}"
+
+    started = time.time()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port)],
+        cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        while True:
+            try:
+                requests.get(base + "/", timeout=1)
+                break
+            except requests.ConnectionError:
+                if server.poll() is not None:
+                    raise SystemExit("server exited during startup")
+                time.sleep(0.05)
+        ready = time.time() - started
+
+        response = requests.post(base + "/search", json={"product": product, "location": location}, timeout=600)
+        first_search = time.time() - started
+        found = {v: len(p) for v, p in response.json().get("results", {}).items()}
+
+        print(f"ready to serve      {ready:7.2f}s")
+        print(f"first /search done  {first_search:7.2f}s  {found}")
+        print(f"server /startup     {requests.get(base + '/startup', timeout=5).json()}")
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+
+if __name__ == "__main__":
+    main()
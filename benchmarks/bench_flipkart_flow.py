@@ -0,0 +1,123 @@
+# benchmarks/bench_flipkart_flow.py
+"""
+The Flipkart Minutes flow (flipkart_minutes.get_basket) end to end against a
+local fixture of the store: location modal, manual entry, suggestions,
+confirm, search, and a grid that lazy-loads 20 cards per scroll.
+
+    python benchmarks/bench_flipkart_flow.py [runs] [max_results]
+
+Every step of the fixture answers after a short delay like the real site,
+so the timings show what the readiness waits cost compared with the fixed
+sleeps the flow used to have (LEGACY_SLEEPS, paid on every run before any
+extraction even started).
+"""
+import os
+import sys
+import time
+import threading
+import statistics
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import flipkart_minutes
+from browser import POOL
+
+
+# Page load 4 s, after typing 1.5 s, before the suggestion click 0.3 s,
+# after confirm 2 s, after search 5 s
+LEGACY_SLEEPS = 4 + 1.5 + 0.3 + 2 + 5
+
+PAGE_HTML = """<!doctype html><html><head><title>Flipkart Minutes (fixture)</title></head><body>
+<div id="app"></div><script>
+const app = document.getElementById('app');
+const later = (ms, fn) => setTimeout(fn, ms);
+let loaded = 0, loading = false, query = '';
+
+function addCards(n) {
+  const grid = document.querySelector('.VPqDeq');
+  for (let i = 0; i < n && loaded < 100; i++, loaded++) {
+    const c = document.createElement('div');
+    c.style.padding = '16px';
+    c.style.height = '120px';
+    c.innerHTML = `<a href="/p/${loaded}">${query} ${loaded}</a><div>₹${40 + loaded}</div>`
+                + `<span>${loaded % 30}% Off</span><img src="/img/${loaded}.png">`;
+    grid.appendChild(c);
+  }
+}
+
+later(400, () => {
+  app.innerHTML = '<main class="Ff3t7M"><div id="manual">Enter location manually</div></main>';
+  document.getElementById('manual').onclick = () => later(200, () => {
+    document.querySelector('main').innerHTML = '<input id="search" type="text"><ul id="sugg"></ul>';
+    document.getElementById('search').oninput = e => later(300, () => {
+      const ul = document.getElementById('sugg');
+      ul.innerHTML = ['Layout', 'Nagar', 'Road'].map(s => `<li class="_x1">${e.target.value} ${s}</li>`).join('');
+      ul.querySelectorAll('li').forEach(li => li.onclick = () => later(200, () => {
+        document.querySelector('main').insertAdjacentHTML('beforeend', '<input type="submit" value="Confirm">');
+        document.querySelector('input[type=submit]').onclick = () => later(500, () => {
+          app.innerHTML = '<input class="Pke_EE" placeholder="Search in Flipkart Minutes"><div class="VPqDeq"></div>';
+          document.querySelector('.Pke_EE').onkeydown = k => {
+            if (k.key !== 'Enter') return;
+            query = k.target.value;
+            later(800, () => addCards(20));
+          };
+        });
+      }));
+    });
+  });
+});
+
+window.addEventListener('scroll', () => {
+  if (loading || loaded >= 100) return;
+  if (window.innerHeight + window.scrollY < document.body.scrollHeight - 200) return;
+  loading = true;
+  later(300, () => { addCards(20); loading = false; });
+});
+</script></body></html>"""
+
+
+class Fixture(BaseHTTPRequestHandler):
+    def do_GET(self):
+        body = PAGE_HTML.encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    max_results = int(sys.argv[2]) if len(sys.argv) > 2 else None
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Fixture)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    flipkart_minutes.HOME_URL = f"http://127.0.0.1:{server.server_address[1]}/flipkart-minutes-store"
+
+    try:
+        # Launch Chrome before timing
+        with POOL.driver():
+            pass
+
+        walls = []
+        for i in range(runs):
+            started = time.time()
+            products = flipkart_minutes.get_products("Koramangala", f"milk {i}", max_results=max_results)
+            walls.append(time.time() - started)
+            assert products, "no products extracted from the fixture"
+            print(f"run {i + 1}: {walls[-1]:.2f}s, {len(products)} products")
+
+        p95 = sorted(walls)[max(0, round(0.95 * len(walls)) - 1)]
+        print(f"\np50 {statistics.median(walls):.2f}s  p95 {p95:.2f}s  "
+              f"(old flow: {LEGACY_SLEEPS:.1f}s of fixed sleeps alone)")
+    finally:
+        server.shutdown()
+        POOL.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+# benchmarks/bench_optimizer.py
+"""
+Solve-time benchmark for the basket optimizer.
+
+    python benchmarks/bench_optimizer.py
+
+Random baskets of 5-100 items over three vendors with per-vendor minimum
+orders and delivery fees. Exact sizes are also solved heuristically to
+report the heuristic's cost gap.
+"""
+import os
+import sys
+import time
+import random
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from optimizer import optimize_basket, EXACT_MAX_ITEMS
+
+
+VENDORS = ["Zepto", "Blinkit", "Instamart"]
+MIN_ORDER = {"Zepto": 99, "Blinkit": 0, "Instamart": 149}
+DELIVERY_FEE = {"Zepto": 25, "Blinkit": 16, "Instamart": 30}
+SIZES = [5, 10, 12, 20, 50, 100]
+RUNS = 20
+
+
+def random_basket(n, rng):
+    items = {}
+    for i in range(n):
+        base = rng.uniform(20, 400)
+        items[f"item-{i}"] = {
+            v: [{"name": f"item-{i} @ {v}", "price": f"₹{base * rng.uniform(0.8, 1.25):.0f}"}]
+            for v in VENDORS if rng.random() < 0.9
+        }
+    return items
+
+
+def main():
+    rng = random.Random(42)
+    print(f"{'items':>5} {'solver':>9} {'p50 ms':>9} {'max ms':>9} {'gap %':>7}")
+
+    for n in SIZES:
+        timings = {"exact": [], "heuristic": []}
+        gaps = []
+
+        for _ in range(RUNS):
+            basket = random_basket(n, rng)
+            kwargs = dict(max_vendors=2, min_order=MIN_ORDER, delivery_fee=DELIVERY_FEE)
+
+            h = optimize_basket(basket, exact=False, **kwargs)
+            timings["heuristic"].append(h["solve_ms"])
+
+            if n <= EXACT_MAX_ITEMS:
+                e = optimize_basket(basket, exact=True, **kwargs)
+                timings["exact"].append(e["solve_ms"])
+                if e["feasible"] and h["feasible"]:
+                    gaps.append((h["total"] - e["total"]) / e["total"] * 100)
+
+        for solver, ts in timings.items():
+            if not ts:
+                continue
+            gap = f"{statistics.mean(gaps):.2f}" if solver == "heuristic" and gaps else "-"
+            print(f"{n:>5} {solver:>9} {statistics.median(ts):>9.2f} {max(ts):>9.2f} {gap:>7}")
+
+
+if __name__ == "__main__":
+    main()
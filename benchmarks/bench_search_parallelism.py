@@ -0,0 +1,80 @@
+# benchmarks/bench_search_parallelism.py
+"""
+Cold /search latency against the number of scrape threads and pooled
+browsers, with the default five vendors.
+
+    python benchmarks/bench_search_parallelism.py [searches]
+
+No browsers are started: each vendor scrape is a sleep drawn from a
+lognormal around its typical cold-scrape time (SCALE shrinks seconds so
+the run is quick), and a browser is a semaphore slot held for the scrape,
+the way DriverPool is. A background warm-crawl scrape runs now and then, as
+in production. Searches come one after another, so the only queueing is
+vendors within a search waiting for a thread or a browser.
+"""
+import sys
+import time
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+
+
+# Typical cold scrape per vendor, seconds
+VENDOR_SECONDS = {"Zepto": 9, "Blinkit": 8, "Instamart": 10, "Flipkart": 14, "BigBasket": 11}
+SIGMA = 0.35
+SCALE = 0.01
+
+WARM_CRAWL = True
+
+
+def quantile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def run(threads, browsers, searches, seed=7):
+    rng = random.Random(seed)
+    slots = threading.BoundedSemaphore(browsers)
+    stop = threading.Event()
+
+    def scrape(seconds):
+        with slots:
+            time.sleep(seconds * SCALE)
+
+    latencies = []
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        def warm_crawler():
+            # Like WarmCrawler: one refresh on the shared executor, then idle
+            warm_rng = random.Random(seed + 1)
+            while not stop.wait(warm_rng.uniform(0, 20) * SCALE):
+                executor.submit(scrape, warm_rng.lognormvariate(0, SIGMA) * 10).result()
+
+        if WARM_CRAWL:
+            crawler = threading.Thread(target=warm_crawler, daemon=True)
+            crawler.start()
+        for _ in range(searches):
+            draws = [rng.lognormvariate(0, SIGMA) * s for s in VENDOR_SECONDS.values()]
+            started = time.perf_counter()
+            wait([executor.submit(scrape, d) for d in draws])
+            latencies.append((time.perf_counter() - started) / SCALE)
+        stop.set()
+        if WARM_CRAWL:
+            crawler.join()
+    return quantile(latencies, 0.5), quantile(latencies, 0.95)
+
+
+def main():
+    searches = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    vendors = len(VENDOR_SECONDS)
+    configs = [
+        ("old: 4 threads, 4 browsers", 4, 4),
+        (f"new: {vendors}+1 threads, {vendors}+1 browsers", vendors + 1, vendors + 1),
+    ]
+    print(f"{'config':<36} {'p50 s':>6} {'p95 s':>6}")
+    for label, threads, browsers in configs:
+        p50, p95 = run(threads, browsers, searches)
+        print(f"{label:<36} {p50:>6.1f} {p95:>6.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,145 +1,186 @@
-from selenium import webdriver
+# bigbasket.py
+import os
+import time
 from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.common.keys import Keys
-import time
-# import pandas as pd
-
-
-
-# ---------- CONFIG ----------
-LOCATION = "Bengaluru"
-SEARCH_QUERY = "onion"
-
-# ---------- SETUP ----------
-driver = webdriver.Chrome()
-driver.maximize_window()
-driver.delete_all_cookies()
-driver.get("https://www.bigbasket.com/")
-wait = WebDriverWait(driver, 30)
-print("🌐 BigBasket opened successfully")
-
-# ---------- STEP 1: Click 'Select Location' ----------
-try:
-    print("📍 Waiting for 'Select Location' button...")
-    location_btn = wait.until(
-        EC.element_to_be_clickable((By.XPATH, "//button[contains(., 'Select Location')]"))
-    )
-    driver.execute_script("arguments[0].scrollIntoView(true);", location_btn)
-    time.sleep(1)
-    location_btn.click()
-    print("✅ Clicked 'Select Location' button.")
-except Exception as e:
-    print("❌ Location button not found:", e)
-
-# ---------- STEP 2: Type in Location ----------
-try:
-    print("⌛ Waiting for location search input...")
-    location_input = wait.until(
-        EC.presence_of_element_located((By.CSS_SELECTOR, "input[placeholder='Search for area or street name']"))
-    )
-    location_input.click()
-    time.sleep(1)
-    location_input.send_keys(LOCATION)
-    print(f"✅ Typed location: {LOCATION}")
-
-    # Wait for suggestion list
-    suggestion = wait.until(
-        EC.element_to_be_clickable((By.CSS_SELECTOR, "li.AddressDropdown___StyledMenuItem-sc-i4k67t-7"))
-    )
-    suggestion.click()
-    print("✅ Selected first suggestion.")
-except Exception as e:
-    print("❌ Error selecting location:", e)
-
-# ---------- STEP 3: Wait for homepage to reload ----------
-time.sleep(3)
-
-# ---------- STEP 4: Search Product ----------
-try:
-    print("🔎 Searching for product...")
-    search_box = wait.until(
-        EC.presence_of_element_located((By.CSS_SELECTOR, "input[placeholder*='Search for Products']"))
-    )
-    search_box.click()
-    search_box.send_keys(SEARCH_QUERY)
-    search_box.send_keys(Keys.ENTER)
-    print(f"✅ Searching for '{SEARCH_QUERY}'")
-except Exception as e:
-    print("❌ Search box not found:", e)
-
-# ---------- STEP 5: Wait for product grid ----------
-time.sleep(5)
-try:
-    product_cards = wait.until(
-        EC.presence_of_all_elements_located((By.CSS_SELECTOR, "ul.grid-cols-9 > li"))
-    )
-    print(f"🛒 Found {len(product_cards)} products for '{SEARCH_QUERY}'")
-except Exception as e:
-    print("❌ Product cards not found:", e)
-    product_cards = []
-
-# ---------- STEP 6: Extract Product Data ----------
-products = []
-
-for card in product_cards:
-    try:
-        name = card.find_element(By.CSS_SELECTOR, "h3.block").text
-    except:
-        name = ""
-    try:
-        brand = card.find_element(By.CSS_SELECTOR, "span.BrandName___StyledLabel2-sc-hssfrl-1").text
-    except:
-        brand = ""
-    try:
-        pack = card.find_element(By.CSS_SELECTOR, "span.Label-sc-15v1nk5-0.gJxZPQ.truncate").text
-    except:
-        pack = ""
-    try:
-        price = card.find_element(By.CSS_SELECTOR, "span.Pricing___StyledLabel-sc-pldi2d-1").text
-    except:
-        price = ""
-    try:
-        mrp = card.find_element(By.CSS_SELECTOR, "span.Pricing___StyledLabel2-sc-pldi2d-2").text
-    except:
-        mrp = ""
-    try:
-        discount = card.find_element(By.XPATH, ".//span[contains(text(),'% OFF')]").text
-    except:
-        discount = ""
-    try:
-        image = card.find_element(By.CSS_SELECTOR, "img").get_attribute("src")
-    except:
-        image = ""
-    try:
-        url = card.find_element(By.CSS_SELECTOR, "a").get_attribute("href")
-    except:
-        url = ""
-
-    products.append({
-        "name": name.strip(),
-        "brand": brand.strip(),
-        "pack": pack.strip(),
-        "price": price.strip(),
-        "mrp": mrp.strip(),
-        "discount": discount.strip(),
-        "image_url": image,
-        "product_url": url
-    })
-
-# ---------- STEP 7: Preview Extracted Products ----------
-print(f"\n✅ Total extracted: {len(products)} products\n")
-for i, p in enumerate(products[:10], start=1):
-    print(f"{i}. {p['brand']} {p['name']} ({p['pack']})")
-    print(f"   💰 Price: {p['price']} | MRP: {p['mrp']} | Discount: {p['discount']}")
-    print(f"   🖼️ {p['image_url']}")
-    print(f"   🔗 {p['product_url']}\n")
-
-# ---------- STEP 8: Save to CSV ----------
-# if products:
-#     pd.DataFrame(products).to_csv(f"bigbasket_{SEARCH_QUERY}_products.csv", index=False)
-#     print(f"💾 Saved to bigbasket_{SEARCH_QUERY}_products.csv")
-
-driver.quit()
-print("🎯 Done.")
+from selenium.webdriver.support.ui import WebDriverWait
+
+from breaker import VendorUnavailable
+from browser import POOL, reset_session
+from extract import collect_products
+from retry import retry, retry_budget, remaining_time
+from selector_registry import find, PRESENT, CLICKABLE
+from snapshots import capture
+
+
+VENDOR = "BigBasket"
+HOME_URL = "https://www.bigbasket.com/"
+
+# Own wall clock (setup, per query) so BigBasket never becomes the slowest
+# vendor of a /search; a scrape that runs out returns what it has
+SETUP_BUDGET = float(os.getenv("BIGBASKET_SETUP_BUDGET_SECONDS", "20"))
+QUERY_BUDGET = float(os.getenv("BIGBASKET_QUERY_BUDGET_SECONDS", "15"))
+
+# Per-attempt wait for the first product card
+PRODUCT_WAIT = 10
+
+# Product card and its fields, read in one pass by extract.collect_products
+CARD = ("css", "ul.grid-cols-9 > li")
+# (the same keys as the other vendors; the card shows no delivery time)
+FIELDS = {
+    "name": ("css", "h3.block", None),
+    "price": ("css", "span.Pricing___StyledLabel-sc-pldi2d-1", None),
+    "mrp": ("css", "span.Pricing___StyledLabel2-sc-pldi2d-2", None),
+    "discount": ("xpath", ".//span[contains(text(),'% OFF')]", None),
+    "weight": ("css", "span.Label-sc-15v1nk5-0.gJxZPQ.truncate", None),
+    "delivery_time": None,
+    "image_url": ("css", "img", "src"),
+    "brand": ("css", "span.BrandName___StyledLabel2-sc-hssfrl-1", None),
+    "product_url": ("css", "a", "href"),
+}
+
+
+def get_products(location, search_query, max_results=None):
+    return get_basket(location, [search_query], max_results=max_results)[search_query]
+
+
+def get_basket(location, search_queries, driver=None, max_results=None):
+    """
+    Set the location once, then run every query in the same browser session.
+    Pass a driver to reuse an existing browser, otherwise one is borrowed
+    from the shared pool. With max_results, extraction stops as soon as
+    that many products are collected.
+    """
+    if driver is None:
+        with POOL.driver() as driver:
+            return get_basket(location, search_queries, driver, max_results)
+
+    reset_session(driver, HOME_URL)
+
+
+    # ------------------------------------------------------------------
+    # SAFE PAGE LOAD
+    # ------------------------------------------------------------------
+    def safe_get(url):
+        def attempt():
+            driver.get(url)
+            if "bigbasket" in driver.title.lower():
+                print("🌐 BigBasket opened")
+                return True
+            return False
+
+        return retry(VENDOR, "page_load", attempt)
+
+
+    # ------------------------------------------------------------------
+    # SAFE CLICK
+    # ------------------------------------------------------------------
+    def click_element(step, desc):
+        def attempt():
+            el = find(driver, VENDOR, step, CLICKABLE)
+            driver.execute_script("arguments[0].scrollIntoView(true); arguments[0].click();", el)
+            print(f"✅ Clicked {desc}")
+            return True
+
+        if retry(VENDOR, "click", attempt):
+            return True
+        print(f"❌ Failed to click {desc}")
+        return False
+
+
+    # ------------------------------------------------------------------
+    # LOCATION SETUP
+    # ------------------------------------------------------------------
+    def set_location():
+        def attempt():
+            # Step 1: Open location selector
+            if not click_element("location_button", "Select Location"):
+                return False
+
+            # Step 2: Type location
+            input_box = find(driver, VENDOR, "location_input", PRESENT)
+            input_box.click()
+            input_box.clear()
+            input_box.send_keys(location)
+            print(f"📍 Typed location: {location}")
+
+            # Step 3: First suggestion, as soon as it is clickable
+            if not click_element("location_suggestion", "first suggestion"):
+                return False
+
+            # Step 4: The home page reloads for the new address; ready once
+            # its search box is back
+            find(driver, VENDOR, "search_input", PRESENT)
+
+            print("🏁 Location set successfully")
+            return True
+
+        if retry(VENDOR, "set_location", attempt, on_retry=driver.refresh):
+            return True
+        print("❌ Could not set location")
+        return False
+
+
+    # ------------------------------------------------------------------
+    # PERFORM SEARCH
+    # ------------------------------------------------------------------
+    def search_product(q):
+        def attempt():
+            box = find(driver, VENDOR, "search_input", CLICKABLE)
+            box.click()
+            box.clear()
+            box.send_keys(q)
+            box.send_keys(Keys.ENTER)
+
+            print(f"🔎 Searching '{q}'")
+            return True
+
+        if retry(VENDOR, "search", attempt):
+            return True
+        print("❌ Search failed")
+        return False
+
+
+    # ------------------------------------------------------------------
+    # WAIT FOR PRODUCTS
+    # ------------------------------------------------------------------
+    def wait_for_products():
+        def attempt():
+            # Returns as soon as the first card renders instead of a fixed sleep
+            WebDriverWait(driver, remaining_time(PRODUCT_WAIT)).until(
+                lambda d: d.find_elements(By.CSS_SELECTOR, CARD[1])
+            )
+            print("🟢 BigBasket products loaded")
+            return True
+
+        if retry(VENDOR, "wait_for_products", attempt, on_retry=driver.refresh):
+            return True
+        print("❌ Could not load product grid")
+        return False
+
+
+    # ----------------- MAIN LOGIC -------------------
+
+    results = {q: [] for q in search_queries}
+    deadline = time.time() + SETUP_BUDGET + QUERY_BUDGET * len(search_queries)
+
+    with retry_budget(len(search_queries), deadline=deadline):
+        if not safe_get(HOME_URL):
+            raise VendorUnavailable(VENDOR, "home page did not load")
+
+        if not set_location():
+            raise VendorUnavailable(VENDOR, f"could not set location '{location}'")
+
+        for i, q in enumerate(search_queries):
+            # Location lives in the session, only the search has to be redone
+            if i > 0 and not safe_get(HOME_URL):
+                break
+
+            if not search_product(q):
+                continue
+
+            if wait_for_products():
+                capture(driver, VENDOR, q)
+                results[q] = collect_products(driver, CARD, FIELDS, max_results)
+
+    return results
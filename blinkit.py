@@ -1,69 +1,52 @@
 # blinkit.py
 import time
-from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.common.keys import Keys
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.chrome.options import Options
 from selenium.common.exceptions import TimeoutException, WebDriverException
 
+from breaker import VendorUnavailable
+from browser import POOL, reset_session
+from extract import collect_products
+from retry import retry, retry_budget
+from selector_registry import find, PRESENT, CLICKABLE
+from snapshots import capture
 
-def get_products(location, search_query):
-    def create_driver(headless=True):
-        options = Options()
-        
-        if headless:
-            options.add_argument("--headless=new")
-            options.add_argument("--window-size=1920,1080")
-            options.add_argument("--force-device-scale-factor=1")
-            options.add_argument("--disable-gpu")
-            options.add_argument("--hide-scrollbars")
-            options.add_argument("--ignore-certificate-errors")
-            options.add_argument("--disable-features=IsolateOrigins,site-per-process")
-            options.add_argument("--blink-settings=imagesEnabled=true")
 
-            # 🔥 Trick websites into thinking it's NOT headless
-            options.add_argument("--disable-blink-features=AutomationControlled")
-            options.add_argument("--no-sandbox")
-            options.add_argument("--disable-dev-shm-usage")
-            options.add_argument("--disable-infobars")
-            options.add_argument("--disable-notifications")
+VENDOR = "Blinkit"
+HOME_URL = "https://blinkit.com/"
 
-            # 🔥 Fake user agent (desktop Chrome)
-            options.add_argument(
-                "--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-                "AppleWebKit/537.36 (KHTML, like Gecko) "
-                "Chrome/121.0.0.0 Safari/537.36"
-            )
+# Per-attempt wait for the product grid
+PRODUCT_WAIT = 10
 
-            # 🔥 Enable display rendering even in headless mode
-            options.add_argument("--disable-software-rasterizer")
-            options.add_argument("--use-gl=swiftshader")  # Fix hydration loading
+# Product card and its fields, read in one pass by extract.collect_products
+CARD = ("xpath", "//div[contains(@style,'grid-template-columns: repeat(12, 1fr)')]/div")
+FIELDS = {
+    "name": ("css", "div.tw-font-semibold", None),
+    "weight": ("xpath", ".//div[contains(text(),'g') or contains(text(),'kg') or contains(text(),'ml')]", None),
+    "price": ("xpath", ".//div[contains(text(),'₹')]", None),
+    "mrp": ("xpath", ".//div[contains(@class,'tw-line-through')]", None),
+    "discount": ("xpath", ".//div[contains(text(),'%OFF')]", None),
+    "delivery_time": ("xpath", ".//div[contains(text(),'mins')]", None),
+    "image_url": ("css", "img", "src"),
+}
 
-            # Flipkart sometimes blocks headless, this bypasses:
-            options.add_experimental_option("excludeSwitches", ["enable-automation"])
-            options.add_experimental_option("useAutomationExtension", False)
 
-        else:
-            options.add_argument("--start-maximized")
+def get_products(location, search_query, max_results=None):
+    return get_basket(location, [search_query], max_results=max_results)[search_query]
 
-        return webdriver.Chrome(options=options)
 
+def get_basket(location, search_queries, driver=None, max_results=None):
+    """
+    Set the location once, then run every query in the same browser session.
+    Pass a driver to reuse an existing browser, otherwise one is borrowed
+    from the shared pool. With max_results, extraction stops as soon as
+    that many products are collected.
+    """
+    if driver is None:
+        with POOL.driver() as driver:
+            return get_basket(location, search_queries, driver, max_results)
 
-    MAX_RETRIES = 1
-
-    # ----------------- SELENIUM SETUP -----------------
-    # chrome_options = Options()
-    # # chrome_options.add_argument("--headless=new")
-    # chrome_options.add_argument("--disable-blink-features=AutomationControlled")
-    # chrome_options.add_argument("--disable-notifications")
-    # chrome_options.add_argument("--disable-infobars")
-    # chrome_options.add_argument("--no-sandbox")
-    # chrome_options.add_argument("--disable-dev-shm-usage")
-
-    driver = create_driver(headless=True)
-    wait = WebDriverWait(driver, 25)
+    reset_session(driver, HOME_URL)
 
 
     # ------------------------------------------------------------------
@@ -86,43 +69,34 @@ def get_products(location, search_query):
     # ------------------------------------------------------------------
     # STEP 1: SAFE PAGE LOAD
     # ------------------------------------------------------------------
-    def safe_get(url, retries=3):
-        for attempt in range(1, retries + 1):
-            try:
-                driver.get(url)
-                print(f"🌐 Blinkit open attempt {attempt}")
-                time.sleep(3)
+    def safe_get(url):
+        def attempt():
+            driver.get(url)
+            print("🌐 Blinkit opened")
+            time.sleep(3)
 
-                click_try_again()
+            click_try_again()
 
-                if "blinkit" in driver.title.lower():
-                    return True
-            except:
-                pass
+            return "blinkit" in driver.title.lower()
 
-            print("⚠️ Page load retry ...")
-            time.sleep(2)
-
-        return False
+        return retry(VENDOR, "page_load", attempt)
 
 
     # ------------------------------------------------------------------
     # SAFE CLICK
     # ------------------------------------------------------------------
-    def click_element(selector, desc, by=By.CSS_SELECTOR, retries=3, js=True):
-        for i in range(retries):
-            try:
-                el = wait.until(EC.element_to_be_clickable((by, selector)))
-                if js:
-                    driver.execute_script("arguments[0].click();", el)
-                else:
-                    el.click()
-                print(f"✅ Clicked {desc}")
-                return True
-            except Exception as e:
-                print(f"⚠️ Retry {i+1}/{retries} failed clicking {desc}: {e}")
-                click_try_again()
-                time.sleep(1)
+    def click_element(step, desc, js=True):
+        def attempt():
+            el = find(driver, VENDOR, step, CLICKABLE)
+            if js:
+                driver.execute_script("arguments[0].click();", el)
+            else:
+                el.click()
+            print(f"✅ Clicked {desc}")
+            return True
+
+        if retry(VENDOR, "click", attempt, on_retry=click_try_again):
+            return True
         print(f"❌ Could not click {desc}")
         return False
 
@@ -131,187 +105,115 @@ def get_products(location, search_query):
     # STEP 2: LOCATION SETUP
     # ------------------------------------------------------------------
     def set_location():
-        for attempt in range(MAX_RETRIES):
+        def attempt():
+            click_try_again()
 
-            try:
-                click_try_again()
+            # open location box
+            location_box = find(driver, VENDOR, "location_input", PRESENT)
+            driver.execute_script("arguments[0].scrollIntoView(true);", location_box)
+            location_box.click()
+            time.sleep(1)
 
-                # open location box
-                location_box = wait.until(
-                    EC.presence_of_element_located((By.CSS_SELECTOR, "input[name='select-locality']"))
-                )
-                driver.execute_script("arguments[0].scrollIntoView(true);", location_box)
-                location_box.click()
-                time.sleep(1)
+            # type location
+            for ch in location:
+                location_box.send_keys(ch)
+                time.sleep(0.03)
 
-                # type location
-                for ch in location:
-                    location_box.send_keys(ch)
-                    time.sleep(0.03)
+            print(f"📍 Typed location: {location}")
+            time.sleep(2)
+            click_try_again()
 
-                print(f"📍 Typed location: {location}")
-                time.sleep(2)
-                click_try_again()
-
-                # select first suggestion
-                suggestion = wait.until(
-                    EC.element_to_be_clickable((By.CSS_SELECTOR,
-                        "div.LocationSearchList__LocationListContainer-sc-93rfr7-0 div"))
-                )
-                driver.execute_script("arguments[0].click();", suggestion)
-                print("🎯 Selected first location suggestion")
-                return True
-
-            except Exception as e:
-                print(f"⚠️ Location setup failed attempt {attempt+1}: {e}")
-                driver.refresh()
-                time.sleep(3)
+            # select first suggestion
+            suggestion = find(driver, VENDOR, "location_suggestion", CLICKABLE)
+            driver.execute_script("arguments[0].click();", suggestion)
+            print("🎯 Selected first location suggestion")
+            return True
 
-        return False
+        return retry(VENDOR, "set_location", attempt, on_retry=driver.refresh)
 
 
     # ------------------------------------------------------------------
     # STEP 3: OPEN SEARCH BAR
     # ------------------------------------------------------------------
     def open_search_bar():
-        for attempt in range(MAX_RETRIES):
-            try:
-                click_try_again()
-
-                # homepage search button
-                search_btn = wait.until(
-                    EC.element_to_be_clickable((By.CSS_SELECTOR, "a.SearchBar__Button-sc-16lps2d-4"))
-                )
-                driver.execute_script("arguments[0].click();", search_btn)
-
-                print("🔎 Search bar opened")
-                return True
-            except Exception as e:
-                print(f"⚠️ Search open retry {attempt+1}: {e}")
-                driver.refresh()
-                time.sleep(3)
-        return False
+        def attempt():
+            click_try_again()
+
+            # homepage search button
+            search_btn = find(driver, VENDOR, "search_button", CLICKABLE)
+            driver.execute_script("arguments[0].click();", search_btn)
+
+            print("🔎 Search bar opened")
+            return True
+
+        return retry(VENDOR, "open_search", attempt, on_retry=driver.refresh)
 
 
     # ------------------------------------------------------------------
     # STEP 4: PERFORM SEARCH
     # ------------------------------------------------------------------
     def perform_search(query):
-        for attempt in range(MAX_RETRIES):
-            try:
-                click_try_again()
-
-                search_input = wait.until(
-                    EC.presence_of_element_located(
-                        (By.CSS_SELECTOR, "input.SearchBarContainer__Input-sc-hl8pft-3"))
-                )
-                driver.execute_script("arguments[0].focus();", search_input)
-                search_input.clear()
+        def attempt():
+            click_try_again()
 
-                for ch in query:
-                    search_input.send_keys(ch)
-                    time.sleep(0.05)
+            search_input = find(driver, VENDOR, "search_input", PRESENT)
+            driver.execute_script("arguments[0].focus();", search_input)
+            search_input.clear()
 
-                search_input.send_keys(Keys.ENTER)
-                print(f"🔍 Searching '{query}' ...")
-                return True
+            for ch in query:
+                search_input.send_keys(ch)
+                time.sleep(0.05)
 
-            except Exception as e:
-                print(f"⚠️ Search retry {attempt+1}: {e}")
-                time.sleep(3)
+            search_input.send_keys(Keys.ENTER)
+            print(f"🔍 Searching '{query}' ...")
+            return True
 
-        return False
+        return retry(VENDOR, "search", attempt)
 
 
     # ------------------------------------------------------------------
     # STEP 5: WAIT FOR PRODUCT GRID
     # ------------------------------------------------------------------
     def wait_for_products():
-        for attempt in range(1, 10):
-            time.sleep(2)
-
+        def attempt():
             click_try_again()
 
-            try:
-                grid = wait.until(
-                    EC.presence_of_element_located(
-                        (By.XPATH, "//div[contains(@style,'grid-template-columns: repeat(12, 1fr)')]")
-                    )
-                )
-                cards = grid.find_elements(By.XPATH, "./div")
-                if cards:
-                    print(f"🟢 Found {len(cards)} products")
-                    return cards
-            except:
-                pass
-
-            print(f"⚠️ Products not found retry {attempt}/10")
-            driver.refresh()
+            grid = find(driver, VENDOR, "product_grid", PRESENT, timeout=PRODUCT_WAIT)
+            cards = grid.find_elements(By.XPATH, "./div")
+            if cards:
+                print(f"🟢 Found {len(cards)} products")
+            return bool(cards)
 
+        if retry(VENDOR, "wait_for_products", attempt, on_retry=driver.refresh):
+            return True
         print("❌ Product loading failed")
-        return []
-
-
-    # ------------------------------------------------------------------
-    # STEP 6: EXTRACT PRODUCTS
-    # ------------------------------------------------------------------
-    def extract_products(cards):
-        products = []
-        for c in cards:
-            try: name = c.find_element(By.CSS_SELECTOR, "div.tw-font-semibold").text
-            except: name = ""
-
-            try: weight = c.find_element(By.XPATH,
-                ".//div[contains(text(),'g') or contains(text(),'kg') or contains(text(),'ml')]").text
-            except: weight = ""
-
-            try: price = c.find_element(By.XPATH, ".//div[contains(text(),'₹')]").text
-            except: price = ""
-
-            try: mrp = c.find_element(By.XPATH, ".//div[contains(@class,'tw-line-through')]").text
-            except: mrp = ""
-
-            try: discount = c.find_element(By.XPATH, ".//div[contains(text(),'%OFF')]").text
-            except: discount = ""
-
-            try: eta = c.find_element(By.XPATH, ".//div[contains(text(),'mins')]").text
-            except: eta = ""
+        return False
 
-            try: img = c.find_element(By.CSS_SELECTOR, "img").get_attribute("src")
-            except: img = ""
 
-            products.append({
-                "name": name,
-                "weight": weight,
-                "price": price,
-                "mrp": mrp,
-                "discount": discount,
-                "delivery_time": eta,
-                "image_url": img
-            })
-        return products
+    # ------------------------ MAIN EXECUTION -----------------------------
 
+    results = {q: [] for q in search_queries}
 
-    # ------------------------ MAIN EXECUTION -----------------------------
+    with retry_budget(len(search_queries)):
+        if not safe_get(HOME_URL):
+            raise VendorUnavailable(VENDOR, "home page did not load")
 
-    if not safe_get("https://blinkit.com/"):
-        driver.quit()
-        return []
+        if not set_location():
+            raise VendorUnavailable(VENDOR, f"could not set location '{location}'")
 
-    if not set_location():
-        driver.quit()
-        return []
+        for i, q in enumerate(search_queries):
+            # Location lives in the session, only the search has to be redone
+            if i > 0 and not safe_get(HOME_URL):
+                break
 
-    if not open_search_bar():
-        driver.quit()
-        return []
+            if not open_search_bar():
+                continue
 
-    if not perform_search(search_query):
-        driver.quit()
-        return []
+            if not perform_search(q):
+                continue
 
-    cards = wait_for_products()
-    data = extract_products(cards)
+            if wait_for_products():
+                capture(driver, VENDOR, q)
+                results[q] = collect_products(driver, CARD, FIELDS, max_results)
 
-    driver.quit()
-    return data
+    return results
@@ -0,0 +1,220 @@
+# breaker.py
+import os
+import time
+import threading
+from collections import deque
+
+import metrics
+
+
+# ============================================================
+# CONFIG
+# ============================================================
+
+# Outcomes older than this don't count towards the failure rate
+BREAKER_WINDOW = float(os.getenv("BREAKER_WINDOW_SECONDS", "300"))
+
+# Don't judge a vendor on fewer calls than this
+BREAKER_MIN_CALLS = int(os.getenv("BREAKER_MIN_CALLS", "4"))
+
+# Share of failed or timed-out calls in the window that opens the breaker
+BREAKER_FAILURE_RATE = float(os.getenv("BREAKER_FAILURE_RATE", "0.5"))
+
+# A scrape slower than this counts as a timeout even if it returned data
+BREAKER_SLOW_CALL = float(os.getenv("BREAKER_SLOW_CALL_SECONDS", "120"))
+
+# How long an open breaker rejects calls; doubles on every failed probe
+BREAKER_OPEN_SECONDS = float(os.getenv("BREAKER_OPEN_SECONDS", "60"))
+BREAKER_MAX_OPEN_SECONDS = float(os.getenv("BREAKER_MAX_OPEN_SECONDS", "900"))
+
+# Half-open: concurrent probes let through, and successes needed to close
+BREAKER_PROBES = int(os.getenv("BREAKER_PROBES", "1"))
+BREAKER_PROBE_SUCCESSES = int(os.getenv("BREAKER_PROBE_SUCCESSES", "2"))
+
+
+CLOSED, HALF_OPEN, OPEN = "closed", "half_open", "open"
+STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+BREAKER_STATE = metrics.Gauge(
+    "bestdeal_breaker_state", "Circuit breaker state (0 closed, 1 half-open, 2 open)", ["vendor"]
+)
+BREAKER_REJECTIONS = metrics.Counter(
+    "bestdeal_breaker_rejections_total", "Scrapes skipped because the vendor's breaker was open",
+    ["vendor"]
+)
+BREAKER_TRANSITIONS = metrics.Counter(
+    "bestdeal_breaker_transitions_total", "Circuit breaker state changes", ["vendor", "state"]
+)
+
+
+class CircuitOpen(Exception):
+    def __init__(self, vendor, retry_in):
+        if retry_in > 0:
+            reason = f"circuit open, retrying in {retry_in:.0f}s"
+        else:
+            reason = "circuit half-open, recovery probe already running"
+        super().__init__(f"{vendor} temporarily skipped: {reason}")
+        self.vendor = vendor
+        self.retry_in = retry_in
+
+
+class VendorUnavailable(Exception):
+    """
+    Raised by a scraper that couldn't get as far as searching: the site
+    didn't load or the location couldn't be set. Counts as a failure,
+    unlike a search that simply found nothing.
+    """
+
+    def __init__(self, vendor, reason):
+        super().__init__(f"{vendor} unavailable: {reason}")
+        self.vendor = vendor
+        self.reason = reason
+
+
+# ============================================================
+# BREAKER
+# ============================================================
+
+class CircuitBreaker:
+    """
+    Closed: every call goes through and outcomes are recorded. Once the
+    window holds enough calls and too many of them failed or timed out,
+    the breaker opens and calls are rejected without touching a browser.
+    After the cool-down it goes half-open and lets a few probes through:
+    enough successes close it, a single failure re-opens it for longer.
+    """
+
+    def __init__(self, vendor):
+        self.vendor = vendor
+        self.state = CLOSED
+        self.outcomes = deque()  # (ts, "ok" | "failure" | "timeout")
+        self.opened_at = None
+        self.open_for = BREAKER_OPEN_SECONDS
+        self.probes_in_flight = 0
+        self.probe_successes = 0
+        self._lock = threading.Lock()
+        BREAKER_STATE.set(0, vendor=vendor)
+
+    def _move(self, state):
+        self.state = state
+        BREAKER_STATE.set(STATE_VALUES[state], vendor=self.vendor)
+        BREAKER_TRANSITIONS.inc(vendor=self.vendor, state=state)
+
+    def _trim(self, now):
+        while self.outcomes and now - self.outcomes[0][0] > BREAKER_WINDOW:
+            self.outcomes.popleft()
+
+    def retry_in(self):
+        if self.state != OPEN:
+            return 0.0
+        return max(0.0, self.opened_at + self.open_for - time.time())
+
+    def allow(self):
+        """Reserve a call. Raises CircuitOpen when the vendor should be skipped."""
+        with self._lock:
+            if self.state == OPEN:
+                if self.retry_in() > 0:
+                    BREAKER_REJECTIONS.inc(vendor=self.vendor)
+                    raise CircuitOpen(self.vendor, self.retry_in())
+                self._move(HALF_OPEN)
+                self.probe_successes = 0
+
+            if self.state == HALF_OPEN:
+                if self.probes_in_flight >= BREAKER_PROBES:
+                    BREAKER_REJECTIONS.inc(vendor=self.vendor)
+                    raise CircuitOpen(self.vendor, 0)
+                self.probes_in_flight += 1
+                return HALF_OPEN
+
+            return CLOSED
+
+    def record(self, ticket, outcome):
+        """
+        Report how a call reserved with allow() went. An outcome of None
+        (the call was cancelled) only hands back the probe slot.
+        """
+        now = time.time()
+        with self._lock:
+            if ticket == HALF_OPEN:
+                self.probes_in_flight -= 1
+            if outcome is None:
+                return
+
+            self.outcomes.append((now, outcome))
+            self._trim(now)
+
+            if self.state == HALF_OPEN:
+                if outcome != "ok":
+                    self.open_for = min(self.open_for * 2, BREAKER_MAX_OPEN_SECONDS)
+                    self.opened_at = now
+                    self._move(OPEN)
+                    return
+                self.probe_successes += 1
+                if self.probe_successes >= BREAKER_PROBE_SUCCESSES:
+                    self.outcomes.clear()
+                    self.open_for = BREAKER_OPEN_SECONDS
+                    self._move(CLOSED)
+                return
+
+            if self.state == CLOSED and len(self.outcomes) >= BREAKER_MIN_CALLS:
+                bad = sum(1 for _, o in self.outcomes if o != "ok")
+                if bad / len(self.outcomes) >= BREAKER_FAILURE_RATE:
+                    self.opened_at = now
+                    self._move(OPEN)
+
+    def snapshot(self):
+        with self._lock:
+            self._trim(time.time())
+            counts = {"ok": 0, "failure": 0, "timeout": 0}
+            for _, o in self.outcomes:
+                counts[o] += 1
+            return {
+                "state": self.state,
+                "retry_in": round(self.retry_in(), 1),
+                "window_calls": len(self.outcomes),
+                **counts,
+                "probes_in_flight": self.probes_in_flight,
+            }
+
+
+def outcome_of(data, elapsed, error=None, vendor=None):
+    """
+    Classify a finished scrape. Only errors (VendorUnavailable included)
+    and slow calls count against the vendor: a query that matches nothing
+    is a normal answer. An empty result is a failure only while one of the
+    vendor's steps has every selector broken (see selector_registry), i.e.
+    the markup changed.
+    """
+    if error is not None:
+        return "failure"
+    if elapsed > BREAKER_SLOW_CALL:
+        return "timeout"
+    if isinstance(data, dict):
+        data = [p for products in data.values() for p in products]
+    if not data and vendor is not None:
+        from selector_registry import broken_steps
+        if broken_steps(vendor):
+            return "failure"
+    return "ok"
+
+
+class BreakerBoard:
+    """One breaker per vendor, created on first use."""
+
+    def __init__(self):
+        self._breakers = {}
+        self._lock = threading.Lock()
+
+    def __getitem__(self, vendor):
+        with self._lock:
+            if vendor not in self._breakers:
+                self._breakers[vendor] = CircuitBreaker(vendor)
+            return self._breakers[vendor]
+
+    def snapshot(self):
+        with self._lock:
+            breakers = list(self._breakers.values())
+        return {b.vendor: b.snapshot() for b in breakers}
+
+
+BREAKERS = BreakerBoard()
@@ -0,0 +1,452 @@
+# browser.py
+import os
+import json
+import time
+import queue
+import shutil
+import tempfile
+import threading
+import subprocess
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+
+import requests
+import websocket
+from selenium import webdriver
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.chrome.service import Service
+from selenium.webdriver.chrome.remote_connection import ChromeRemoteConnection
+
+from resources import current_usage, kill_tree
+from vendors import REGISTRY
+from profiling import chrome_probe
+
+
+# ============================================================
+# CONFIG
+# ============================================================
+
+HEADLESS = os.getenv("SELENIUM_HEADLESS", "1") == "1"
+
+# Chrome processes kept alive and shared by all vendors; by default one
+# per vendor, so a search across all of them never waits for a browser
+BROWSER_POOL_SIZE = int(os.getenv("BROWSER_POOL_SIZE", "0")) or len(REGISTRY.all())
+
+# Recycle a browser after this many scrapes so leaks can't pile up
+BROWSER_MAX_USES = int(os.getenv("BROWSER_MAX_USES", "50"))
+
+# "process": one Chrome per pooled driver
+# "context": pooled drivers are tabs in isolated browser contexts (own
+#            cookies/storage) multiplexed onto a few shared Chrome processes
+BROWSER_BACKEND = os.getenv("BROWSER_BACKEND", "process")
+CONTEXTS_PER_BROWSER = int(os.getenv("CONTEXTS_PER_BROWSER", "8"))
+
+# Resolved once at import. With a chromedriver path Selenium skips its
+# Selenium Manager lookup (a subprocess, and a download attempt when
+# offline) on every new driver.
+CHROMEDRIVER_PATH = os.getenv("CHROMEDRIVER") or shutil.which("chromedriver")
+CHROME_BINARY = os.getenv("CHROME_BIN")
+
+
+# ============================================================
+# DRIVER FACTORY
+# ============================================================
+
+def chrome_arguments(headless=HEADLESS):
+    if not headless:
+        return ["--start-maximized"]
+
+    return [
+        "--headless=new",
+        "--window-size=1920,1080",
+        "--force-device-scale-factor=1",
+        "--disable-gpu",
+        "--hide-scrollbars",
+        "--ignore-certificate-errors",
+        "--disable-features=IsolateOrigins,site-per-process",
+        "--blink-settings=imagesEnabled=true",
+
+        # 🔥 Trick websites into thinking it's NOT headless
+        "--disable-blink-features=AutomationControlled",
+        "--no-sandbox",
+        "--disable-dev-shm-usage",
+        "--disable-infobars",
+        "--disable-notifications",
+
+        # 🔥 Fake user agent (desktop Chrome)
+        "--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+        "AppleWebKit/537.36 (KHTML, like Gecko) "
+        "Chrome/121.0.0.0 Safari/537.36",
+
+        # 🔥 Enable display rendering even in headless mode
+        "--disable-software-rasterizer",
+        "--use-gl=swiftshader",  # Fix hydration loading
+    ]
+
+
+def create_driver(headless=HEADLESS):
+    options = Options()
+    for arg in chrome_arguments(headless):
+        options.add_argument(arg)
+
+    if CHROME_BINARY:
+        options.binary_location = CHROME_BINARY
+
+    if headless:
+        # Flipkart sometimes blocks headless, this bypasses:
+        options.add_experimental_option("excludeSwitches", ["enable-automation"])
+        options.add_experimental_option("useAutomationExtension", False)
+
+    service = Service(executable_path=CHROMEDRIVER_PATH) if CHROMEDRIVER_PATH else Service()
+    return webdriver.Chrome(service=service, options=options)
+
+
+def reset_session(driver, url):
+    """
+    Forget everything a previous scrape left behind for this site (cookies,
+    local storage, service workers) so a reused browser behaves like a fresh
+    one, e.g. the location picker shows up again.
+    """
+    parts = urlsplit(url)
+    origin = f"{parts.scheme}://{parts.netloc}"
+    try:
+        driver.execute_cdp_cmd("Network.clearBrowserCookies", {})
+        driver.execute_cdp_cmd("Storage.clearDataForOrigin", {"origin": origin, "storageTypes": "all"})
+    except Exception as e:
+        print(f"⚠️ Could not reset session for {origin}: {e}")
+
+
+def is_alive(driver):
+    try:
+        driver.current_url
+        return True
+    except Exception:
+        return False
+
+
+def quit_quietly(driver):
+    try:
+        driver.quit()
+    except Exception:
+        pass
+
+
+# ============================================================
+# BACKENDS
+# ============================================================
+
+def find_chrome():
+    for path in (os.getenv("CHROME_BIN"), "chromium", "google-chrome", "chromium-browser", "chrome"):
+        if path and shutil.which(path):
+            return shutil.which(path)
+    raise RuntimeError("Chrome binary not found, set CHROME_BIN")
+
+
+def find_chromedriver():
+    if not CHROMEDRIVER_PATH:
+        raise RuntimeError("chromedriver not found, set CHROMEDRIVER")
+    return CHROMEDRIVER_PATH
+
+
+class ProcessBackend:
+    """Every driver gets its own chromedriver + Chrome process tree."""
+
+    name = "process"
+    shared = False
+
+    def new_driver(self):
+        return create_driver()
+
+    def close_driver(self, driver):
+        quit_quietly(driver)
+
+    def root_pids(self, driver):
+        """Processes whose tree belongs to this driver (chromedriver -> Chrome)."""
+        return [driver.service.process.pid]
+
+    def kill(self, driver):
+        kill_tree(*self.root_pids(driver))
+
+    def close(self):
+        pass
+
+
+class AttachedChrome(webdriver.Remote):
+    """WebDriver session on a shared chromedriver, attached to a running Chrome."""
+
+    def execute_cdp_cmd(self, cmd, cmd_args):
+        return self.execute("executeCdpCommand", {"cmd": cmd, "params": cmd_args})["value"]
+
+
+class ChromeHost:
+    """
+    One Chrome process started with a DevTools port, plus one chromedriver
+    server that hosts a WebDriver session per tab. Browser-level CDP calls
+    (creating contexts and tabs) go over the browser websocket.
+    """
+
+    def __init__(self, headless=HEADLESS):
+        self.user_data_dir = tempfile.mkdtemp(prefix="bestdeal-chrome-")
+        self.process = subprocess.Popen(
+            [find_chrome(), "--remote-debugging-port=0", f"--user-data-dir={self.user_data_dir}",
+             *chrome_arguments(headless), "about:blank"],
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        self.port = self._wait_for_port()
+
+        info = requests.get(f"http://127.0.0.1:{self.port}/json/version", timeout=5).json()
+        self._ws = websocket.create_connection(info["webSocketDebuggerUrl"], timeout=10)
+        self._ws_lock = threading.Lock()
+        self._next_id = 0
+
+        self.service = Service(executable_path=find_chromedriver())
+        self.service.start()
+        self.tabs = {}   # id(driver) -> (browser_context_id, target_id)
+
+    def _wait_for_port(self, timeout=15):
+        path = os.path.join(self.user_data_dir, "DevToolsActivePort")
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            if os.path.exists(path):
+                with open(path) as f:
+                    first = f.readline().strip()
+                if first:
+                    return int(first)
+            if self.process.poll() is not None:
+                break
+            time.sleep(0.05)
+        self.close()
+        raise RuntimeError("Chrome did not open a DevTools port")
+
+    def cdp(self, method, params=None):
+        with self._ws_lock:
+            self._next_id += 1
+            msg_id = self._next_id
+            self._ws.send(json.dumps({"id": msg_id, "method": method, "params": params or {}}))
+            while True:
+                msg = json.loads(self._ws.recv())
+                if msg.get("id") != msg_id:
+                    continue  # events
+                if "error" in msg:
+                    raise RuntimeError(f"{method}: {msg['error'].get('message')}")
+                return msg.get("result", {})
+
+    def alive(self):
+        return self.process.poll() is None
+
+    def new_driver(self):
+        context_id = self.cdp("Target.createBrowserContext", {"disposeOnDetach": False})["browserContextId"]
+        target_id = self.cdp("Target.createTarget", {"url": "about:blank", "browserContextId": context_id})["targetId"]
+
+        try:
+            options = Options()
+            options.debugger_address = f"127.0.0.1:{self.port}"
+            driver = AttachedChrome(
+                command_executor=ChromeRemoteConnection(self.service.service_url),
+                options=options
+            )
+            # chromedriver window handles are DevTools target ids
+            driver.switch_to.window(target_id)
+        except Exception:
+            self._dispose(context_id, target_id)
+            raise
+
+        self.tabs[id(driver)] = (context_id, target_id)
+        return driver
+
+    def close_driver(self, driver):
+        context_id, target_id = self.tabs.pop(id(driver), (None, None))
+        try:
+            # Attached sessions never close the shared browser on quit
+            driver.quit()
+        except Exception:
+            pass
+        if context_id:
+            self._dispose(context_id, target_id)
+
+    def _dispose(self, context_id, target_id):
+        try:
+            self.cdp("Target.closeTarget", {"targetId": target_id})
+            self.cdp("Target.disposeBrowserContext", {"browserContextId": context_id})
+        except Exception as e:
+            print(f"⚠️ Could not dispose browser context: {e}")
+
+    def close(self):
+        try:
+            self._ws.close()
+        except Exception:
+            pass
+        try:
+            self.service.stop()
+        except Exception:
+            pass
+        self.process.terminate()
+        try:
+            self.process.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+        shutil.rmtree(self.user_data_dir, ignore_errors=True)
+
+
+class ContextBackend:
+    """
+    Drivers are tabs in their own browser contexts, packed onto as few Chrome
+    processes as possible (CONTEXTS_PER_BROWSER tabs each).
+    """
+
+    name = "context"
+    shared = True   # resource figures cover the whole shared Chrome
+
+    def __init__(self, per_browser=CONTEXTS_PER_BROWSER, headless=HEADLESS):
+        self.per_browser = per_browser
+        self.headless = headless
+        self.hosts = []
+        self._owner = {}   # id(driver) -> host
+        self._lock = threading.Lock()
+
+    def new_driver(self):
+        with self._lock:
+            for host in [h for h in self.hosts if not h.alive()]:
+                self.hosts.remove(host)
+                host.close()
+
+            host = min(self.hosts, key=lambda h: len(h.tabs), default=None)
+            if host is None or len(host.tabs) >= self.per_browser:
+                host = ChromeHost(self.headless)
+                self.hosts.append(host)
+
+            # Reserve the slot before the slow attach so concurrent callers spread out
+            placeholder = object()
+            host.tabs[id(placeholder)] = (None, None)
+
+        try:
+            driver = host.new_driver()
+        finally:
+            host.tabs.pop(id(placeholder), None)
+
+        with self._lock:
+            self._owner[id(driver)] = host
+        return driver
+
+    def close_driver(self, driver):
+        with self._lock:
+            host = self._owner.pop(id(driver), None)
+        if host is None:
+            quit_quietly(driver)
+        else:
+            host.close_driver(driver)
+
+    def root_pids(self, driver):
+        """The shared Chrome + chromedriver hosting this tab."""
+        host = self._owner.get(id(driver))
+        if host is None:
+            return []
+        return [host.process.pid, host.service.process.pid]
+
+    def kill(self, driver):
+        self.close_driver(driver)
+
+    def close(self):
+        with self._lock:
+            hosts, self.hosts = self.hosts, []
+        for host in hosts:
+            host.close()
+
+
+BACKENDS = {"process": ProcessBackend, "context": ContextBackend}
+
+
+# ============================================================
+# DRIVER POOL
+# ============================================================
+
+class DriverPool:
+    """
+    Bounded pool of warm Chrome drivers. At most `size` drivers exist at a
+    time; acquire() blocks until one is free. Drivers that crashed during a
+    scrape or reached BROWSER_MAX_USES are closed instead of being reused.
+    """
+
+    def __init__(self, size=BROWSER_POOL_SIZE, backend=None, max_uses=BROWSER_MAX_USES):
+        self.size = size
+        self.backend = backend or BACKENDS[BROWSER_BACKEND]()
+        self.max_uses = max_uses
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+        self._uses = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, timeout=None):
+        if not self._slots.acquire(timeout=timeout):
+            raise TimeoutError("No pooled browser became available")
+
+        try:
+            while True:
+                try:
+                    driver = self._idle.get_nowait()
+                except queue.Empty:
+                    return self.backend.new_driver()
+                if is_alive(driver):
+                    return driver
+                self._forget(driver)
+        except Exception:
+            self._slots.release()
+            raise
+
+    def release(self, driver, broken=False):
+        with self._lock:
+            self._uses[id(driver)] = self._uses.get(id(driver), 0) + 1
+            worn_out = self._uses[id(driver)] >= self.max_uses
+
+        if broken or worn_out:
+            self._forget(driver)
+        else:
+            self._idle.put(driver)
+        self._slots.release()
+
+    def _forget(self, driver):
+        with self._lock:
+            self._uses.pop(id(driver), None)
+        self.backend.close_driver(driver)
+
+    @contextmanager
+    def driver(self, timeout=None):
+        driver = self.acquire(timeout)
+        broken = False
+
+        # Let the resource monitor see (and if needed kill) this browser
+        usage = current_usage()
+        if usage is not None:
+            usage.attach(
+                self.backend.root_pids(driver),
+                kill=lambda: self.backend.kill(driver),
+                shared=self.backend.shared
+            )
+
+        # Chrome's own counters when this scrape is being profiled
+        probe = chrome_probe(driver)
+
+        try:
+            yield driver
+        except BaseException:
+            broken = True
+            raise
+        finally:
+            if probe is not None:
+                probe.finish()
+            killed = usage is not None and usage.killed
+            self.release(driver, broken=broken or bool(killed))
+
+    def close(self):
+        while True:
+            try:
+                self._forget(self._idle.get_nowait())
+            except queue.Empty:
+                break
+        self.backend.close()
+
+    def stats(self):
+        return {"size": self.size, "idle": self._idle.qsize(), "backend": self.backend.name}
+
+
+POOL = DriverPool()
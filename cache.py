@@ -0,0 +1,89 @@
+# cache.py
+import os
+import time
+import threading
+from collections import OrderedDict
+
+
+# ============================================================
+# CONFIG
+# ============================================================
+
+RESULT_TTL = int(os.getenv("RESULT_TTL_SECONDS", "900"))
+RESULT_CACHE_SIZE = int(os.getenv("RESULT_CACHE_SIZE", "2000"))
+
+
+def normalize(text):
+    """Lower-case and collapse whitespace so 'Milk ' and 'milk' share a key."""
+    return " ".join((text or "").lower().split())
+
+
+def cache_key(vendor, location, product):
+    return (vendor, normalize(location), normalize(product))
+
+
+# ============================================================
+# RESULT CACHE
+# ============================================================
+
+class ResultCache:
+    """Thread-safe TTL + LRU cache of vendor scrape results."""
+
+    def __init__(self, ttl=RESULT_TTL, max_entries=RESULT_CACHE_SIZE):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, vendor, location, product, limit=None):
+        """
+        Fresh results, truncated to `limit`. An entry scraped with a smaller
+        max_results only answers requests that need no more than it holds.
+        """
+        key = cache_key(vendor, location, product)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or time.time() - entry[0] > self.ttl:
+                self.misses += 1
+                return None
+
+            stored_at, data, stored_limit = entry
+            complete = stored_limit is None or len(data) < stored_limit
+            if not complete and (limit is None or limit > stored_limit):
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return data[:limit] if limit else data
+
+    def set(self, vendor, location, product, data, limit=None):
+        # Empty lists usually mean a failed scrape, never pin those for a full TTL
+        if not data:
+            return
+        key = cache_key(vendor, location, product)
+        with self._lock:
+            # Don't let a truncated scrape replace a fresh complete one
+            old = self._entries.get(key)
+            if limit and old and old[2] is None and time.time() - old[0] <= self.ttl:
+                return
+            self._entries[key] = (time.time(), data, limit)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def expires_in(self, vendor, location, product):
+        """Seconds until the entry goes stale (<= 0 when missing or expired)."""
+        key = cache_key(vendor, location, product)
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None:
+            return 0
+        return self.ttl - (time.time() - entry[0])
+
+    def stats(self):
+        with self._lock:
+            size = len(self._entries)
+        return {"entries": size, "hits": self.hits, "misses": self.misses, "ttl": self.ttl}
@@ -0,0 +1,426 @@
+# cdp.py
+import os
+import json
+import time
+import asyncio
+import shutil
+import tempfile
+from contextlib import asynccontextmanager
+
+import websockets
+
+from browser import HEADLESS, chrome_arguments, find_chrome
+from extract import EXTRACT_JS, MAX_SCROLLS, SCROLL_SETTLE, POLL, field_spec
+from selector_registry import SELECTORS, WAIT_TIME, CSS, health, step_timeout, record_misses
+
+
+# ============================================================
+# CONFIG
+# ============================================================
+
+# Chrome processes driven from the event loop, and tabs open on each at once
+CDP_BROWSERS = int(os.getenv("CDP_BROWSERS", "2"))
+CDP_PAGES_PER_BROWSER = int(os.getenv("CDP_PAGES_PER_BROWSER", "16"))
+
+# Longest a single DevTools command may take
+CDP_TIMEOUT = 30
+PAGE_LOAD_TIMEOUT = 30
+
+
+class CDPError(Exception):
+    pass
+
+
+# ============================================================
+# BROWSER CONNECTION
+# ============================================================
+
+class Browser:
+    """
+    One Chrome process driven over its browser-level DevTools websocket.
+    Tabs attach with flat sessions, so every tab's traffic is multiplexed
+    on that one socket and any number of coroutines can drive tabs at
+    once without a thread or a chromedriver each.
+    """
+
+    def __init__(self, process, user_data_dir):
+        self.process = process
+        self.user_data_dir = user_data_dir
+        self.ws = None
+        self.pages = 0
+        self._next_id = 0
+        self._pending = {}
+        self._reader = None
+
+    @classmethod
+    async def launch(cls, headless=HEADLESS):
+        user_data_dir = tempfile.mkdtemp(prefix="bestdeal-cdp-")
+        process = await asyncio.create_subprocess_exec(
+            find_chrome(), "--remote-debugging-port=0", f"--user-data-dir={user_data_dir}",
+            *chrome_arguments(headless), "about:blank",
+            stdout=asyncio.subprocess.DEVNULL, stderr=asyncio.subprocess.DEVNULL
+        )
+        browser = cls(process, user_data_dir)
+        try:
+            port, path = await browser._wait_for_port()
+            browser.ws = await websockets.connect(f"ws://127.0.0.1:{port}{path}", max_size=None)
+        except BaseException:
+            await browser.close()
+            raise
+        browser._reader = asyncio.create_task(browser._read())
+        return browser
+
+    async def _wait_for_port(self, timeout=15):
+        # Line 1 is the port, line 2 the browser websocket path
+        path = os.path.join(self.user_data_dir, "DevToolsActivePort")
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            if os.path.exists(path):
+                with open(path) as f:
+                    lines = f.read().split()
+                if len(lines) >= 2:
+                    return int(lines[0]), lines[1]
+            if self.process.returncode is not None:
+                break
+            await asyncio.sleep(0.05)
+        raise CDPError("Chrome did not open a DevTools port")
+
+    async def _read(self):
+        try:
+            async for raw in self.ws:
+                msg = json.loads(raw)
+                future = self._pending.get(msg.get("id"))
+                if future is None or future.done():
+                    continue  # events, or a command that already timed out
+                if "error" in msg:
+                    future.set_exception(CDPError(msg["error"].get("message")))
+                else:
+                    future.set_result(msg.get("result", {}))
+        except websockets.ConnectionClosed:
+            pass
+        finally:
+            for future in self._pending.values():
+                if not future.done():
+                    future.set_exception(CDPError("browser connection closed"))
+
+    async def send(self, method, params=None, session_id=None, timeout=CDP_TIMEOUT):
+        self._next_id += 1
+        msg_id = self._next_id
+        msg = {"id": msg_id, "method": method, "params": params or {}}
+        if session_id:
+            msg["sessionId"] = session_id
+
+        future = asyncio.get_running_loop().create_future()
+        self._pending[msg_id] = future
+        try:
+            await self.ws.send(json.dumps(msg))
+            return await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            raise CDPError(f"{method} timed out after {timeout}s")
+        finally:
+            self._pending.pop(msg_id, None)
+
+    def alive(self):
+        return self.process.returncode is None and self._reader is not None and not self._reader.done()
+
+    async def new_page(self):
+        """A tab in its own browser context: fresh cookies and storage every time."""
+        context_id = (await self.send("Target.createBrowserContext", {"disposeOnDetach": True}))["browserContextId"]
+        target_id = (await self.send(
+            "Target.createTarget", {"url": "about:blank", "browserContextId": context_id}
+        ))["targetId"]
+        session_id = (await self.send(
+            "Target.attachToTarget", {"targetId": target_id, "flatten": True}
+        ))["sessionId"]
+        return Page(self, context_id, target_id, session_id)
+
+    async def close(self):
+        if self.ws is not None:
+            await self.ws.close()
+        if self.process.returncode is None:
+            self.process.terminate()
+            try:
+                await asyncio.wait_for(self.process.wait(), 5)
+            except asyncio.TimeoutError:
+                self.process.kill()
+        shutil.rmtree(self.user_data_dir, ignore_errors=True)
+
+
+# ============================================================
+# PAGE
+# ============================================================
+
+class Page:
+    def __init__(self, browser, context_id, target_id, session_id):
+        self.browser = browser
+        self.context_id = context_id
+        self.target_id = target_id
+        self.session_id = session_id
+
+    async def send(self, method, params=None, timeout=CDP_TIMEOUT):
+        return await self.browser.send(method, params, self.session_id, timeout)
+
+    async def call(self, script, *args, timeout=CDP_TIMEOUT):
+        """
+        Run a Selenium-style script body (`arguments`, `return`) in the page,
+        so the same JS serves both engines. Returns the value as JSON.
+        """
+        expression = f"(function() {{ {script} }}).apply(null, {json.dumps(args)})"
+        result = await self.send("Runtime.evaluate", {
+            "expression": expression, "returnByValue": True, "awaitPromise": True
+        }, timeout=timeout)
+        if "exceptionDetails" in result:
+            details = result["exceptionDetails"]
+            raise CDPError(details.get("exception", {}).get("description") or details.get("text"))
+        return result.get("result", {}).get("value")
+
+    async def wait(self, script, *args, timeout=WAIT_TIME, poll=POLL):
+        """Poll `script` until it returns something truthy. Raises TimeoutError."""
+        deadline = time.time() + timeout
+        while True:
+            try:
+                value = await self.call(script, *args)
+                if value:
+                    return value
+            except CDPError:
+                pass  # mid-navigation, no execution context yet
+            if time.time() >= deadline:
+                raise TimeoutError(f"condition not met within {timeout:.1f}s")
+            await asyncio.sleep(poll)
+
+    async def goto(self, url, timeout=PAGE_LOAD_TIMEOUT):
+        result = await self.send("Page.navigate", {"url": url}, timeout=timeout)
+        if result.get("errorText"):
+            raise CDPError(f"{url}: {result['errorText']}")
+        await self.wait("return document.readyState === 'complete'", timeout=timeout)
+
+    async def reload(self):
+        await self.send("Page.reload")
+        await asyncio.sleep(POLL)
+        await self.wait("return document.readyState === 'complete'", timeout=PAGE_LOAD_TIMEOUT)
+
+    async def title(self):
+        return await self.call("return document.title") or ""
+
+    async def type_text(self, text, delay=0.05):
+        """Type into the focused element one character at a time, like a user."""
+        for ch in text:
+            await self.send("Input.insertText", {"text": ch})
+            await asyncio.sleep(delay)
+
+    async def press_enter(self):
+        key = {"key": "Enter", "code": "Enter", "windowsVirtualKeyCode": 13}
+        await self.send("Input.dispatchKeyEvent", {"type": "keyDown", "text": "\r", **key})
+        await self.send("Input.dispatchKeyEvent", {"type": "keyUp", **key})
+
+    async def close(self):
+        try:
+            await self.browser.send("Target.closeTarget", {"targetId": self.target_id})
+            await self.browser.send("Target.disposeBrowserContext", {"browserContextId": self.context_id})
+        except CDPError as e:
+            print(f"⚠️ Could not dispose browser context: {e}")
+
+
+# ============================================================
+# PAGE POOL
+# ============================================================
+
+class PagePool:
+    """
+    Hands out fresh tabs on a few shared Chrome processes, launched on
+    first use and replaced when they die. Closing a tab disposes its
+    context, so nothing leaks from one scrape into the next.
+    """
+
+    def __init__(self, browsers=CDP_BROWSERS, pages_per_browser=CDP_PAGES_PER_BROWSER, headless=HEADLESS):
+        self.max_browsers = browsers
+        self.pages_per_browser = pages_per_browser
+        self.headless = headless
+        self.browsers = []
+        self._slots = asyncio.Semaphore(browsers * pages_per_browser)
+        self._lock = asyncio.Lock()
+
+    async def _reserve(self):
+        async with self._lock:
+            for browser in [b for b in self.browsers if not b.alive()]:
+                self.browsers.remove(browser)
+                await browser.close()
+
+            browser = min(self.browsers, key=lambda b: b.pages, default=None)
+            if browser is None or (browser.pages >= self.pages_per_browser
+                                   and len(self.browsers) < self.max_browsers):
+                browser = await Browser.launch(self.headless)
+                self.browsers.append(browser)
+            browser.pages += 1
+            return browser
+
+    @asynccontextmanager
+    async def page(self):
+        async with self._slots:
+            browser = await self._reserve()
+            page = None
+            try:
+                page = await browser.new_page()
+                yield page
+            finally:
+                browser.pages -= 1
+                if page is not None and browser.alive():
+                    await page.close()
+
+    async def close(self):
+        async with self._lock:
+            for browser in self.browsers:
+                await browser.close()
+            self.browsers = []
+
+    def stats(self):
+        return {
+            "browsers": len(self.browsers),
+            "pages": sum(b.pages for b in self.browsers),
+            "capacity": self.max_browsers * self.pages_per_browser,
+        }
+
+
+PAGES = PagePool()
+
+
+# ============================================================
+# SELECTOR CHAINS
+# ============================================================
+
+# Match a step's selector chain and act on the winner in the same round
+# trip, so there is no element handle to go stale in between
+FIND_JS = """
+const [chain, condition, action, text] = arguments;
+
+function all(by, sel) {
+    if (by === "css") return Array.from(document.querySelectorAll(sel));
+    const snap = document.evaluate(sel, document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+    const out = [];
+    for (let i = 0; i < snap.snapshotLength; i++) out.push(snap.snapshotItem(i));
+    return out;
+}
+
+function visible(el) {
+    const r = el.getBoundingClientRect();
+    const s = getComputedStyle(el);
+    return r.width > 0 && r.height > 0 && s.visibility !== "hidden" && s.display !== "none";
+}
+
+for (let i = 0; i < chain.length; i++) {
+    let els = all(chain[i][0], chain[i][1]);
+    if (condition === "visible" || condition === "clickable") els = els.filter(visible);
+    if (condition === "clickable") els = els.filter(el => !el.disabled);
+    if (!els.length) continue;
+
+    let el = els[0];
+    if (action === "pick") {
+        el = els.find(e => (e.innerText || "").toLowerCase().includes(text)) || el;
+    }
+    if (action === "click" || action === "pick") {
+        el.scrollIntoView({block: "center"});
+        el.click();
+    }
+    if (action === "focus") {
+        el.focus();
+        if (el.select) el.select();
+    }
+    return [i, (el.innerText || "").trim().slice(0, 80)];
+}
+return null;
+"""
+
+
+async def page_ready(page):
+    try:
+        return await page.call("return document.readyState;") == "complete"
+    except Exception:
+        return False
+
+
+async def find(page, vendor, step, condition="present", action=None, text="", timeout=WAIT_TIME,
+               record=True):
+    """
+    selector_registry.find for coroutine scrapers. `condition` is one of
+    present / visible / clickable; `action` (click, pick, focus) runs on
+    the matched element. Returns the element's text.
+    """
+    chain = SELECTORS[vendor][step]
+    timeout = step_timeout(vendor, step, timeout)
+
+    spec = [["css" if by == CSS else "xpath", sel] for by, sel in chain]
+    try:
+        index, found = await page.wait(FIND_JS, spec, condition, action, text.lower(), timeout=timeout)
+    except TimeoutError:
+        if record:
+            record_misses(vendor, step, await page_ready(page))
+        raise TimeoutError(f"{vendor}/{step}: no selector matched within {timeout}s")
+
+    if not record:
+        return found
+
+    for i, (_, sel) in enumerate(chain):
+        health(vendor, step, sel).record(i == index)
+        if i == index:
+            break
+
+    return found
+
+
+# ============================================================
+# EXTRACTION
+# ============================================================
+
+COUNT_JS = """
+const [by, sel] = arguments;
+if (by === "css") return document.querySelectorAll(sel).length;
+return document.evaluate(sel, document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null).snapshotLength;
+"""
+
+
+async def count_cards(page, card):
+    return await page.call(COUNT_JS, card[0], card[1]) or 0
+
+
+async def scroll_step(page, card, settle=SCROLL_SETTLE):
+    """extract.scroll_step over CDP."""
+    before_cards = await count_cards(page, card)
+    before_height = await page.call("return document.body.scrollHeight")
+    await page.call("window.scrollBy(0, window.innerHeight)")
+
+    deadline = time.time() + settle
+    while time.time() < deadline:
+        await asyncio.sleep(POLL)
+        if await count_cards(page, card) > before_cards:
+            return True
+        if await page.call("return document.body.scrollHeight") > before_height:
+            return True
+
+    at_bottom = await page.call(
+        "return window.innerHeight + window.scrollY >= document.body.scrollHeight - 2")
+    return not at_bottom
+
+
+async def collect_products(page, card, fields, max_results=None, scroll=False, max_scrolls=MAX_SCROLLS):
+    """extract.collect_products over CDP, same field specs and rules."""
+    spec = field_spec(fields)
+    products, seen = [], set()
+    steps = max_scrolls if (scroll or max_results) else 0
+
+    for step in range(steps + 1):
+        for row in await page.call(EXTRACT_JS, card[0], card[1], spec) or []:
+            row = {name: row.get(name, "") for name in fields}
+            key = tuple(row.values())
+            if not row.get("name") or key in seen:
+                continue
+            seen.add(key)
+            products.append(row)
+
+        if max_results and len(products) >= max_results:
+            print(f"✂️ Collected {max_results} products, stopping early")
+            return products[:max_results]
+
+        if step == steps or not await scroll_step(page, card):
+            break
+
+    return products
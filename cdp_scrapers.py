@@ -0,0 +1,274 @@
+# cdp_scrapers.py
+"""
+The vendor flows on the asyncio DevTools engine (cdp.py). Every step maps
+onto the same selector chains, retry policies, card and field specs as the
+Selenium scrapers, so both engines break and get fixed together; only the
+transport differs. Selected with SCRAPE_ENGINE=cdp.
+"""
+import time
+import asyncio
+
+import zepto
+import blinkit
+import instamart
+import flipkart_minutes
+import bigbasket
+from breaker import VendorUnavailable
+from cdp import PAGES, COUNT_JS, find, collect_products
+from extract import scroll_allowance
+from retry import retry_async, retry_budget
+from snapshots import capture_async
+from profiling import chrome_metrics_async
+
+
+# ============================================================
+# FLOWS
+# ============================================================
+
+# Steps, run in order within one retried attempt:
+#   ("click", step)          click the step's element (own "click" retries)
+#   ("tap", step, timeout)   click it if it shows up within timeout, else skip
+#   ("type", step, delay)    focus the step's input and type the text
+#   ("pick", step)           click the option whose text best matches the text
+#   ("visible", step)        wait until the step's element is visible
+#   ("sleep", seconds)       let the page settle, then clear "Try again"
+#   ("enter",)               press Enter
+
+FLOWS = {
+    "Zepto": {
+        "module": zepto,
+        "title": "zepto",
+        "try_again": ("xpath", "//button[contains(., 'Try Again')]"),
+        "set_location": [
+            ("click", "location_button"),
+            ("type", "location_input", 0.04),
+            ("sleep", 2),
+            ("pick", "location_suggestion"),
+            ("sleep", 2),
+            ("click", "location_confirm"),
+        ],
+        "open_search": [("click", "search_icon"), ("visible", "search_input")],
+        "search": [("type", "search_input", 0.05), ("enter",)],
+        "product_wait": 10,
+        "reload_on_wait": True,
+    },
+    "Blinkit": {
+        "module": blinkit,
+        "title": "blinkit",
+        "try_again": ("xpath", "//button[contains(., 'Try Again')]"),
+        "set_location": [
+            ("type", "location_input", 0.03),
+            ("sleep", 2),
+            ("click", "location_suggestion"),
+        ],
+        "open_search": [("click", "search_button")],
+        "search": [("type", "search_input", 0.05), ("enter",)],
+        "product_wait": 10,
+        "reload_on_wait": True,
+    },
+    "Instamart": {
+        "module": instamart,
+        "title": "instamart",
+        "try_again": ("css", "div[data-testid='error-button'] button"),
+        "set_location": [
+            ("click", "address_container"),
+            ("click", "search_location"),
+            ("type", "location_input", 0.03),
+            ("sleep", 2),
+            ("click", "location_suggestion"),
+            ("click", "location_confirm"),
+        ],
+        "open_search": [("click", "home_search"), ("visible", "search_page")],
+        "search": [("type", "search_input", 0.04), ("enter",)],
+        "product_wait": 15,
+        "reload_on_wait": False,
+    },
+    "Flipkart": {
+        "module": flipkart_minutes,
+        "title": "flipkart",
+        "try_again": ("xpath", "//button[contains(.,'Try Again')]"),
+        "set_location": [
+            ("visible", "location_modal"),
+            ("tap", "location_manual", flipkart_minutes.MANUAL_ENTRY_WAIT),
+            ("type", "location_input", 0.04),
+            ("pick", "location_suggestion"),
+            ("click", "location_confirm"),
+            ("visible", "search_input"),
+        ],
+        "open_search": [("visible", "search_input")],
+        "search": [("type", "search_input", 0.05), ("enter",)],
+        "product_wait": flipkart_minutes.PRODUCT_WAIT,
+        "reload_on_wait": True,
+        # Lazy-loaded grid, and its own latency budget (setup, per query)
+        "scroll": True,
+        "budget": (flipkart_minutes.SETUP_BUDGET, flipkart_minutes.QUERY_BUDGET),
+    },
+    "BigBasket": {
+        "module": bigbasket,
+        "title": "bigbasket",
+        "try_again": ("xpath", "//button[contains(., 'Try Again')]"),
+        "set_location": [
+            ("click", "location_button"),
+            ("type", "location_input", 0),
+            ("click", "location_suggestion"),
+            ("visible", "search_input"),
+        ],
+        "open_search": [("visible", "search_input")],
+        "search": [("type", "search_input", 0), ("enter",)],
+        "product_wait": bigbasket.PRODUCT_WAIT,
+        "reload_on_wait": True,
+        "budget": (bigbasket.SETUP_BUDGET, bigbasket.QUERY_BUDGET),
+    },
+}
+
+TRY_AGAIN_JS = """
+const [by, sel] = arguments;
+const el = by === "css" ? document.querySelector(sel)
+    : document.evaluate(sel, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+if (!el) return false;
+el.scrollIntoView(true);
+el.click();
+return true;
+"""
+
+
+class Scrape:
+    """One vendor flow on one page."""
+
+    def __init__(self, vendor, page):
+        self.vendor = vendor
+        self.flow = FLOWS[vendor]
+        self.page = page
+
+    async def click_try_again(self, max_clicks=5):
+        for _ in range(max_clicks):
+            try:
+                if not await self.page.call(TRY_AGAIN_JS, *self.flow["try_again"]):
+                    return False
+            except Exception:
+                return False
+            print(f"⚠️ Clicked 'Try Again' on {self.vendor}")
+            await asyncio.sleep(2)
+        return True
+
+    async def click(self, step):
+        async def attempt():
+            await find(self.page, self.vendor, step, "clickable", action="click")
+            print(f"✅ Clicked {step}")
+            return True
+
+        return await retry_async(self.vendor, "click", attempt, on_retry=self.click_try_again)
+
+    async def run_steps(self, steps, text=""):
+        page, vendor = self.page, self.vendor
+        for kind, *args in steps:
+            if kind == "click":
+                if not await self.click(args[0]):
+                    return False
+            elif kind == "tap":
+                try:
+                    await find(page, vendor, args[0], "clickable", action="click", timeout=args[1],
+                               record=False)
+                except TimeoutError:
+                    pass
+            elif kind == "type":
+                await find(page, vendor, args[0], "visible", action="focus")
+                await page.type_text(text, delay=args[1])
+            elif kind == "pick":
+                picked = await find(page, vendor, args[0], "present", action="pick", text=text)
+                print(f"🎯 Selected: {picked}")
+            elif kind == "visible":
+                await find(page, vendor, args[0], "visible")
+            elif kind == "sleep":
+                await asyncio.sleep(args[0])
+                await self.click_try_again()
+            elif kind == "enter":
+                await page.press_enter()
+        return True
+
+    async def open_home(self):
+        async def attempt():
+            await self.page.goto(self.flow["module"].HOME_URL)
+            await self.click_try_again()
+            return self.flow["title"] in (await self.page.title()).lower()
+
+        return await retry_async(self.vendor, "page_load", attempt)
+
+    async def step(self, name, steps, text="", on_retry=None):
+        async def attempt():
+            await self.click_try_again()
+            return await self.run_steps(steps, text)
+
+        return await retry_async(self.vendor, name, attempt, on_retry=on_retry)
+
+    async def wait_for_products(self):
+        card = self.flow["module"].CARD
+
+        async def attempt():
+            await self.click_try_again()
+            # Returns as soon as the first card renders
+            await self.page.wait(COUNT_JS, *card, timeout=self.flow["product_wait"])
+            print(f"🟢 {self.vendor} products loaded")
+            return True
+
+        on_retry = self.page.reload if self.flow["reload_on_wait"] else None
+        return await retry_async(self.vendor, "wait_for_products", attempt, on_retry=on_retry)
+
+    async def basket(self, location, search_queries, max_results=None):
+        module = self.flow["module"]
+        results = {q: [] for q in search_queries}
+
+        deadline = None
+        if "budget" in self.flow:
+            setup, per_query = self.flow["budget"]
+            deadline = time.time() + setup + per_query * len(search_queries)
+
+        with retry_budget(len(search_queries), deadline=deadline):
+            if not await self.open_home():
+                raise VendorUnavailable(self.vendor, "home page did not load")
+
+            if not await self.step("set_location", self.flow["set_location"], location,
+                                   on_retry=self.page.reload):
+                print(f"❌ {self.vendor}: could not set location")
+                raise VendorUnavailable(self.vendor, f"could not set location '{location}'")
+
+            for i, q in enumerate(search_queries):
+                if i > 0 and not await self.open_home():
+                    break
+
+                if not await self.step("open_search", self.flow["open_search"],
+                                       on_retry=self.page.reload):
+                    continue
+
+                if not await self.step("search", self.flow["search"], q):
+                    continue
+
+                if await self.wait_for_products():
+                    await capture_async(self.page, self.vendor, q)
+                    # Scroll only as far as the budget still allows
+                    results[q] = await collect_products(self.page, module.CARD, module.FIELDS, max_results,
+                                                        scroll=self.flow.get("scroll", False),
+                                                        max_scrolls=scroll_allowance())
+
+        return results
+
+
+# ============================================================
+# PUBLIC API (same shape as the Selenium scrapers, but awaitable)
+# ============================================================
+
+async def get_basket(vendor, location, search_queries, max_results=None):
+    async with PAGES.page() as page, chrome_metrics_async(page, vendor):
+        return await Scrape(vendor, page).basket(location, search_queries, max_results)
+
+
+def scraper(vendor):
+    async def get_products(location, search_query, max_results=None):
+        results = await get_basket(vendor, location, [search_query], max_results=max_results)
+        return results[search_query]
+
+    get_products.__qualname__ = f"{vendor.lower()}.get_products"
+    return get_products
+
+
+ASYNC_SCRAPERS = {vendor: scraper(vendor) for vendor in FLOWS}
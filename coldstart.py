@@ -0,0 +1,92 @@
+# coldstart.py
+import os
+import time
+import threading
+
+import metrics
+
+
+# ============================================================
+# CONFIG
+# ============================================================
+
+# Launch a browser (and import the vendor modules) right after startup
+# instead of on the first request
+PREWARM_BROWSER = os.getenv("PREWARM_BROWSER", "0") == "1"
+
+
+def process_start_time():
+    """When this process was started, from /proc (None elsewhere)."""
+    try:
+        with open("/proc/self/stat") as f:
+            # Field 22, counted after the ")" that ends the command name
+            start_ticks = int(f.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/uptime") as f:
+            uptime = float(f.read().split()[0])
+        # Both counted from boot; /proc/stat's btime is whole seconds only
+        return time.time() - (uptime - start_ticks / os.sysconf("SC_CLK_TCK"))
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+PROCESS_STARTED = process_start_time() or time.time()
+
+
+# ============================================================
+# STARTUP CLOCK
+# ============================================================
+
+IMPORT_SECONDS = metrics.Gauge(
+    "bestdeal_startup_import_seconds", "Process start until the app finished importing"
+)
+PREWARM_SECONDS = metrics.Gauge(
+    "bestdeal_startup_prewarm_seconds", "Time taken to pre-launch the warm browser"
+)
+FIRST_SCRAPE_SECONDS = metrics.Gauge(
+    "bestdeal_startup_first_scrape_seconds", "Process start until the first scrape that returned products"
+)
+
+
+class StartupClock:
+    """Cold-start milestones, all measured from process start."""
+
+    def __init__(self, started=PROCESS_STARTED):
+        self.started = started
+        self.imported = None
+        self.prewarm = None
+        self.first_scrape = None
+        self.first_vendor = None
+        self._lock = threading.Lock()
+
+    def mark_imported(self):
+        self.imported = time.time() - self.started
+        IMPORT_SECONDS.set(round(self.imported, 3))
+        return self.imported
+
+    def mark_prewarmed(self, seconds):
+        self.prewarm = seconds
+        PREWARM_SECONDS.set(round(seconds, 3))
+
+    def mark_scrape(self, vendor, data):
+        if not data or self.first_scrape is not None:
+            return
+        with self._lock:
+            if self.first_scrape is None:
+                self.first_scrape = time.time() - self.started
+                self.first_vendor = vendor
+                FIRST_SCRAPE_SECONDS.set(round(self.first_scrape, 3))
+                print(f"⏱️ First successful scrape ({vendor}) {self.first_scrape:.1f}s after start")
+
+    def stats(self):
+        def rounded(value):
+            return None if value is None else round(value, 3)
+
+        return {
+            "import_s": rounded(self.imported),
+            "prewarm_s": rounded(self.prewarm),
+            "first_scrape_s": rounded(self.first_scrape),
+            "first_scrape_vendor": self.first_vendor,
+        }
+
+
+CLOCK = StartupClock()
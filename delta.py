@@ -0,0 +1,168 @@
+# delta.py
+"""
+Result versions for polling clients. Every /search payload gets a version:
+a hash of what the client would see (products per vendor and which vendors
+failed), independent of timings, cache hits or resource usage. It doubles
+as the ETag, so a poll with If-None-Match gets a 304 while nothing changed,
+and ?since=<version> returns only what changed after that version.
+"""
+import os
+import hashlib
+import threading
+from collections import OrderedDict
+
+from fastapi.responses import Response
+
+from encoding import dumps, search_response
+from optimizer import parse_price
+
+
+# ============================================================
+# CONFIG
+# ============================================================
+
+# Versions remembered for ?since= (older ones get a full response)
+DELTA_MAX_VERSIONS = int(os.getenv("DELTA_MAX_VERSIONS", "2000"))
+
+# Fields whose change makes a product show up in a delta, besides whether
+# it can be ordered at all (see available)
+TRACKED_FIELDS = ("price", "discount")
+
+# Labels a vendor shows on a listed product it can't deliver right now
+OUT_OF_STOCK = ("out of stock", "sold out", "currently unavailable", "notify me")
+# Fields that never carry such a label
+UNLABELLED_FIELDS = ("name", "image_url", "product_url")
+
+
+def product_key(product):
+    """Identity of a product within one vendor's results."""
+    return f"{product.get('name', '')}|{product.get('weight') or product.get('pack') or ''}"
+
+
+def available(product):
+    """False for a product that is listed but can't be ordered: sold-out label or no price."""
+    labels = " ".join(str(v) for k, v in product.items() if k not in UNLABELLED_FIELDS and v).lower()
+    if any(mark in labels for mark in OUT_OF_STOCK):
+        return False
+    return parse_price(product.get("price")) is not None
+
+
+def tracked(product):
+    return [product.get(f) for f in TRACKED_FIELDS] + [available(product)]
+
+
+def content_version(payload):
+    content = {
+        "query": payload["query"],
+        "location_used": payload["location_used"],
+        "results": payload["results"],
+        "failed": sorted(payload["errors"]),
+    }
+    return hashlib.sha256(dumps(content)).hexdigest()[:20]
+
+
+def snapshot(results):
+    """{vendor: {product_key: tracked values}}: all a later delta needs."""
+    return {
+        vendor: {product_key(p): tracked(p) for p in products}
+        for vendor, products in results.items()
+    }
+
+
+# ============================================================
+# VERSION STORE
+# ============================================================
+
+class VersionStore:
+    def __init__(self, max_versions=DELTA_MAX_VERSIONS):
+        self.max_versions = max_versions
+        self._versions = OrderedDict()
+        self._lock = threading.Lock()
+
+    def put(self, version, results):
+        with self._lock:
+            if version in self._versions:
+                self._versions.move_to_end(version)
+                return
+            self._versions[version] = snapshot(results)
+            while len(self._versions) > self.max_versions:
+                self._versions.popitem(last=False)
+
+    def get(self, version):
+        with self._lock:
+            return self._versions.get(version)
+
+    def stats(self):
+        with self._lock:
+            return {"versions": len(self._versions), "max_versions": self.max_versions}
+
+
+VERSIONS = VersionStore()
+
+
+def delta(base, payload):
+    """
+    The payload with `results` cut down to products that are new or whose
+    price, discount or availability changed since `base`, plus the keys of
+    products that are gone under delta.removed. Vendors that failed this
+    time are left out of removed, their products are unknown rather than
+    gone.
+    """
+    results, removed = {}, {}
+    for vendor, products in payload["results"].items():
+        before = base.get(vendor, {})
+        now = set()
+        changed = []
+        for p in products:
+            key = product_key(p)
+            now.add(key)
+            if before.get(key) != tracked(p):
+                changed.append(p)
+        if changed:
+            results[vendor] = changed
+        gone = [key for key in before if key not in now]
+        if gone:
+            removed[vendor] = gone
+
+    return {**payload, "results": results, "delta": {"removed": removed}}
+
+
+# ============================================================
+# RESPONSE
+# ============================================================
+
+def if_none_match(request, etag):
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    tags = [t.strip() for t in header.split(",")]
+    # Weak comparison: W/"x" and "x" name the same version
+    return "*" in tags or any(t.removeprefix("W/") == etag.removeprefix("W/") for t in tags)
+
+
+def versioned_response(payload, request):
+    """
+    search_response() with a version: ETag plus 304 on If-None-Match, and
+    with ?since=<version> a delta against that version. An unknown or
+    expired `since` gets the full payload, flagged with delta.full.
+    """
+    version = content_version(payload)
+    VERSIONS.put(version, payload["results"])
+    # Weak: the same version is served as JSON, columnar or Arrow, any compression
+    etag = f'W/"{version}"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+
+    if if_none_match(request, etag):
+        return Response(status_code=304, headers={**headers, "Vary": "Accept, Accept-Encoding"})
+
+    payload = {**payload, "version": version}
+    since = request.query_params.get("since")
+    if since:
+        base = VERSIONS.get(since)
+        if base is None:
+            payload["delta"] = {"since": since, "full": True}
+        else:
+            payload = delta(base, payload)
+            payload["delta"].update({"since": since, "full": False})
+
+    return search_response(payload, request, headers=headers)
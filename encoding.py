@@ -0,0 +1,185 @@
+# encoding.py
+import io
+import os
+import gzip
+import json
+
+from fastapi import HTTPException
+from fastapi.responses import Response
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+# ============================================================
+# CONFIG
+# ============================================================
+
+# Bodies smaller than this aren't worth compressing
+COMPRESS_MIN_BYTES = int(os.getenv("COMPRESS_MIN_BYTES", "1024"))
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+JSON = "application/json"
+COLUMNAR = "application/vnd.bestdeal.columnar+json"
+ARROW = "application/vnd.apache.arrow.stream"
+
+# ?format= shortcuts for clients that can't set Accept
+FORMATS = {"json": JSON, "columnar": COLUMNAR, "arrow": ARROW}
+
+
+def dumps(data):
+    """JSON bytes, via orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+# ============================================================
+# LAYOUTS
+# ============================================================
+
+def to_columns(results):
+    """
+    {vendor: [product, ...]} -> {field: [value, ...]} with a leading
+    "source" column, one entry per product. Fields a vendor doesn't have
+    are None, so every column has the same length.
+    """
+    fields = ["source"]
+    for products in results.values():
+        for p in products:
+            for key in p:
+                if key not in fields:
+                    fields.append(key)
+
+    columns = {f: [] for f in fields}
+    for vendor, products in results.items():
+        for p in products:
+            columns["source"].append(vendor)
+            for f in fields[1:]:
+                columns[f].append(p.get(f))
+    return columns
+
+
+def columnar(payload):
+    """The /search payload with `results` replaced by `columns`."""
+    body = {k: v for k, v in payload.items() if k != "results"}
+    body["columns"] = to_columns(payload["results"])
+    return body
+
+
+def arrow_ipc(payload):
+    """
+    Products as an Arrow IPC stream (one record batch); everything else in
+    the payload travels as JSON in the schema metadata under "bestdeal".
+    """
+    columns = to_columns(payload["results"])
+    schema = pa.schema([(f, pa.string()) for f in columns])
+    meta = {k: v for k, v in payload.items() if k != "results"}
+    schema = schema.with_metadata({"bestdeal": dumps(meta)})
+    columns = {f: [None if v is None else str(v) for v in values] for f, values in columns.items()}
+    table = pa.Table.from_pydict(columns, schema=schema)
+
+    sink = io.BytesIO()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue()
+
+
+# ============================================================
+# NEGOTIATION
+# ============================================================
+
+def accepted(header):
+    """Media types from an Accept header, best first (q=0 dropped)."""
+    ranked = []
+    for i, part in enumerate((header or "").split(",")):
+        media, *params = [p.strip() for p in part.split(";")]
+        q = 1.0
+        for param in params:
+            if param.startswith("q="):
+                try:
+                    q = float(param[2:])
+                except ValueError:
+                    q = 0.0
+        if media and q > 0:
+            ranked.append((-q, i, media.lower()))
+    return [media for _, _, media in sorted(ranked)]
+
+
+def choose_media_type(request):
+    """
+    The best supported type the client asked for. Anything unknown (text/html,
+    text/plain, ...) gets JSON as it always did; only a request for Arrow
+    alone, on a server without pyarrow, is refused.
+    """
+    fmt = request.query_params.get("format")
+    if fmt:
+        if fmt not in FORMATS:
+            raise HTTPException(400, f"format must be one of {sorted(FORMATS)}")
+        wanted = [FORMATS[fmt]]
+    else:
+        wanted = accepted(request.headers.get("accept"))
+
+    for media in wanted:
+        if media in (JSON, "application/*", "*/*"):
+            return JSON
+        if media == COLUMNAR:
+            return COLUMNAR
+        if media == ARROW and pa is not None:
+            return ARROW
+    if wanted == [ARROW]:
+        raise HTTPException(406, "Arrow output needs pyarrow installed on the server")
+    return JSON
+
+
+def choose_encoding(request):
+    """br or gzip if the client accepts it (q=0 means it doesn't), else None."""
+    codings = set(accepted(request.headers.get("accept-encoding")))
+    if "br" in codings and brotli is not None:
+        return "br"
+    if "gzip" in codings:
+        return "gzip"
+    return None
+
+
+def compress(body, coding):
+    if coding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL)
+
+
+def search_response(payload, request, headers=None):
+    """
+    Encode a /search payload as the client asked: plain JSON (default),
+    columnar JSON or Arrow IPC, compressed with brotli or gzip when the
+    body is big enough and the client accepts it. `headers` are added to
+    the response.
+    """
+    media = choose_media_type(request)
+    if media == ARROW:
+        body = arrow_ipc(payload)
+    elif media == COLUMNAR:
+        body = dumps(columnar(payload))
+    else:
+        body = dumps(payload)
+
+    headers = {**(headers or {}), "Vary": "Accept, Accept-Encoding"}
+    coding = choose_encoding(request)
+    if coding and len(body) >= COMPRESS_MIN_BYTES:
+        body = compress(body, coding)
+        headers["Content-Encoding"] = coding
+
+    return Response(content=body, media_type=media, headers=headers)
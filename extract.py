@@ -0,0 +1,138 @@
+# extract.py
+import time
+
+from retry import remaining_time
+
+
+# ============================================================
+# CONFIG
+# ============================================================
+
+# Upper bound on scroll steps when more cards are needed
+MAX_SCROLLS = 15
+
+# Longest we wait for new cards after one scroll step
+SCROLL_SETTLE = 1.5
+POLL = 0.15
+
+
+# ============================================================
+# ONE-SHOT CARD EXTRACTION
+# ============================================================
+
+# A field spec is {field: (by, selector, attribute)} where by is "css" or
+# "xpath" (relative to the card) and attribute None means visible text. A
+# spec of None is a field the vendor doesn't show: it is always "", so every
+# vendor's products carry the same keys.
+# Every card and field is read in a single round trip instead of one
+# find_element call per field per card.
+EXTRACT_JS = """
+const [cardBy, cardSel, fields] = arguments;
+
+function all(by, sel, root) {
+    if (by === "css") return Array.from(root.querySelectorAll(sel));
+    const snap = document.evaluate(sel, root, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+    const out = [];
+    for (let i = 0; i < snap.snapshotLength; i++) out.push(snap.snapshotItem(i));
+    return out;
+}
+
+function one(by, sel, root) {
+    if (by === "css") return root.querySelector(sel);
+    return document.evaluate(sel, root, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+}
+
+return all(cardBy, cardSel, document).map(card => {
+    const row = {};
+    for (const [name, by, sel, attr] of fields) {
+        let value = "";
+        try {
+            const el = one(by, sel, card);
+            if (el) value = attr ? (el[attr] || el.getAttribute(attr) || "") : (el.innerText || "");
+        } catch (e) {}
+        row[name] = String(value).trim();
+    }
+    return row;
+});
+"""
+
+
+def field_spec(fields):
+    """A field spec as EXTRACT_JS takes it, without the fields nothing is read for."""
+    return [[name, *spec] for name, spec in fields.items() if spec]
+
+
+def extract_cards(driver, card, fields):
+    """All cards currently in the DOM as dicts, in one execute_script call."""
+    rows = driver.execute_script(EXTRACT_JS, card[0], card[1], field_spec(fields)) or []
+    # Keep the vendor's field order
+    return [{name: row.get(name, "") for name in fields} for row in rows]
+
+
+def count_cards(driver, card):
+    by, sel = card
+    if by == "css":
+        return driver.execute_script("return document.querySelectorAll(arguments[0]).length;", sel)
+    return driver.execute_script(
+        "return document.evaluate(arguments[0], document, null,"
+        " XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null).snapshotLength;", sel)
+
+
+# ============================================================
+# INCREMENTAL SCROLLING
+# ============================================================
+
+def scroll_step(driver, card, settle=SCROLL_SETTLE):
+    """
+    Scroll one viewport and wait until more cards or more page show up.
+    Returns False once nothing new appears within `settle` seconds.
+    """
+    before_cards = count_cards(driver, card)
+    before_height = driver.execute_script("return document.body.scrollHeight")
+    driver.execute_script("window.scrollBy(0, window.innerHeight)")
+
+    deadline = time.time() + settle
+    while time.time() < deadline:
+        time.sleep(POLL)
+        if count_cards(driver, card) > before_cards:
+            return True
+        if driver.execute_script("return document.body.scrollHeight") > before_height:
+            return True
+
+    # Not at the bottom yet, more content may still be below
+    at_bottom = driver.execute_script(
+        "return window.innerHeight + window.scrollY >= document.body.scrollHeight - 2")
+    return not at_bottom
+
+
+def scroll_allowance():
+    """Scroll steps that still fit in the scrape's retry budget, at most MAX_SCROLLS."""
+    return max(0, min(MAX_SCROLLS, int(remaining_time(MAX_SCROLLS * SCROLL_SETTLE) / SCROLL_SETTLE)))
+
+
+def collect_products(driver, card, fields, max_results=None, scroll=False, max_scrolls=MAX_SCROLLS):
+    """
+    Extract products, scrolling for more only while fewer than `max_results`
+    are in hand. Without `scroll`, the page is scrolled only when the caller
+    asked for more cards than are already rendered. Cards without a name are
+    placeholders and are skipped; repeats (virtualized grids) are dropped.
+    """
+    products, seen = [], set()
+    steps = max_scrolls if (scroll or max_results) else 0
+
+    for step in range(steps + 1):
+        for row in extract_cards(driver, card, fields):
+            key = tuple(row.values())
+            if not row.get("name") or key in seen:
+                continue
+            seen.add(key)
+            products.append(row)
+
+        if max_results and len(products) >= max_results:
+            print(f"✂️ Collected {max_results} products, stopping early")
+            return products[:max_results]
+
+        if step == steps or not scroll_step(driver, card):
+            break
+
+    return products
@@ -1,260 +1,232 @@
 # flipkart_minutes.py
+import os
 import time
-from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.common.keys import Keys
 from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.chrome.options import Options
-from selenium.common.exceptions import WebDriverException, TimeoutException
-
-
-URL = "https://www.flipkart.com/flipkart-minutes-store?marketplace=HYPERLOCAL"
-
-MAX_RETRIES = 1
-WAIT_TIME = 25
-
-
-def get_products(LOCATION, search_query):
-
-    # ----------------- DRIVER SETUP ------------------
-    def create_driver():
-        options = Options()
-        # options.add_argument("--headless=new")
-        options.add_argument("--disable-blink-features=AutomationControlled")
-        options.add_argument("--disable-dev-shm-usage")
-        options.add_argument("--no-sandbox")
-        options.add_argument("--disable-infobars")
-        options.add_argument("--disable-gpu")
-        options.add_argument("--disable-notifications")
-        options.add_argument("--window-size=1920,1080")
-        return webdriver.Chrome(options=options)
-
-    driver = create_driver()
-    wait = WebDriverWait(driver, WAIT_TIME)
-
-
-    # ---------------- GLOBAL “TRY AGAIN” HANDLER ----------------
-    def click_try_again():
-        try:
-            btns = driver.find_elements(By.XPATH, "//button[contains(.,'Try Again')]")
-            if btns:
+from selenium.common.exceptions import TimeoutException
+
+from breaker import VendorUnavailable
+from browser import POOL, reset_session
+from extract import collect_products, scroll_allowance
+from retry import retry, retry_budget, remaining_time
+from selector_registry import find, PRESENT, ALL_PRESENT, CLICKABLE
+from snapshots import capture
+
+
+VENDOR = "Flipkart"
+HOME_URL = "https://www.flipkart.com/flipkart-minutes-store?marketplace=HYPERLOCAL"
+
+# Flipkart is the slowest site we scrape, so it gets its own, tighter wall
+# clock: setup (page + location) and per query. A scrape that runs out
+# returns what it has instead of holding up /search.
+SETUP_BUDGET = float(os.getenv("FLIPKART_SETUP_BUDGET_SECONDS", "20"))
+QUERY_BUDGET = float(os.getenv("FLIPKART_QUERY_BUDGET_SECONDS", "15"))
+
+# Per-attempt waits for the page shell and the first product card
+PAGE_WAIT = 8
+PRODUCT_WAIT = 8
+
+# How long the "Enter location manually" link is given before we assume
+# the location input is already showing
+MANUAL_ENTRY_WAIT = 3
+
+# Product card and its fields, read in one pass by extract.collect_products
+CARD = ("css", "div.VPqDeq div[style*='padding: 16px']")
+FIELDS = {
+    "name": ("xpath", ".//a", None),
+    "price": ("xpath", ".//div[contains(text(),'₹')]", None),
+    "discount": ("xpath", ".//*[contains(text(),'%') or contains(text(),'Off')]", None),
+    "image_url": ("css", "img", "src"),
+    "product_url": ("xpath", ".//a", "href"),
+}
+
+
+def get_products(location, search_query, max_results=None):
+    return get_basket(location, [search_query], max_results=max_results)[search_query]
+
+
+def get_basket(location, search_queries, driver=None, max_results=None):
+    """
+    Set the location once, then run every query in the same browser session.
+    Pass a driver to reuse an existing browser, otherwise one is borrowed
+    from the shared pool. Every wait is for the next element to show up
+    rather than a fixed sleep, and the whole scrape stays inside
+    SETUP_BUDGET + QUERY_BUDGET per query.
+    """
+    if driver is None:
+        with POOL.driver() as driver:
+            return get_basket(location, search_queries, driver, max_results)
+
+    reset_session(driver, HOME_URL)
+
+
+    # ------------------------------------------------------------------
+    # "TRY AGAIN" HANDLER
+    # ------------------------------------------------------------------
+    def click_try_again(max_clicks=3):
+        for _ in range(max_clicks):
+            try:
+                btns = driver.find_elements(By.XPATH, "//button[contains(.,'Try Again')]")
+                if not btns:
+                    return False
                 driver.execute_script("arguments[0].click();", btns[0])
                 print("⚠️ Handled 'Try Again'")
-                time.sleep(2)
+                time.sleep(1)
+            except:
+                return False
+        return True
+
+
+    # ------------------------------------------------------------------
+    # SAFE PAGE LOAD
+    # ------------------------------------------------------------------
+    def safe_get(url):
+        def attempt():
+            driver.get(url)
+            WebDriverWait(driver, remaining_time(PAGE_WAIT)).until(
+                lambda d: d.execute_script("return document.readyState") == "complete"
+            )
+            click_try_again()
+            if "flipkart" in driver.title.lower():
+                print("🌐 Flipkart Minutes opened")
                 return True
-        except:
-            pass
-        return False
+            return False
 
+        return retry(VENDOR, "page_load", attempt)
 
-    # ---------------- SAFE ACTION WRAPPER ----------------
-    def safe_attempt(action_name, func, retries=MAX_RETRIES, *args, **kwargs):
-        for attempt in range(1, retries + 1):
-            try:
-                result = func(*args, **kwargs)
-                if result:
-                    print(f"✅ {action_name} (attempt {attempt})")
-                    return result
-            except Exception as e:
-                print(f"⚠️ Failed {action_name} attempt {attempt}: {e}")
-            time.sleep(2)
-            click_try_again()
-        print(f"❌ Giving up on {action_name}")
-        return None
 
+    # ------------------------------------------------------------------
+    # SAFE CLICK
+    # ------------------------------------------------------------------
+    def click_element(step, desc):
+        def attempt():
+            el = find(driver, VENDOR, step, CLICKABLE)
+            driver.execute_script("arguments[0].click();", el)
+            print(f"✅ Clicked {desc}")
+            return True
 
-    # ---------------- OPEN PAGE ----------------
-    def open_page():
-        for attempt in range(1, MAX_RETRIES + 1):
-            try:
-                driver.get(URL)
-                print(f"🌐 Opening Flipkart Minutes (attempt {attempt})")
-                time.sleep(4)
-
-                if "Flipkart" in driver.title:
-                    return True
-            except WebDriverException:
-                pass
-            time.sleep(2)
+        if retry(VENDOR, "click", attempt, on_retry=click_try_again):
+            return True
+        print(f"❌ Failed to click {desc}")
         return False
 
 
-    # ---------------- LOCATION MODAL ----------------
-    def wait_for_location_modal():
-        try:
-            modal = wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, "main.Ff3t7M")))
-            print("🟢 Location modal detected")
-            return modal
-        except:
-            return None
-
-
-    # ---------------- CLICK ENTER MANUAL LOCATION ----------------
-    def click_enter_location_manually():
-        try:
-            btn = wait.until(
-                EC.element_to_be_clickable((By.XPATH, "//div[contains(text(),'Enter location manually')]"))
-            )
-            driver.execute_script("arguments[0].click();", btn)
-            return True
-        except:
-            return False
+    # ------------------------------------------------------------------
+    # LOCATION SETUP
+    # ------------------------------------------------------------------
+    def set_location():
+        def attempt():
+            click_try_again()
 
+            # Step 1: The modal sometimes opens on the address list first
+            find(driver, VENDOR, "location_modal", PRESENT)
+            try:
+                # Often absent, so its absence isn't a selector miss
+                link = find(driver, VENDOR, "location_manual", CLICKABLE, timeout=MANUAL_ENTRY_WAIT,
+                            record=False)
+                driver.execute_script("arguments[0].click();", link)
+            except TimeoutException:
+                pass
 
-    # ---------------- SET LOCATION ----------------
-    def set_location():
-        """Safely type location, wait for hydrated suggestions, pick best match, confirm."""
-        try:
-            # Step 1: Type in search box
-            input_box = wait.until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, "input#search"))
-            )
+            # Step 2: Type location
+            input_box = find(driver, VENDOR, "location_input", PRESENT)
             input_box.clear()
-
-            # Type slowly like user
-            for ch in LOCATION:
+            for ch in location:
                 input_box.send_keys(ch)
                 time.sleep(0.04)
+            print(f"📍 Typed location: {location}")
 
-            print(f"📍 Typed location: {LOCATION}")
-            time.sleep(1.5)
+            # Step 3: Pick the suggestion as soon as the list is hydrated
+            suggestions = find(driver, VENDOR, "location_suggestion", ALL_PRESENT)
+            s = next((x for x in suggestions if location.lower() in x.text.lower()), suggestions[0])
+            driver.execute_script("arguments[0].scrollIntoView({block:'center'}); arguments[0].click();", s)
+            print(f"🎯 Selected: {s.text.strip()}")
 
-            # Step 2: Wait for suggestion container
-            suggestions = wait.until(
-                EC.presence_of_all_elements_located(
-                    (By.XPATH, "//ul/li[contains(@class,'_')]")
-                )
-            )
+            # Step 4: Confirm; done once the store's search box is there
+            if not click_element("location_confirm", "Confirm Location"):
+                return False
+            find(driver, VENDOR, "search_input", PRESENT)
 
-            print(f"🔎 Found {len(suggestions)} raw suggestions")
-
-            # Step 3: Pick the best suggestion
-            target = None
-            location_lower = LOCATION.lower()
-
-            for s in suggestions:
-                try:
-                    text = s.text.strip()
-                    if text and location_lower in text.lower():
-                        target = s
-                        break
-                except:
-                    continue
-
-            # If nothing matched, fallback to first hydrated suggestion
-            if not target:
-                print("⚠️ No exact match → selecting first loaded suggestion")
-                target = suggestions[0]
-
-            # Step 4: Scroll into view & JS click
-            driver.execute_script("arguments[0].scrollIntoView({block:'center'});", target)
-            time.sleep(0.3)
-            driver.execute_script("arguments[0].click();", target)
-
-            print(f"🎯 Selected suggestion: {target.text.strip()}")
-
-            # Step 5: Confirm location
-            confirm_btn = wait.until(
-                EC.element_to_be_clickable(
-                    (By.XPATH, "//input[@type='submit' and @value='Confirm']")
-                )
-            )
-            driver.execute_script("arguments[0].click();", confirm_btn)
-            print("🏁 Location confirmed")
-            time.sleep(2)
+            print("🏁 Location set successfully")
             return True
 
-        except Exception as e:
-            print("❌ set_location failed:", e)
-            return False
-
-
-    # ---------------- PERFORM SEARCH ----------------
-    def perform_search():
-        try:
-            search_box = wait.until(
-                EC.presence_of_element_located(
-                    (By.CSS_SELECTOR, "input.Pke_EE[placeholder*='Search in Flipkart Minutes']")
-                )
-            )
-            driver.execute_script("arguments[0].click();", search_box)
-            search_box.clear()
-
-            for ch in search_query:
-                search_box.send_keys(ch)
-                time.sleep(0.05)
-
-            search_box.send_keys(Keys.ENTER)
-            print(f"🔍 Searching '{search_query}'")
-
-            time.sleep(5)
+        if retry(VENDOR, "set_location", attempt, on_retry=driver.refresh):
             return True
-        except:
-            return False
+        print("❌ Could not set location")
+        return False
 
 
-    # ---------------- SCROLL UNTIL FULL LOAD ----------------
-    def scroll_all():
-        last_height = driver.execute_script("return document.body.scrollHeight")
-        while True:
-            driver.execute_script("window.scrollTo(0, document.body.scrollHeight)")
-            time.sleep(1.5)
-            new_height = driver.execute_script("return document.body.scrollHeight")
-            if new_height == last_height:
-                break
-            last_height = new_height
-        print("📜 Scrolling complete")
+    # ------------------------------------------------------------------
+    # PERFORM SEARCH
+    # ------------------------------------------------------------------
+    def search_product(q):
+        def attempt():
+            click_try_again()
 
+            box = find(driver, VENDOR, "search_input", CLICKABLE)
+            driver.execute_script("arguments[0].click();", box)
 
-    # ---------------- EXTRACT PRODUCTS ----------------
-    def extract_products():
-        result = []
-        cards = driver.find_elements(By.CSS_SELECTOR, "div.VPqDeq div[style*='padding: 16px']")
+            box.clear()
+            for ch in q:
+                box.send_keys(ch)
+                time.sleep(0.05)
+            box.send_keys(Keys.ENTER)
 
-        print(f"🛒 Found {len(cards)} products")
+            print(f"🔎 Searching '{q}'")
+            return True
 
-        for card in cards:
-            try: name = card.find_element(By.XPATH, ".//a").text
-            except: name = ""
+        if retry(VENDOR, "search", attempt):
+            return True
+        print("❌ Search failed")
+        return False
 
-            try: price = card.find_element(By.XPATH, ".//div[contains(text(),'₹')]").text
-            except: price = ""
 
-            try: img = card.find_element(By.TAG_NAME, "img").get_attribute("src")
-            except: img = ""
+    # ------------------------------------------------------------------
+    # WAIT FOR PRODUCTS
+    # ------------------------------------------------------------------
+    def wait_for_products():
+        def attempt():
+            click_try_again()
+            # Returns as soon as the first card renders instead of a fixed sleep
+            WebDriverWait(driver, remaining_time(PRODUCT_WAIT)).until(
+                lambda d: d.find_elements(By.CSS_SELECTOR, CARD[1])
+            )
+            print("🟢 Flipkart Minutes products loaded")
+            return True
 
-            try: discount = card.find_element(By.XPATH, ".//*[contains(text(),'%') or contains(text(),'Off')]").text
-            except: discount = ""
+        if retry(VENDOR, "wait_for_products", attempt, on_retry=driver.refresh):
+            return True
+        print("❌ Could not load product grid")
+        return False
 
-            result.append({
-                "name": name.strip(),
-                "price": price.strip(),
-                "discount": discount.strip(),
-                "image_url": img
-            })
 
-        return result
+    # ----------------- MAIN LOGIC -------------------
 
+    results = {q: [] for q in search_queries}
+    deadline = time.time() + SETUP_BUDGET + QUERY_BUDGET * len(search_queries)
 
-    # ---------------- MAIN FLOW ----------------
-    if not safe_attempt("Open Flipkart Minutes", open_page):
-        driver.quit()
-        return []
+    with retry_budget(len(search_queries), deadline=deadline):
+        if not safe_get(HOME_URL):
+            raise VendorUnavailable(VENDOR, "home page did not load")
 
-    safe_attempt("Wait for Location Modal", wait_for_location_modal)
-    safe_attempt("Click 'Enter Location Manually'", click_enter_location_manually)
-    safe_attempt("Set Location", set_location)
+        if not set_location():
+            raise VendorUnavailable(VENDOR, f"could not set location '{location}'")
 
-    if not safe_attempt("Search Product", perform_search):
-        driver.quit()
-        return []
+        for i, q in enumerate(search_queries):
+            # Location lives in the session, only the search has to be redone
+            if i > 0 and not safe_get(HOME_URL):
+                break
 
-    scroll_all()
+            if not search_product(q):
+                continue
 
-    products = safe_attempt("Extract Products", extract_products)
-    if not products:
-        products = []
+            if wait_for_products():
+                capture(driver, VENDOR, q)
+                # The grid lazy-loads as it scrolls; extraction runs after
+                # each step and stops at max_results or the budget
+                results[q] = collect_products(
+                    driver, CARD, FIELDS, max_results, scroll=True, max_scrolls=scroll_allowance()
+                )
 
-    driver.quit()
-    return products
+    return results
@@ -0,0 +1,211 @@
+# hedge.py
+import os
+import time
+import asyncio
+import threading
+from collections import deque
+
+import metrics
+from resources import ScrapeUsage
+
+
+# ============================================================
+# CONFIG
+# ============================================================
+
+HEDGE_ENABLED = os.getenv("HEDGE_ENABLED", "0") == "1"
+
+# Start a second attempt once the first has run longer than this quantile
+HEDGE_QUANTILE = float(os.getenv("HEDGE_QUANTILE", "0.9"))
+
+# Latency samples kept per vendor, and how many are needed before hedging
+HEDGE_HISTORY = int(os.getenv("HEDGE_HISTORY", "100"))
+HEDGE_MIN_SAMPLES = int(os.getenv("HEDGE_MIN_SAMPLES", "10"))
+
+# Never hedge earlier than this, however fast the vendor usually is
+HEDGE_MIN_DELAY = float(os.getenv("HEDGE_MIN_DELAY_SECONDS", "5"))
+
+# Global budget: hedges as a share of scrapes in the window, and at most
+# this many hedges running at once
+HEDGE_RATIO = float(os.getenv("HEDGE_RATIO", "0.1"))
+HEDGE_WINDOW = float(os.getenv("HEDGE_WINDOW_SECONDS", "600"))
+HEDGE_MAX_INFLIGHT = int(os.getenv("HEDGE_MAX_INFLIGHT", "1"))
+
+
+HEDGE_EVENTS = metrics.Counter(
+    "bestdeal_hedge_events_total",
+    "Hedging decisions (launched, hedge_won, primary_won, no_budget)", ["vendor", "event"]
+)
+REQUEST_SECONDS = metrics.Histogram(
+    "bestdeal_scrape_request_seconds",
+    "Latency seen by the caller, after hedging (compare with bestdeal_scrape_seconds)",
+    ["vendor", "hedged"],
+    buckets=(2, 5, 10, 15, 20, 30, 45, 60, 90, 120, 180)
+)
+
+
+def quantile(values, q):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+# ============================================================
+# BUDGET
+# ============================================================
+
+class HedgeBudget:
+    """Caps extra browser load from hedging, across every vendor."""
+
+    def __init__(self, ratio=HEDGE_RATIO, window=HEDGE_WINDOW, max_inflight=HEDGE_MAX_INFLIGHT):
+        self.ratio = ratio
+        self.window = window
+        self.max_inflight = max_inflight
+        self.scrapes = deque()
+        self.hedges = deque()
+        self.inflight = 0
+        self._lock = threading.Lock()
+
+    def _trim(self, now):
+        for events in (self.scrapes, self.hedges):
+            while events and now - events[0] > self.window:
+                events.popleft()
+
+    def record_scrape(self):
+        with self._lock:
+            self.scrapes.append(time.time())
+
+    def take(self):
+        now = time.time()
+        with self._lock:
+            self._trim(now)
+            if self.inflight >= self.max_inflight:
+                return False
+            if len(self.hedges) + 1 > self.ratio * len(self.scrapes):
+                return False
+            self.hedges.append(now)
+            self.inflight += 1
+            return True
+
+    def release(self):
+        with self._lock:
+            self.inflight -= 1
+
+    def stats(self):
+        with self._lock:
+            self._trim(time.time())
+            return {"scrapes": len(self.scrapes), "hedges": len(self.hedges), "inflight": self.inflight}
+
+
+# ============================================================
+# HEDGER
+# ============================================================
+
+class Hedger:
+    """
+    Runs a scrape and, if it is still going after the vendor's observed
+    p90 latency, starts a second attempt on another pooled browser. The
+    first attempt to come back with products wins; the other one is
+    cancelled, which kills its browser so the pool replaces it.
+    """
+
+    def __init__(self, budget=None, enabled=HEDGE_ENABLED):
+        self.budget = budget or HedgeBudget()
+        self.enabled = enabled
+        self.latencies = {}
+        self._lock = threading.Lock()
+
+    def observe(self, vendor, seconds):
+        with self._lock:
+            if vendor not in self.latencies:
+                self.latencies[vendor] = deque(maxlen=HEDGE_HISTORY)
+            self.latencies[vendor].append(seconds)
+
+    def hedge_after(self, vendor):
+        """Seconds to wait before hedging, or None while there's too little history."""
+        with self._lock:
+            samples = list(self.latencies.get(vendor, ()))
+        if not self.enabled or len(samples) < HEDGE_MIN_SAMPLES:
+            return None
+        return max(HEDGE_MIN_DELAY, quantile(samples, HEDGE_QUANTILE))
+
+    async def run(self, vendor, pool, make_call):
+        """
+        `make_call(usage)` returns the blocking scrape, tracked under
+        `usage`, which is run on `pool` and returns (data, usage).
+        """
+        loop = asyncio.get_running_loop()
+        started = time.time()
+        self.budget.record_scrape()
+
+        def launch():
+            usage = ScrapeUsage(vendor)
+            future = loop.run_in_executor(pool, make_call(usage))
+            # Losers finish after nobody is listening any more
+            future.add_done_callback(lambda f: f.cancelled() or f.exception())
+            attempts[future] = (usage, time.time())
+            return future
+
+        attempts = {}
+        primary = launch()
+        delay = self.hedge_after(vendor)
+
+        if delay is not None:
+            await asyncio.wait({primary}, timeout=delay)
+
+        if delay is None or primary.done():
+            await asyncio.wait({primary})
+            return self._finish(vendor, primary, attempts, started, hedged=False)
+
+        if not self.budget.take():
+            HEDGE_EVENTS.inc(vendor=vendor, event="no_budget")
+            await asyncio.wait({primary})
+            return self._finish(vendor, primary, attempts, started, hedged=False)
+
+        HEDGE_EVENTS.inc(vendor=vendor, event="launched")
+        try:
+            hedge = launch()
+            pending = {primary, hedge}
+            fallback = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for future in done:
+                    if future.exception() is None and future.result()[0]:
+                        for other in pending:
+                            attempts[other][0].cancel("lost hedge race")
+                        event = "hedge_won" if future is hedge else "primary_won"
+                        HEDGE_EVENTS.inc(vendor=vendor, event=event)
+                        return self._finish(vendor, future, attempts, started, hedged=True)
+                    # Empty or failed: keep the primary's outcome unless the hedge does better
+                    if fallback is None or future is primary:
+                        fallback = future
+            return self._finish(vendor, fallback, attempts, started, hedged=True)
+        finally:
+            self.budget.release()
+
+    def _finish(self, vendor, future, attempts, started, hedged):
+        """Record latencies and hand back the attempt's result (or raise its error)."""
+        data, usage = future.result()
+        # Only real scrapes say how long the vendor takes; empty ones are failures
+        if data:
+            self.observe(vendor, time.time() - attempts[future][1])
+        REQUEST_SECONDS.observe(time.time() - started, vendor=vendor, hedged="yes" if hedged else "no")
+        return data, usage
+
+    def stats(self):
+        with self._lock:
+            latencies = {v: list(s) for v, s in self.latencies.items()}
+        vendors = {}
+        for vendor, samples in latencies.items():
+            vendors[vendor] = {
+                "samples": len(samples),
+                "p50": quantile(samples, 0.5),
+                "p90": quantile(samples, 0.9),
+                "p99": quantile(samples, 0.99),
+                "hedge_after": self.hedge_after(vendor),
+            }
+        return {"enabled": self.enabled, "budget": self.budget.stats(), "vendors": vendors}
+
+
+HEDGER = Hedger()
@@ -0,0 +1,254 @@
+# imgproxy.py
+import io
+import os
+import hashlib
+import tempfile
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from urllib.parse import urlsplit, urljoin, quote
+
+import requests
+from fastapi import HTTPException
+from fastapi.responses import Response
+
+import metrics
+
+
+# ============================================================
+# CONFIG
+# ============================================================
+
+IMG_CACHE_DIR = os.getenv("IMG_CACHE_DIR", os.path.join(tempfile.gettempdir(), "bestdeal-img"))
+IMG_CACHE_MAX_MB = float(os.getenv("IMG_CACHE_MAX_MB", "200"))
+
+# Thumbnail widths we render; anything else is rounded up to the next one
+THUMB_WIDTHS = (96, 150, 300)
+DEFAULT_WIDTH = 150
+
+FETCH_TIMEOUT = 5
+MAX_SOURCE_BYTES = 5 * 1024 * 1024
+MAX_REDIRECTS = 3
+
+# Browsers and Streamlit may keep a thumbnail for a week; an image URL on
+# the vendor CDNs doesn't change content
+CACHE_CONTROL = "public, max-age=604800"
+
+# Only these hosts (and their subdomains) are fetched, so /img can't be
+# pointed at internal addresses
+ALLOWED_HOSTS = [h.strip() for h in os.getenv("IMG_ALLOWED_HOSTS", ",".join([
+    "cdn.zeptonow.com",                 # Zepto
+    "cdn.grofers.com",                  # Blinkit
+    "media-assets.swiggy.com",          # Instamart
+    "instamart-media-assets.swiggy.com",
+    "rukminim1.flixcart.com",           # Flipkart Minutes
+    "rukminim2.flixcart.com",
+    "bbassets.com",                     # BigBasket
+])).split(",") if h.strip()]
+
+
+IMG_REQUESTS = metrics.Counter(
+    "bestdeal_img_requests_total", "Image proxy requests (hit, miss, not_modified, rejected, error)",
+    ["result"]
+)
+
+
+def allowed(url):
+    parts = urlsplit(url)
+    host = (parts.hostname or "").lower()
+    if parts.scheme not in ("http", "https") or parts.port not in (None, 80, 443):
+        return False
+    return any(host == h or host.endswith("." + h) for h in ALLOWED_HOSTS)
+
+
+def thumb_width(width):
+    return next((w for w in THUMB_WIDTHS if w >= width), THUMB_WIDTHS[-1])
+
+
+def thumbnail_url(image_url, width=DEFAULT_WIDTH):
+    """Path of the proxied thumbnail, or None for images we won't proxy."""
+    if not image_url or not allowed(image_url):
+        return None
+    return f"/img?url={quote(image_url, safe='')}&w={thumb_width(width)}"
+
+
+def with_thumbnails(products, width=DEFAULT_WIDTH):
+    """Copies of the products with a thumbnail_url next to image_url."""
+    return [{**p, "thumbnail_url": thumbnail_url(p.get("image_url"), width)} for p in products]
+
+
+# ============================================================
+# DISK LRU
+# ============================================================
+
+class DiskLRU:
+    """
+    Thumbnails as files, evicted least-recently-used once the directory
+    grows past `max_bytes`. Recency survives restarts through mtimes.
+    """
+
+    def __init__(self, directory=IMG_CACHE_DIR, max_bytes=IMG_CACHE_MAX_MB * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._files = OrderedDict()   # key -> size, oldest first
+        self._lock = threading.Lock()
+        self.total = 0
+
+        os.makedirs(directory, exist_ok=True)
+        entries = []
+        for name in os.listdir(directory):
+            path = os.path.join(directory, name)
+            if name.endswith(".img") and os.path.isfile(path):
+                st = os.stat(path)
+                entries.append((st.st_mtime, name[:-4], st.st_size))
+        for _, key, size in sorted(entries):
+            self._files[key] = size
+            self.total += size
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + ".img")
+
+    def get(self, key):
+        with self._lock:
+            if key not in self._files:
+                return None
+            self._files.move_to_end(key)
+        try:
+            with open(self._path(key), "rb") as f:
+                data = f.read()
+            os.utime(self._path(key))
+            return data
+        except OSError:
+            with self._lock:
+                self.total -= self._files.pop(key, 0)
+            return None
+
+    def set(self, key, data):
+        tmp = self._path(key) + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, self._path(key))
+
+        with self._lock:
+            self.total += len(data) - self._files.pop(key, 0)
+            self._files[key] = len(data)
+            while self.total > self.max_bytes and len(self._files) > 1:
+                old, size = self._files.popitem(last=False)
+                self.total -= size
+                try:
+                    os.remove(self._path(old))
+                except OSError:
+                    pass
+
+    def stats(self):
+        with self._lock:
+            return {"files": len(self._files), "mb": round(self.total / 1024 / 1024, 1),
+                    "max_mb": round(self.max_bytes / 1024 / 1024, 1)}
+
+
+# ============================================================
+# FETCH + RESIZE
+# ============================================================
+
+def fetch(url):
+    """Source image bytes. Redirects are followed only to allowed hosts."""
+    for _ in range(MAX_REDIRECTS + 1):
+        resp = requests.get(url, timeout=FETCH_TIMEOUT, stream=True, allow_redirects=False,
+                            headers={"User-Agent": "Mozilla/5.0"})
+        if resp.is_redirect:
+            url = urljoin(url, resp.headers.get("location", ""))
+            resp.close()
+            if not allowed(url):
+                raise HTTPException(403, "Image redirected to a host that isn't allowed")
+            continue
+        if resp.status_code != 200:
+            raise HTTPException(502, f"Image fetch failed with {resp.status_code}")
+
+        data = bytearray()
+        for chunk in resp.iter_content(64 * 1024):
+            data += chunk
+            if len(data) > MAX_SOURCE_BYTES:
+                resp.close()
+                raise HTTPException(502, "Source image too large")
+        return bytes(data)
+    raise HTTPException(502, "Too many redirects")
+
+
+def make_thumbnail(data, width):
+    # Pillow is only needed once something asks for an image
+    from PIL import Image
+
+    with Image.open(io.BytesIO(data)) as img:
+        img.thumbnail((width, width * 2))
+        if img.mode not in ("RGB", "RGBA"):
+            img = img.convert("RGBA" if "transparency" in img.info else "RGB")
+        out = io.BytesIO()
+        img.save(out, "WEBP", quality=80, method=4)
+        return out.getvalue()
+
+
+class ImageProxy:
+    def __init__(self, cache=None):
+        self.cache = cache
+        self._locks = {}              # key -> [lock, requests holding or waiting on it]
+        self._locks_lock = threading.Lock()
+
+    @contextmanager
+    def _locked(self, key):
+        """Hold `key`'s lock; it's dropped once no request holds or waits on it."""
+        with self._locks_lock:
+            entry = self._locks.setdefault(key, [threading.Lock(), 0])
+            entry[1] += 1
+        try:
+            with entry[0]:
+                yield
+        finally:
+            # Failed fetches too, or every bad URL would leave a lock behind
+            with self._locks_lock:
+                entry[1] -= 1
+                if entry[1] == 0:
+                    del self._locks[key]
+
+    def serve(self, url, width=DEFAULT_WIDTH, if_none_match=None):
+        if not allowed(url):
+            IMG_REQUESTS.inc(result="rejected")
+            raise HTTPException(403, "Image host not allowed")
+
+        if self.cache is None:
+            self.cache = DiskLRU()
+
+        width = thumb_width(width)
+        key = hashlib.sha256(f"{width}|{url}".encode()).hexdigest()[:32]
+        etag = f'"{key}"'
+        headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+
+        if if_none_match and etag in [t.strip() for t in if_none_match.split(",")]:
+            IMG_REQUESTS.inc(result="not_modified")
+            return Response(status_code=304, headers=headers)
+
+        data = self.cache.get(key)
+        if data is not None:
+            IMG_REQUESTS.inc(result="hit")
+        else:
+            # One fetch per image even when a whole grid asks at once
+            with self._locked(key):
+                data = self.cache.get(key)
+                if data is None:
+                    try:
+                        data = make_thumbnail(fetch(url), width)
+                    except HTTPException:
+                        IMG_REQUESTS.inc(result="error")
+                        raise
+                    except Exception as e:
+                        IMG_REQUESTS.inc(result="error")
+                        raise HTTPException(502, f"Could not thumbnail image: {e}")
+                    self.cache.set(key, data)
+                    IMG_REQUESTS.inc(result="miss")
+
+        return Response(content=data, media_type="image/webp", headers=headers)
+
+    def stats(self):
+        return self.cache.stats() if self.cache else None
+
+
+PROXY = ImageProxy()
@@ -1,69 +1,54 @@
 import time
-import pandas as pd
-from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.common.keys import Keys
 from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.chrome.options import Options
 from selenium.common.exceptions import TimeoutException, WebDriverException
 
+from breaker import VendorUnavailable
+from browser import POOL, reset_session
+from extract import collect_products
+from retry import retry, retry_budget, remaining_time
+from selector_registry import find, PRESENT, CLICKABLE, VISIBLE
+from snapshots import capture
 
-def get_products(LOCATION, SEARCH_QUERY):
-    def create_driver(headless=True):
-        options = Options()
-        
-        if headless:
-            options.add_argument("--headless=new")
-            options.add_argument("--window-size=1920,1080")
-            options.add_argument("--force-device-scale-factor=1")
-            options.add_argument("--disable-gpu")
-            options.add_argument("--hide-scrollbars")
-            options.add_argument("--ignore-certificate-errors")
-            options.add_argument("--disable-features=IsolateOrigins,site-per-process")
-            options.add_argument("--blink-settings=imagesEnabled=true")
-
-            # 🔥 Trick websites into thinking it's NOT headless
-            options.add_argument("--disable-blink-features=AutomationControlled")
-            options.add_argument("--no-sandbox")
-            options.add_argument("--disable-dev-shm-usage")
-            options.add_argument("--disable-infobars")
-            options.add_argument("--disable-notifications")
-
-            # 🔥 Fake user agent (desktop Chrome)
-            options.add_argument(
-                "--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-                "AppleWebKit/537.36 (KHTML, like Gecko) "
-                "Chrome/121.0.0.0 Safari/537.36"
-            )
 
-            # 🔥 Enable display rendering even in headless mode
-            options.add_argument("--disable-software-rasterizer")
-            options.add_argument("--use-gl=swiftshader")  # Fix hydration loading
+VENDOR = "Instamart"
+HOME_URL = "https://www.swiggy.com/instamart"
+
+# Per-attempt wait for the first product card
+PRODUCT_WAIT = 15
 
-            # Flipkart sometimes blocks headless, this bypasses:
-            options.add_experimental_option("excludeSwitches", ["enable-automation"])
-            options.add_experimental_option("useAutomationExtension", False)
+# Product card and its fields, read in one pass by extract.collect_products
+CARD = ("css", "div[data-testid='item-collection-card-full']")
+FIELDS = {
+    "name": ("css", "div.sc-gEvEer.bvSpbA", None),
+    "description": ("css", "div.sc-gEvEer.diZRny", None),
+    "weight": ("css", "div.sc-gEvEer.bCqPoH", None),
+    "price": ("css", "div.sc-gEvEer.iQcBUp", None),
+    "mrp": ("css", "div.sc-gEvEer.fULQHN", None),
+    "discount": ("css", "div[data-testid='item-offer-label-discount-text']", None),
+    "delivery_time": ("css", "div._2zIRo div", None),
+    "image_url": ("css", "img._16I1D", "src"),
+}
 
-        else:
-            options.add_argument("--start-maximized")
 
-        return webdriver.Chrome(options=options)
+def get_products(LOCATION, SEARCH_QUERY, max_results=None):
+    return get_basket(LOCATION, [SEARCH_QUERY], max_results=max_results)[SEARCH_QUERY]
 
 
-    MAX_RETRIES = 3
+def get_basket(LOCATION, SEARCH_QUERIES, driver=None, max_results=None):
+    """
+    Set the location once, then run every query in the same browser session.
+    Pass a driver to reuse an existing browser, otherwise one is borrowed
+    from the shared pool. With max_results, extraction stops as soon as
+    that many products are collected.
+    """
+    if driver is None:
+        with POOL.driver() as driver:
+            return get_basket(LOCATION, SEARCH_QUERIES, driver, max_results)
 
-    # # ---------- SETUP ----------
-    # chrome_options = Options()
-    # # chrome_options.add_argument("--headless=new")
-    # chrome_options.add_argument("--disable-blink-features=AutomationControlled")
-    # chrome_options.add_argument("--disable-notifications")
-    # chrome_options.add_argument("--disable-infobars")
-    # chrome_options.add_argument("--no-sandbox")
-    # chrome_options.add_argument("--disable-dev-shm-usage")
+    reset_session(driver, HOME_URL)
 
-    driver = create_driver(headless=True)
-    wait = WebDriverWait(driver, 25)
 
     # --------------------------------------------------------------------------
     # 🔥 UNIVERSAL TRY-AGAIN HANDLER → works on homepage, location popup, products
@@ -81,106 +66,88 @@ def get_products(LOCATION, SEARCH_QUERY):
         return True
 
     # ----------------------- STEP 1: SAFE PAGE LOAD ---------------------------
-    def safe_get(url, retries=3):
-        for attempt in range(1, retries + 1):
-            try:
-                driver.get(url)
-                print(f"🌐 Loading Instamart (attempt {attempt})")
-                time.sleep(3)
-
-                click_try_again()   # <–– NEW FIX
-
-                if "instamart" in driver.title.lower():
-                    return True
-            except:
-                pass
-            print("⚠️ Retrying page load...")
-            time.sleep(2)
-        return False
+    def safe_get(url):
+        def attempt():
+            driver.get(url)
+            print("🌐 Loading Instamart")
+            time.sleep(3)
+
+            click_try_again()   # <–– NEW FIX
+
+            return "instamart" in driver.title.lower()
+
+        return retry(VENDOR, "page_load", attempt)
 
     # ----------------------- SAFE CLICK ---------------------------------------
-    def click_element(selector, desc, by=By.CSS_SELECTOR, retries=3, js=True):
-        for i in range(retries):
-            try:
-                elem = wait.until(EC.element_to_be_clickable((by, selector)))
-                if js:
-                    driver.execute_script("arguments[0].click();", elem)
-                else:
-                    elem.click()
-                print(f"✅ Clicked {desc}")
-                return True
-            except Exception as e:
-                print(f"⚠️ Retry {i+1}/{retries} failed clicking {desc}")
-                click_try_again()
-                time.sleep(1)
+    def click_element(step, desc, js=True):
+        def attempt():
+            elem = find(driver, VENDOR, step, CLICKABLE)
+            if js:
+                driver.execute_script("arguments[0].click();", elem)
+            else:
+                elem.click()
+            print(f"✅ Clicked {desc}")
+            return True
+
+        if retry(VENDOR, "click", attempt, on_retry=click_try_again):
+            return True
         print(f"❌ Could not click {desc}")
         return False
 
     # ---------------------- STEP 2: SET LOCATION ------------------------------
     def set_location():
-        for attempt in range(MAX_RETRIES):
-            try:
-                click_try_again()
-
-                click_element("div[data-testid='DEFAULT_ADDRESS_CONTAINER']", "Add your location")
-                click_try_again()
+        def attempt():
+            click_try_again()
 
-                click_element("div[data-testid='search-location']", "Search address")
-                click_try_again()
+            if not click_element("address_container", "Add your location"):
+                return False
+            click_try_again()
 
-                location_input = wait.until(
-                    EC.presence_of_element_located((By.CSS_SELECTOR, "input[placeholder*='Search for area']"))
-                )
+            if not click_element("search_location", "Search address"):
+                return False
+            click_try_again()
 
-                location_input.clear()
-                for ch in LOCATION:
-                    location_input.send_keys(ch)
-                    time.sleep(0.03)
+            location_input = find(driver, VENDOR, "location_input", PRESENT)
 
-                print(f"📍 Typed location: {LOCATION}")
+            location_input.clear()
+            for ch in LOCATION:
+                location_input.send_keys(ch)
+                time.sleep(0.03)
 
-                time.sleep(2)
-                click_try_again()
+            print(f"📍 Typed location: {LOCATION}")
 
-                click_element("div._11n32", "First suggestion")
+            time.sleep(2)
+            click_try_again()
 
-                click_try_again()
+            if not click_element("location_suggestion", "First suggestion"):
+                return False
 
-                click_element("//button[.//span[text()='Confirm Location']]",
-                              "Confirm Location",
-                              by=By.XPATH)
+            click_try_again()
 
-                print("🎉 Location set!")
-                return True
+            if not click_element("location_confirm", "Confirm Location"):
+                return False
 
-            except Exception as e:
-                print(f"⚠️ Location setup failed attempt {attempt+1}")
-                driver.refresh()
-                time.sleep(4)
+            print("🎉 Location set!")
+            return True
 
-        return False
+        return retry(VENDOR, "set_location", attempt, on_retry=driver.refresh)
 
     # -------------------- STEP 3: OPEN SEARCH BAR -----------------------------
     def open_search_bar():
-        for attempt in range(MAX_RETRIES):
-            try:
-                click_try_again()
-                click_element("div._1AaZg", "Homepage search box")
-
-                wait.until(EC.visibility_of_element_located((By.CSS_SELECTOR, "div._3y3yB")))
-                return True
-            except:
-                print(f"⚠️ Search bar open failed {attempt+1}")
-                driver.refresh()
-                time.sleep(3)
-        return False
+        def attempt():
+            click_try_again()
+            if not click_element("home_search", "Homepage search box"):
+                return False
+
+            find(driver, VENDOR, "search_page", VISIBLE)
+            return True
+
+        return retry(VENDOR, "open_search", attempt, on_retry=driver.refresh)
 
     # -------------------- STEP 4: SEARCH PRODUCT -----------------------------
     def search_product(query):
-        try:
-            search_input = wait.until(EC.presence_of_element_located(
-                (By.CSS_SELECTOR, "input[data-testid='search-page-header-search-bar-input']")
-            ))
+        def attempt():
+            search_input = find(driver, VENDOR, "search_input", PRESENT)
             driver.execute_script("arguments[0].focus();", search_input)
             search_input.clear()
 
@@ -191,89 +158,52 @@ def get_products(LOCATION, SEARCH_QUERY):
             search_input.send_keys(Keys.ENTER)
             print(f"🔍 Searching '{query}'")
             return True
-        except Exception as e:
-            print("❌ Failed to type search query for instamrt")
-            return False
+
+        if retry(VENDOR, "search", attempt):
+            return True
+        print("❌ Failed to type search query for instamrt")
+        return False
 
     # -------------------- STEP 5: WAIT FOR PRODUCT RESULTS --------------------
     def wait_for_products():
-        for attempt in range(15):
-            time.sleep(2)
-
+        def attempt():
             click_try_again()
+            # Instamart renders slowly but refreshing doesn't help, so wait longer
+            WebDriverWait(driver, remaining_time(PRODUCT_WAIT)).until(
+                lambda d: d.find_elements(By.CSS_SELECTOR, CARD[1])
+            )
+            print("🟢 Products loaded")
+            return True
 
-            cards = driver.find_elements(By.CSS_SELECTOR, "div[data-testid='item-collection-card-full']")
-            if cards:
-                print(f"🟢 Products loaded on attempt {attempt+1}")
-                return cards
-
-            print(f"⚠️ Still loading products {attempt+1}/15")
-
+        if retry(VENDOR, "wait_for_products", attempt):
+            return True
         print("❌ Could not load products after retries.")
-        return []
-
-    # ------------------- STEP 6: EXTRACT PRODUCTS -----------------------------
-    def extract_products(cards):
-        products = []
-
-        for card in cards:
-            try: name = card.find_element(By.CSS_SELECTOR, "div.sc-gEvEer.bvSpbA").text
-            except: name = ""
-
-            try: desc = card.find_element(By.CSS_SELECTOR, "div.sc-gEvEer.diZRny").text
-            except: desc = ""
-
-            try: weight = card.find_element(By.CSS_SELECTOR, "div.sc-gEvEer.bCqPoH").text
-            except: weight = ""
-
-            try: price = card.find_element(By.CSS_SELECTOR, "div.sc-gEvEer.iQcBUp").text
-            except: price = ""
-
-            try: mrp = card.find_element(By.CSS_SELECTOR, "div.sc-gEvEer.fULQHN").text
-            except: mrp = ""
-
-            try: discount = card.find_element(By.CSS_SELECTOR, "div[data-testid='item-offer-label-discount-text']").text
-            except: discount = ""
-
-            try: eta = card.find_element(By.CSS_SELECTOR, "div._2zIRo div").text
-            except: eta = ""
-
-            try: image = card.find_element(By.CSS_SELECTOR, "img._16I1D").get_attribute("src")
-            except: image = ""
+        return False
 
-            products.append({
-                "name": name,
-                "description": desc,
-                "weight": weight,
-                "price": price,
-                "mrp": mrp,
-                "discount": discount,
-                "delivery_time": eta,
-                "image_url": image
-            })
+    # ------------------------------ MAIN FLOW ---------------------------------
 
-        return products
+    results = {q: [] for q in SEARCH_QUERIES}
 
-    # ------------------------------ MAIN FLOW ---------------------------------
+    with retry_budget(len(SEARCH_QUERIES)):
+        if not safe_get(HOME_URL):
+            raise VendorUnavailable(VENDOR, "home page did not load")
 
-    if not safe_get("https://www.swiggy.com/instamart"):
-        driver.quit()
-        return []
+        if not set_location():
+            raise VendorUnavailable(VENDOR, f"could not set location '{LOCATION}'")
 
-    if not set_location():
-        driver.quit()
-        return []
+        for i, q in enumerate(SEARCH_QUERIES):
+            # Location lives in the session, only the search has to be redone
+            if i > 0 and not safe_get(HOME_URL):
+                break
 
-    if not open_search_bar():
-        driver.quit()
-        return []
+            if not open_search_bar():
+                continue
 
-    if not search_product(SEARCH_QUERY):
-        driver.quit()
-        return []
+            if not search_product(q):
+                continue
 
-    cards = wait_for_products()
-    products = extract_products(cards)
+            if wait_for_products():
+                capture(driver, VENDOR, q)
+                results[q] = collect_products(driver, CARD, FIELDS, max_results)
 
-    driver.quit()
-    return products
+    return results
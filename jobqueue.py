@@ -0,0 +1,360 @@
+# jobqueue.py
+"""
+Scrape jobs between the API and browser workers. With EXECUTION_MODE=queue
+the API doesn't run browsers: each vendor scrape becomes a job on a broker,
+a worker (worker.py) runs it on its own browser pool and publishes the
+result under the job's id, and the API waits for that result.
+
+Delivery is at-least-once: a job reserved by a worker that dies (or runs
+past its lease) goes back on the queue. Results are published with
+set-if-absent under the job id, so a job that ran twice still has exactly
+one result and the second copy is only counted as a duplicate.
+
+BROKER_URL=redis://... uses Redis and lets workers run on other machines;
+without it a LocalBroker keeps the queue in this process and main.py runs
+the workers as threads, which is the same code path on one box.
+"""
+import os
+import json
+import time
+import uuid
+import asyncio
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import metrics
+from retry import SCRAPE_TIME_BUDGET, QUERY_TIME_BUDGET
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+
+# ============================================================
+# CONFIG
+# ============================================================
+
+# "inline": scrapes run in the API process (default)
+# "queue":  scrapes are jobs for worker.py
+EXECUTION_MODE = os.getenv("EXECUTION_MODE", "inline")
+
+BROKER_URL = os.getenv("BROKER_URL")
+
+# How long the API waits for a job's result: the scrape's retry budget
+# (see job_timeout) plus this much for queueing and starting a browser
+JOB_QUEUE_SLACK = float(os.getenv("JOB_QUEUE_SLACK_SECONDS", "60"))
+JOB_TIMEOUT = SCRAPE_TIME_BUDGET + QUERY_TIME_BUDGET + JOB_QUEUE_SLACK
+
+# A reserved job that isn't acked within its lease is delivered again. The
+# worker renews the lease while the scrape runs, so it only has to outlast
+# a worker that died. Jobs carry the API's deadline, so a redelivery after
+# the caller gave up is dropped.
+JOB_LEASE = float(os.getenv("JOB_LEASE_SECONDS", "60"))
+JOB_MAX_DELIVERIES = int(os.getenv("JOB_MAX_DELIVERIES", "3"))
+
+# Results nobody collected are dropped after this long
+RESULT_TTL = int(os.getenv("JOB_RESULT_TTL_SECONDS", "600"))
+
+PREFIX = os.getenv("BROKER_PREFIX", "bestdeal")
+
+
+QUEUE_DEPTH = metrics.Gauge(
+    "bestdeal_queue_depth", "Scrape jobs waiting (ready) or reserved by a worker (inflight)", ["state"]
+)
+JOB_EVENTS = metrics.Counter(
+    "bestdeal_jobs_total",
+    "Scrape job events (enqueued, completed, failed, duplicate, redelivered, dead, timeout, expired)",
+    ["vendor", "event"]
+)
+JOB_SECONDS = metrics.Histogram(
+    "bestdeal_job_seconds", "Enqueue until the API has the result", ["vendor"],
+    buckets=(2, 5, 10, 15, 20, 30, 45, 60, 90, 120, 180)
+)
+
+
+class JobTimeout(Exception):
+    pass
+
+
+class JobFailed(Exception):
+    pass
+
+
+class RemoteUsage:
+    """A worker's resource accounting, shaped like resources.ScrapeUsage for the API."""
+
+    def __init__(self, stats):
+        self.stats = stats
+
+    def as_dict(self):
+        return self.stats
+
+
+def job_timeout(queries=1):
+    """How long to wait for a scrape of `queries` searches (see retry.retry_budget)."""
+    return SCRAPE_TIME_BUDGET + QUERY_TIME_BUDGET * queries + JOB_QUEUE_SLACK
+
+
+def new_job(vendor, call, args, kwargs, timeout=JOB_TIMEOUT):
+    now = time.time()
+    return {
+        "id": uuid.uuid4().hex,
+        "vendor": vendor,
+        "call": call,
+        "args": list(args),
+        "kwargs": kwargs,
+        "enqueued_at": now,
+        # Nobody waits for the result after this
+        "deadline": now + timeout,
+        "deliveries": 0,
+    }
+
+
+def expired(job):
+    return time.time() >= job.get("deadline", float("inf"))
+
+
+def dead_letter(job):
+    JOB_EVENTS.inc(vendor=job["vendor"], event="dead")
+    return {"data": None, "error": f"Gave up after {job['deliveries']} deliveries", "usage": None}
+
+
+# ============================================================
+# BROKERS
+# ============================================================
+
+class Broker:
+    """
+    enqueue(job); reserve(timeout) -> job or None; extend(job) renews
+    that delivery's lease; ack(job) (only ever clears that delivery's
+    lease, never a redelivered copy's);
+    publish(job_id, result) -> False if a result was already there;
+    wait_result(job_id, timeout) -> result or None; depth() -> counts.
+    """
+
+    def stats(self):
+        return {"broker": type(self).__name__, **self.depth()}
+
+
+class LocalBroker(Broker):
+    """In-process queue for a single box; workers are threads."""
+
+    def __init__(self, lease=JOB_LEASE, max_deliveries=JOB_MAX_DELIVERIES):
+        self.lease = lease
+        self.max_deliveries = max_deliveries
+        self._ready = deque()
+        self._inflight = {}    # job id -> (delivery, lease deadline)
+        self._results = {}     # job id -> (result, expires)
+        self._cond = threading.Condition()
+
+    def enqueue(self, job):
+        with self._cond:
+            self._ready.append(job)
+            self._cond.notify_all()
+
+    def _requeue_expired(self):
+        now = time.time()
+        for job_id, (job, deadline) in list(self._inflight.items()):
+            if deadline > now:
+                continue
+            del self._inflight[job_id]
+            if job["deliveries"] >= self.max_deliveries:
+                self._results.setdefault(job_id, (dead_letter(job), now + RESULT_TTL))
+            else:
+                JOB_EVENTS.inc(vendor=job["vendor"], event="redelivered")
+                self._ready.appendleft(job)
+        for job_id, (_, expires) in list(self._results.items()):
+            if expires <= now:
+                del self._results[job_id]
+
+    def reserve(self, timeout=1.0):
+        deadline = time.time() + timeout
+        with self._cond:
+            while True:
+                self._requeue_expired()
+                if self._ready:
+                    # A fresh dict per delivery, so a late ack of an
+                    # earlier one can be told apart
+                    job = dict(self._ready.popleft())
+                    job["deliveries"] += 1
+                    job["delivery"] = uuid.uuid4().hex
+                    self._inflight[job["id"]] = (job, time.time() + self.lease)
+                    return job
+                left = deadline - time.time()
+                if left <= 0:
+                    return None
+                self._cond.wait(min(left, 1.0))
+
+    def extend(self, job):
+        with self._cond:
+            current = self._inflight.get(job["id"])
+            if current is not None and current[0]["delivery"] == job["delivery"]:
+                self._inflight[job["id"]] = (current[0], time.time() + self.lease)
+
+    def ack(self, job):
+        with self._cond:
+            current = self._inflight.get(job["id"])
+            if current is not None and current[0]["delivery"] == job["delivery"]:
+                del self._inflight[job["id"]]
+
+    def publish(self, job_id, result):
+        with self._cond:
+            if job_id in self._results:
+                return False
+            self._results[job_id] = (result, time.time() + RESULT_TTL)
+            self._cond.notify_all()
+            return True
+
+    def wait_result(self, job_id, timeout):
+        with self._cond:
+            # Left in place until RESULT_TTL, so a redelivered copy of the
+            # job still finds its result taken
+            self._cond.wait_for(lambda: job_id in self._results, timeout)
+            entry = self._results.get(job_id)
+            return entry[0] if entry else None
+
+    def depth(self):
+        with self._cond:
+            self._requeue_expired()
+            ready, inflight = len(self._ready), len(self._inflight)
+        QUEUE_DEPTH.set(ready, state="ready")
+        QUEUE_DEPTH.set(inflight, state="inflight")
+        return {"ready": ready, "inflight": inflight}
+
+
+class RedisBroker(Broker):
+    """
+    Jobs in a Redis list, moved atomically onto a processing list when a
+    worker takes one (BLMOVE), with the lease deadline in a sorted set.
+    Both are keyed by the delivery's exact JSON, which changes with every
+    redelivery. Anyone calling reserve() or depth() puts expired leases back.
+    """
+
+    def __init__(self, url, lease=JOB_LEASE, max_deliveries=JOB_MAX_DELIVERIES):
+        if redis is None:
+            raise RuntimeError("BROKER_URL is set but the redis package isn't installed")
+        self.r = redis.Redis.from_url(url, decode_responses=True)
+        self.lease = lease
+        self.max_deliveries = max_deliveries
+        self.ready = f"{PREFIX}:jobs"
+        self.processing = f"{PREFIX}:jobs:processing"
+        self.leases = f"{PREFIX}:jobs:leases"
+
+    def _result_key(self, job_id):
+        return f"{PREFIX}:result:{job_id}"
+
+    def _done_key(self, job_id):
+        return f"{PREFIX}:done:{job_id}"
+
+    def enqueue(self, job):
+        self.r.rpush(self.ready, json.dumps(job))
+
+    def _requeue_expired(self):
+        now = time.time()
+        leased = dict(self.r.zrange(self.leases, 0, -1, withscores=True))
+        for raw in self.r.lrange(self.processing, 0, -1):
+            job = json.loads(raw)
+            deadline = leased.get(raw)
+            if deadline is None:
+                # Just taken and not leased yet (or the worker died in
+                # between): lease it on the worker's behalf
+                self.r.zadd(self.leases, {raw: now + self.lease}, nx=True)
+                continue
+            if deadline > now:
+                continue
+            # Whoever removes it from processing owns the requeue
+            if not self.r.lrem(self.processing, 1, raw):
+                continue
+            self.r.zrem(self.leases, raw)
+            job["deliveries"] += 1
+            if job["deliveries"] >= self.max_deliveries:
+                self.publish(job["id"], dead_letter(job))
+            else:
+                JOB_EVENTS.inc(vendor=job["vendor"], event="redelivered")
+                self.r.lpush(self.ready, json.dumps(job))
+
+    def reserve(self, timeout=1.0):
+        self._requeue_expired()
+        raw = self.r.blmove(self.ready, self.processing, max(1, int(timeout)), "LEFT", "RIGHT")
+        if raw is None:
+            return None
+        job = json.loads(raw)
+        self.r.zadd(self.leases, {raw: time.time() + self.lease})
+        job["deliveries"] += 1
+        job["_raw"] = raw
+        return job
+
+    def extend(self, job):
+        # xx: a lease that was already requeued stays gone
+        self.r.zadd(self.leases, {job["_raw"]: time.time() + self.lease}, xx=True)
+
+    def ack(self, job):
+        pipe = self.r.pipeline()
+        pipe.lrem(self.processing, 1, job["_raw"])
+        pipe.zrem(self.leases, job["_raw"])
+        pipe.execute()
+
+    def publish(self, job_id, result):
+        if not self.r.set(self._result_key(job_id), json.dumps(result), nx=True, ex=RESULT_TTL):
+            return False
+        pipe = self.r.pipeline()
+        pipe.rpush(self._done_key(job_id), 1)
+        pipe.expire(self._done_key(job_id), RESULT_TTL)
+        pipe.execute()
+        return True
+
+    def wait_result(self, job_id, timeout):
+        if self.r.blpop(self._done_key(job_id), max(1, int(timeout))) is None:
+            return None
+        # The key stays until it expires, so a redelivered copy can't publish again
+        raw = self.r.get(self._result_key(job_id))
+        return json.loads(raw) if raw else None
+
+    def depth(self):
+        self._requeue_expired()
+        ready, inflight = self.r.llen(self.ready), self.r.llen(self.processing)
+        QUEUE_DEPTH.set(ready, state="ready")
+        QUEUE_DEPTH.set(inflight, state="inflight")
+        return {"ready": ready, "inflight": inflight}
+
+
+def make_broker(url=BROKER_URL):
+    if url:
+        return RedisBroker(url)
+    return LocalBroker()
+
+
+# ============================================================
+# API SIDE
+# ============================================================
+
+# wait_result() blocks, so waiting happens off the event loop
+_waiters = ThreadPoolExecutor(max_workers=int(os.getenv("JOB_WAITERS", "32")),
+                              thread_name_prefix="job-wait")
+
+
+async def submit(broker, vendor, call, *args, timeout=JOB_TIMEOUT, **kwargs):
+    """
+    Enqueue `vendor`'s `call(*args, **kwargs)` and wait for a worker's
+    result. Returns (data, usage); raises JobFailed with the worker's error
+    or JobTimeout. Size `timeout` with job_timeout() for multi-query calls.
+    """
+    job = new_job(vendor, call, args, kwargs, timeout)
+    broker.enqueue(job)
+    JOB_EVENTS.inc(vendor=vendor, event="enqueued")
+
+    loop = asyncio.get_running_loop()
+    result = await loop.run_in_executor(_waiters, broker.wait_result, job["id"], timeout)
+    if result is None:
+        JOB_EVENTS.inc(vendor=vendor, event="timeout")
+        raise JobTimeout(f"{vendor} job got no result within {timeout:.0f}s")
+
+    JOB_SECONDS.observe(time.time() - job["enqueued_at"], vendor=vendor)
+    usage = RemoteUsage(result.get("usage"))
+    if result.get("error"):
+        error = JobFailed(result["error"])
+        error.usage = usage
+        raise error
+    return result["data"], usage
@@ -1,15 +1,27 @@
 # main.py
-from fastapi import FastAPI, Request
+from fastapi import FastAPI, Request, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-import logging, asyncio, requests
+from fastapi.responses import StreamingResponse, PlainTextResponse, FileResponse
+from pydantic import BaseModel, Field
+import logging, asyncio, requests, json, time, os, sys
 from concurrent.futures import ThreadPoolExecutor
 
-# Import scrapers (all must have get_products(location, product))
-from zepto import get_products as zepto_scrape
-from blinkit import get_products as blinkit_scrape
-from instamart import get_products as instamart_scrape
-# from flipkart_minutes import get_products as flipkart_scrape
+import metrics
+from coldstart import CLOCK, PREWARM_BROWSER
+from resources import track_scrape, ScrapeUsage
+from breaker import BREAKERS, CircuitOpen, outcome_of
+from hedge import HEDGER, HEDGE_ENABLED, HEDGE_MAX_INFLIGHT
+from cache import ResultCache, normalize
+from vendors import REGISTRY
+from jobqueue import EXECUTION_MODE, LocalBroker, make_broker, submit, job_timeout
+from delta import versioned_response, VERSIONS
+from snapshots import SNAPSHOT_ENABLED, ARCHIVE as snapshot_archive
+import profiling
+from profiling import PROFILE_HEADER, authorized, profile_request, current_session
+from imgproxy import PROXY as image_proxy, with_thumbnails, DEFAULT_WIDTH
+from suggest import SuggestIndex
+from optimizer import optimize_basket
+from warm_crawl import PopularityTracker, WarmCrawler, WARM_CRAWL_ENABLED
 
 # ============================================================
 # APP CONFIG
@@ -32,8 +44,211 @@ app.add_middleware(
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("BestDealAPI")
 
-executor = ThreadPoolExecutor(max_workers=4)
+# Built-in vendors plus any installed "bestdeal.vendors" plugins (vendors.py).
+# Their modules pull in Selenium, so they are imported on first use and a
+# cold start only pays for FastAPI.
+VENDORS = REGISTRY.all()
+
+SCRAPERS = {name: vendor.function("get_products") for name, vendor in VENDORS.items()}
+
+# Multi-query variants: get_basket(location, [products]) -> {product: [...]}
+BASKET_SCRAPERS = {v.name: v.function("get_basket") for v in REGISTRY.with_capability("basket")}
+
+# "thread": Selenium scrapers on the executor (default)
+# "cdp":    coroutine scrapers driving Chrome over DevTools from the event
+#           loop (cdp_scrapers.py), no thread per scrape
+SCRAPE_ENGINE = os.getenv("SCRAPE_ENGINE", "thread")
+
+# "inline": scrapes run here, on this process's browsers
+# "queue":  scrapes are jobs for worker.py (jobqueue.py); with BROKER_URL
+#           unset the workers are threads in this process. Workers run the
+#           Selenium scrapers, so SCRAPE_ENGINE doesn't apply.
+broker = make_broker() if EXECUTION_MODE == "queue" else None
+local_workers = None
+if broker is not None:
+    SCRAPE_ENGINE = "thread"
+
+if SCRAPE_ENGINE == "cdp":
+    from cdp_scrapers import ASYNC_SCRAPERS, PAGES
+    SCRAPERS.update(ASYNC_SCRAPERS)
+
+# A cold /search scrapes every vendor at once, so it gets a thread and a
+# browser per vendor, plus room for hedged second attempts and the warm
+# crawler's one background scrape; otherwise vendors queue behind each other
+SEARCH_PARALLEL = (len(SCRAPERS) + (HEDGE_MAX_INFLIGHT if HEDGE_ENABLED else 0)
+                   + (1 if WARM_CRAWL_ENABLED else 0))
+executor = ThreadPoolExecutor(max_workers=SEARCH_PARALLEL)
+
+BASKET_MAX_ITEMS = 30
+
+# Fan-out gets its own small thread pool so it can't take over /search's executor
+FANOUT_MAX_PARALLEL = 2
+FANOUT_MAX_LOCATIONS = 100
+fanout_executor = ThreadPoolExecutor(max_workers=FANOUT_MAX_PARALLEL)
+
+# Every scrape thread holds at most one browser, so with a browser per
+# thread of both pools neither can starve the other. Read by browser.py
+# when the first scraper loads; an explicit BROWSER_POOL_SIZE wins.
+os.environ.setdefault("BROWSER_POOL_SIZE", str(SEARCH_PARALLEL + FANOUT_MAX_PARALLEL))
+
+result_cache = ResultCache()
+popularity = PopularityTracker()
+suggest_index = SuggestIndex()
+
+# Number of live /search scrapes currently running; background work yields while > 0
+live_scrapes = 0
+
+# The server's event loop, for running coroutine scrapers from worker threads
+main_loop = None
+
+
+
+def run_tracked(name, func, *args, usage=None, **kwargs):
+    """
+    Run a scraper in the calling (executor) thread with its browser's CPU and
+    memory accounted for. Returns (data, usage).
+    """
+    with track_scrape(name, usage) as usage:
+        data = func(*args, **kwargs)
+    return data, usage
+
+
+async def run_tracked_async(name, func, *args, **kwargs):
+    """
+    run_tracked for coroutine scrapers. They share one Chrome and no thread,
+    so only wall time can be attributed to them.
+    """
+    usage = ScrapeUsage(name)
+    usage.shared = True
+    try:
+        return await func(*args, **kwargs), usage
+    finally:
+        usage.wall_s = time.time() - usage.started
+        metrics.SCRAPE_SECONDS.observe(usage.wall_s, vendor=name)
+
+
+def submit_job(name, func, location, products, **kwargs):
+    """
+    submit() for queue mode, waiting as long as the scrape's retry budget
+    allows for the number of products (get_basket takes a list).
+    """
+    queries = len(products) if isinstance(products, list) else 1
+    return submit(broker, name, func.vendor_call, location, products,
+                  timeout=job_timeout(queries), **kwargs)
+
+
+def tracked(name, func):
+    """
+    Same as run_tracked, returning only the data (for background jobs), and
+    behind the vendor's circuit breaker like run_scrape: raises CircuitOpen
+    while the vendor is being skipped.
+    """
+    if broker is not None and hasattr(func, "vendor_call"):
+        call = lambda *args, **kwargs: asyncio.run_coroutine_threadsafe(
+            submit_job(name, func, *args, **kwargs), main_loop
+        ).result()
+    elif asyncio.iscoroutinefunction(func):
+        # Background jobs call from a worker thread, hand the scrape to the loop
+        call = lambda *args, **kwargs: asyncio.run_coroutine_threadsafe(
+            run_tracked_async(name, func, *args, **kwargs), main_loop
+        ).result()
+    else:
+        call = lambda *args, **kwargs: run_tracked(name, func, *args, **kwargs)
+
+    def guarded(*args, **kwargs):
+        breaker = BREAKERS[name]
+        ticket = breaker.allow()
+        started = time.time()
+        outcome = None
+        try:
+            data, _ = call(*args, **kwargs)
+            outcome = outcome_of(data, time.time() - started, vendor=name)
+            return data
+        except Exception as e:
+            outcome = outcome_of(None, time.time() - started, e)
+            raise
+        finally:
+            breaker.record(ticket, outcome)
+
+    return guarded
+
+
+def usage_of(error):
+    usage = getattr(error, "usage", None)
+    return usage.as_dict() if usage else None
+
+
+async def run_scrape(pool, name, func, *args, hedge=False, **kwargs):
+    """
+    run_tracked on `pool`, behind the vendor's circuit breaker. Raises
+    CircuitOpen straight away, without taking a thread, when the vendor is
+    being skipped. With `hedge`, a slow scrape may be raced against a
+    second attempt (see hedge.py). Coroutine scrapers run on the event
+    loop itself and are never hedged. In queue mode the scrape is a job
+    for a worker and `pool` isn't used.
+    """
+    breaker = BREAKERS[name]
+    ticket = breaker.allow()
+    started = time.time()
+    outcome = None
+    try:
+        if broker is not None and hasattr(func, "vendor_call"):
+            data, usage = await submit_job(name, func, *args, **kwargs)
+        elif asyncio.iscoroutinefunction(func):
+            data, usage = await run_tracked_async(name, func, *args, **kwargs)
+        elif hedge:
+            data, usage = await HEDGER.run(
+                name, pool,
+                lambda usage: lambda: run_tracked(name, func, *args, usage=usage, **kwargs)
+            )
+        else:
+            loop = asyncio.get_running_loop()
+            data, usage = await loop.run_in_executor(
+                pool, lambda: run_tracked(name, func, *args, **kwargs)
+            )
+        outcome = outcome_of(data, time.time() - started, vendor=name)
+        return data, usage
+    except Exception as e:
+        outcome = outcome_of(None, time.time() - started, e)
+        raise
+    finally:
+        breaker.record(ticket, outcome)
+
+
+def store_results(vendor, location, product, data, limit=None):
+    """Single sink for fresh scrape results: cache + autocomplete index."""
+    result_cache.set(vendor, location, product, data, limit)
+    suggest_index.add_products(data)
+    CLOCK.mark_scrape(vendor, data)
+
+
+def browser_pool():
+    """The shared Selenium pool, or None while nothing has imported it yet."""
+    browser = sys.modules.get("browser")
+    return browser.POOL if browser else None
+
 
+def prewarm():
+    """Import the vendor modules and start one pooled browser ahead of traffic."""
+    started = time.time()
+    try:
+        for vendor in VENDORS.values():
+            vendor.load()
+        pool = browser_pool()
+        pool.release(pool.acquire())
+    except Exception as e:
+        logger.error(f"Browser pre-warm FAILED: {e}")
+        return
+    CLOCK.mark_prewarmed(time.time() - started)
+    logger.info(f"🔥 Warm browser ready in {CLOCK.prewarm:.1f}s")
+
+
+warm_crawler = WarmCrawler(
+    {name: tracked(name, func) for name, func in SCRAPERS.items()},
+    result_cache, popularity, executor,
+    is_busy=lambda: live_scrapes > 0,
+    on_result=store_results
+)
 
 
 # ============================================================
@@ -79,16 +294,54 @@ def get_location_from_multiple_apis(ip):
     return "Unknown"
 
 
+def resolve_location(location):
+    if location:
+        return location
+
+    ip = get_public_ip()
+    location = get_location_from_multiple_apis(ip)
+    logger.info(f"📍 Auto-detected location: {location}")
+    return location
+
+
 
 # ============================================================
 # MODELS
 # ============================================================
 
+MAX_RESULTS_LIMIT = 100
+
+
 class SearchInput(BaseModel):
     product: str
     location: str | None = None
     latitude: float | None = None
     longitude: float | None = None
+    # Stop each scraper once it has this many products
+    max_results: int | None = Field(None, ge=1, le=MAX_RESULTS_LIMIT)
+    # Only these vendors (names from /vendors); all of them when omitted
+    vendors: list[str] | None = Field(None, min_length=1)
+
+
+class BasketInput(BaseModel):
+    products: list[str] = Field(..., min_length=1, max_length=BASKET_MAX_ITEMS)
+    location: str | None = None
+    max_results: int | None = Field(None, ge=1, le=MAX_RESULTS_LIMIT)
+
+
+class OptimizeInput(BaseModel):
+    # Same shape as the "items" field of /search/basket: {item: {vendor: [products]}}
+    items: dict[str, dict[str, list[dict]]]
+    max_vendors: int | None = Field(None, ge=1)
+    min_order: dict[str, float] = {}
+    delivery_fee: dict[str, float] = {}
+
+
+class FanoutInput(BaseModel):
+    product: str
+    locations: list[str] = Field(..., min_length=1, max_length=FANOUT_MAX_LOCATIONS)
+    max_parallel: int = Field(FANOUT_MAX_PARALLEL, ge=1, le=FANOUT_MAX_PARALLEL)
+    max_results: int | None = Field(None, ge=1, le=MAX_RESULTS_LIMIT)
 
 
 
@@ -96,10 +349,135 @@ class SearchInput(BaseModel):
 # ROUTES
 # ============================================================
 
+@app.on_event("startup")
+async def start_background_jobs():
+    global main_loop
+    main_loop = asyncio.get_running_loop()
+
+    logger.info(f"⏱️ App imported {CLOCK.imported:.2f}s after process start")
+
+    global local_workers
+    if isinstance(broker, LocalBroker):
+        from worker import Worker
+        local_workers = Worker(broker).start()
+
+    if PREWARM_BROWSER and (broker is None or local_workers is not None):
+        if SCRAPE_ENGINE == "cdp":
+            asyncio.create_task(prewarm_pages())
+        else:
+            # In the background, so the port opens without waiting for Chrome
+            main_loop.run_in_executor(executor, prewarm)
+
+    if WARM_CRAWL_ENABLED:
+        warm_crawler.start()
+        logger.info("🔥 Warm crawl scheduler started")
+
+
+async def prewarm_pages():
+    started = time.time()
+    try:
+        async with PAGES.page():
+            pass
+    except Exception as e:
+        logger.error(f"Browser pre-warm FAILED: {e}")
+        return
+    CLOCK.mark_prewarmed(time.time() - started)
+    logger.info(f"🔥 Warm browser ready in {CLOCK.prewarm:.1f}s")
+
+
+@app.on_event("shutdown")
+async def stop_background_jobs():
+    warm_crawler.stop()
+    if local_workers is not None:
+        await asyncio.get_running_loop().run_in_executor(None, local_workers.stop)
+    if browser_pool() is not None:
+        browser_pool().close()
+    if SCRAPE_ENGINE == "cdp":
+        await PAGES.close()
+
+
 @app.get("/")
 def home():
     return {"status": "OK", "message": "BestDeal API running"}
 
+@app.get("/cache/stats")
+def cache_stats():
+    return {
+        "cache": result_cache.stats(),
+        "warm_crawl": warm_crawler.stats(),
+        "browser_pool": browser_pool().stats() if browser_pool() else None,
+        "images": image_proxy.stats(),
+        "result_versions": VERSIONS.stats(),
+        "hedging": HEDGER.stats(),
+        "engine": SCRAPE_ENGINE,
+        "execution_mode": EXECUTION_MODE,
+        "queue": broker.stats() if broker is not None else None,
+        "snapshots": snapshot_archive.stats() if SNAPSHOT_ENABLED else None,
+        "cdp_pages": PAGES.stats() if SCRAPE_ENGINE == "cdp" else None
+    }
+
+@app.get("/startup")
+def startup_stats():
+    """Cold-start timings: import, browser pre-warm, first successful scrape."""
+    return CLOCK.stats()
+
+@app.get("/metrics")
+def prometheus_metrics():
+    if broker is not None:
+        broker.depth()   # refreshes bestdeal_queue_depth
+    return PlainTextResponse(metrics.render())
+
+def require_profile_token(request):
+    if not authorized(request.headers.get(PROFILE_HEADER, "")):
+        raise HTTPException(403, "Profiles need a valid X-Profile-Token")
+
+@app.get("/profiles")
+def list_profiles(request: Request):
+    """Saved request profiles, newest first (admin only)."""
+    require_profile_token(request)
+    return profiling.list_profiles()
+
+@app.get("/profiles/{profile_id}")
+def get_profile(profile_id: str, request: Request):
+    """Wall times, top functions and Chrome metrics of one profiled request."""
+    require_profile_token(request)
+    summary = profiling.load_summary(profile_id)
+    if summary is None:
+        raise HTTPException(404, f"No profile '{profile_id}'")
+    return summary
+
+@app.get("/profiles/{profile_id}/{name}")
+def get_profile_file(profile_id: str, name: str, request: Request):
+    """A raw pstats dump, e.g. search_all.prof or Zepto.prof."""
+    require_profile_token(request)
+    path = profiling.profile_file(profile_id, name)
+    if path is None:
+        raise HTTPException(404, f"No file '{name}' in profile '{profile_id}'")
+    return FileResponse(path, media_type="application/octet-stream", filename=f"{profile_id}-{name}")
+
+@app.get("/selectors/health")
+def selector_health():
+    """Live state of every vendor selector; `degrading` lists the ones to fix."""
+    from selector_registry import health_report, degrading
+    return {"degrading": degrading(), "selectors": health_report()}
+
+@app.get("/breakers")
+def breaker_states():
+    """Circuit breaker per vendor: state, seconds until the next probe, recent outcomes."""
+    return {name: BREAKERS[name].snapshot() for name in SCRAPERS}
+
+@app.get("/suggest")
+def suggest(q: str, limit: int = 10):
+    return {"query": q, "suggestions": suggest_index.suggest(q, min(limit, 50))}
+
+@app.get("/img")
+def image(url: str, request: Request, w: int = DEFAULT_WIDTH):
+    """
+    Vendor product image as a cached WebP thumbnail. Only vendor CDN hosts
+    are fetched; repeat requests are served from disk or answered 304.
+    """
+    return image_proxy.serve(url, w, request.headers.get("if-none-match"))
+
 @app.get("/get-location")
 def detect_location(request: Request):
     ip = request.client.host
@@ -116,54 +494,319 @@ def detect_location(request: Request):
 # PARALLEL SCRAPING ENDPOINT
 # ============================================================
 
+def pick_vendors(names):
+    """The SCRAPERS entries a request asked for, all of them for None."""
+    if names is None:
+        return SCRAPERS
+    picked = {}
+    for name in names:
+        vendor = REGISTRY.get(name)
+        if vendor is None or vendor.name not in SCRAPERS:
+            raise HTTPException(400, f"Unknown vendor '{name}', expected some of {list(SCRAPERS)}")
+        picked[vendor.name] = SCRAPERS[vendor.name]
+    return picked
+
+
+async def scrape_vendor(name, func, location, product, max_results):
+    """
+    One vendor's part of a search: the result cache first, then a hedged
+    live scrape. Returns (products, error, cached, resources).
+    """
+    global live_scrapes
+
+    hit = result_cache.get(name, location, product, max_results)
+    if hit is not None:
+        return with_thumbnails(hit), None, True, None
+
+    # Thread scrapes get their own profile; coroutine ones are in the loop's
+    session = current_session()
+    if session is not None and not asyncio.iscoroutinefunction(func):
+        func = session.wrap(name, func)
+
+    live_scrapes += 1
+    try:
+        data, usage = await run_scrape(
+            executor, name, func, location, product,
+            hedge=True, max_results=max_results
+        )
+        store_results(name, location, product, data, max_results)
+        return with_thumbnails(data), None, False, usage.as_dict()
+    except CircuitOpen as e:
+        logger.warning(str(e))
+        return None, str(e), False, None
+    except Exception as e:
+        logger.error(f"{name} FAILED: {e}")
+        return None, str(e), False, usage_of(e)
+    finally:
+        live_scrapes -= 1
+
+
 @app.post("/search")
-async def search_all(body: SearchInput):
+async def search_all(body: SearchInput, request: Request):
+    """
+    Every vendor (or the ones in body.vendors) in parallel. The response
+    format follows the Accept header (or ?format=json|columnar|arrow), see
+    encoding.py. Responses carry a version ETag; pollers can send
+    If-None-Match or ?since=<version>, see delta.py. Admins can have the
+    request profiled with X-Profile-Token, see profiling.py.
+    """
+    token = request.headers.get(PROFILE_HEADER)
+    if token is None:
+        return await search(body, request)
+    if not authorized(token):
+        raise HTTPException(403, "Invalid profiling token")
+
+    async with profile_request("search_all", {"product": body.product, "vendors": body.vendors}) as session:
+        if session is None:
+            raise HTTPException(409, "Another profiled request is still running")
+        response = await search(body, request)
+    await asyncio.to_thread(session.save)
+    response.headers["X-Profile-Id"] = session.id
+    return response
+
+
+async def search(body, request):
+    scrapers = pick_vendors(body.vendors)
     product = body.product
-    user_location = body.location
-
-    # Auto-location if missing
-    if not user_location:
-        ip = get_public_ip()
-        user_location = get_location_from_multiple_apis(ip)
-        logger.info(f"📍 Auto-detected location: {user_location}")
+    max_results = body.max_results
+    user_location = resolve_location(body.location)
 
     logger.info(f"🚀 Start scraping for '{product}' @ {user_location}")
-
-    scrapers = {
-        "Zepto": zepto_scrape,
-        "Blinkit": blinkit_scrape,
-        "Instamart": instamart_scrape,
-        # "Flipkart": flipkart_scrape
-    }
+    popularity.record(user_location, product)
 
     results = {}
     errors = {}
+    cached = []
+    resources = {}
 
     async def run_scraper(name, func):
-        try:
-            loop = asyncio.get_running_loop()
-            data = await loop.run_in_executor(
-                executor,
-                lambda: func(user_location, product)
-            )
+        data, error, hit, usage = await scrape_vendor(name, func, user_location, product, max_results)
+        if error is None:
             results[name] = data
-        except Exception as e:
-            logger.error(f"{name} FAILED: {e}")
-            errors[name] = str(e)
+        else:
+            errors[name] = error
+        if hit:
+            cached.append(name)
+        if usage is not None:
+            resources[name] = usage
 
     await asyncio.gather(*(run_scraper(name, func) for name, func in scrapers.items()))
 
     logger.info("🎉 Scraping complete")
 
-    return {
+    return versioned_response({
         "query": product,
         "location_used": user_location,
         "results": results,
-        "errors": errors
+        "errors": errors,
+        "cached": cached,
+        "meta": {"resources": resources}
+    }, request)
+
+
+
+# ============================================================
+# BASKET ENDPOINT
+# ============================================================
+
+@app.post("/search/basket")
+async def search_basket(body: BasketInput):
+    """
+    One browser session per vendor for the whole list: the location is set
+    once and every item is searched in the same session.
+    """
+    user_location = resolve_location(body.location)
+
+    # Drop blanks and repeats ("Milk", "milk ") but keep the user's order
+    items, seen = [], set()
+    for p in body.products:
+        key = normalize(p)
+        if key and key not in seen:
+            seen.add(key)
+            items.append(p.strip())
+
+    logger.info(f"🧺 Basket of {len(items)} items @ {user_location}")
+    for item in items:
+        popularity.record(user_location, item)
+
+    per_item = {item: {} for item in items}
+    errors = {}
+    cached = {}
+    resources = {}
+
+    async def run_basket(name, func):
+        global live_scrapes
+
+        missing = []
+        for item in items:
+            hit = result_cache.get(name, user_location, item, body.max_results)
+            if hit is not None:
+                per_item[item][name] = with_thumbnails(hit)
+                cached.setdefault(name, []).append(item)
+            else:
+                missing.append(item)
+
+        if not missing:
+            return
+
+        live_scrapes += 1
+        try:
+            data, usage = await run_scrape(
+                executor, name, func, user_location, missing, max_results=body.max_results
+            )
+            resources[name] = usage.as_dict()
+            for item in missing:
+                store_results(name, user_location, item, data.get(item, []), body.max_results)
+                per_item[item][name] = with_thumbnails(data.get(item, []))
+        except CircuitOpen as e:
+            logger.warning(str(e))
+            errors[name] = str(e)
+        except Exception as e:
+            logger.error(f"{name} basket FAILED: {e}")
+            errors[name] = str(e)
+            resources[name] = usage_of(e)
+        finally:
+            live_scrapes -= 1
+
+    await asyncio.gather(*(run_basket(name, func) for name, func in BASKET_SCRAPERS.items()))
+
+    logger.info("🎉 Basket complete")
+
+    return {
+        "items": per_item,
+        "location_used": user_location,
+        "errors": errors,
+        "cached": cached,
+        "meta": {"resources": resources}
     }
 
 
 
+# ============================================================
+# MULTI-LOCATION FAN-OUT
+# ============================================================
+
+@app.post("/search/fanout")
+async def search_fanout(body: FanoutInput):
+    """
+    Same product across many locations. Every (location, vendor) pair is a
+    job on the pooled browsers, so Chrome is reused and only the location
+    step is redone. Streams one NDJSON line per location as soon as all of
+    its vendors are done.
+    """
+    product = body.product
+    locations = list(dict.fromkeys(loc.strip() for loc in body.locations if loc.strip()))
+    limit = asyncio.Semaphore(body.max_parallel)
+
+    logger.info(f"🌍 Fan-out '{product}' over {len(locations)} locations")
+
+    async def run_job(location, name, func):
+        global live_scrapes
+
+        hit = result_cache.get(name, location, product, body.max_results)
+        if hit is not None:
+            return location, name, hit, None
+
+        async with limit:
+            live_scrapes += 1
+            try:
+                data, _ = await run_scrape(
+                    fanout_executor, name, func, location, product, max_results=body.max_results
+                )
+                store_results(name, location, product, data, body.max_results)
+                return location, name, data, None
+            except Exception as e:
+                logger.error(f"{name} @ {location} FAILED: {e}")
+                return location, name, None, str(e)
+            finally:
+                live_scrapes -= 1
+
+    async def stream():
+        # Location-major order, so early locations finish first
+        jobs = [asyncio.ensure_future(run_job(loc, name, func))
+                for loc in locations for name, func in SCRAPERS.items()]
+        pending = {loc: {"location": loc, "results": {}, "errors": {}} for loc in locations}
+
+        try:
+            for next_done in asyncio.as_completed(jobs):
+                location, name, data, error = await next_done
+                row = pending[location]
+                if error is None:
+                    row["results"][name] = with_thumbnails(data)
+                else:
+                    row["errors"][name] = error
+
+                if len(row["results"]) + len(row["errors"]) == len(SCRAPERS):
+                    yield json.dumps(pending.pop(location)) + "\n"
+        finally:
+            for job in jobs:
+                job.cancel()
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+
+@app.get("/vendors")
+def list_vendors():
+    """
+    Every vendor with its capabilities and recent median scrape time, so
+    clients can pick the ones they need for SearchInput.vendors (or call
+    /search/{vendor} for each).
+    """
+    latency = HEDGER.stats()["vendors"]
+    return {"vendors": [
+        {**vendor.as_dict(), "p50_s": latency.get(name, {}).get("p50")}
+        for name, vendor in VENDORS.items()
+    ]}
+
+
+@app.post("/search/{vendor}")
+async def search_vendor(vendor: str, body: SearchInput, request: Request):
+    """
+    A single vendor, same response shape and formats as /search. Lets a
+    client fire one request per vendor and show each as soon as it lands.
+    Declared after /search/basket and /search/fanout so those win.
+    """
+    found = REGISTRY.get(vendor)
+    if found is None or found.name not in SCRAPERS:
+        raise HTTPException(404, f"Unknown vendor '{vendor}', expected one of {list(SCRAPERS)}")
+    name = found.name
+
+    product = body.product
+    user_location = resolve_location(body.location)
+
+    logger.info(f"🚀 Start scraping {name} for '{product}' @ {user_location}")
+    popularity.record(user_location, product)
+
+    data, error, hit, usage = await scrape_vendor(
+        name, SCRAPERS[name], user_location, product, body.max_results
+    )
+
+    return versioned_response({
+        "query": product,
+        "location_used": user_location,
+        "results": {name: data} if error is None else {},
+        "errors": {name: error} if error is not None else {},
+        "cached": [name] if hit else [],
+        "meta": {"resources": {name: usage} if usage is not None else {}}
+    }, request)
+
+
+
+@app.post("/optimize")
+def optimize(body: OptimizeInput):
+    """Cheapest split of a basket across vendors under the given constraints."""
+    return optimize_basket(
+        body.items,
+        max_vendors=body.max_vendors,
+        min_order=body.min_order,
+        delivery_fee=body.delivery_fee
+    )
+
+
+
+CLOCK.mark_imported()
+
+
 # ============================================================
 # ENTRY POINT
 # ============================================================
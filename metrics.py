@@ -0,0 +1,128 @@
+# metrics.py
+import threading
+from bisect import bisect_left
+
+
+# ============================================================
+# MINIMAL PROMETHEUS-STYLE REGISTRY
+# ============================================================
+
+REGISTRY = []
+
+
+def _label_str(names, values):
+    if not names:
+        return ""
+    pairs = ",".join(f'{n}="{str(v)}"' for n, v in zip(names, values))
+    return "{" + pairs + "}"
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def _key(self, labels):
+        return tuple(labels.get(n, "") for n in self.labels)
+
+    def header(self):
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self):
+        return self.header() + [f"{self.name}{_label_str(self.labels, k)} {v}"
+                                for k, v in self._values.items()]
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def render(self):
+        return self.header() + [f"{self.name}{_label_str(self.labels, k)} {v}"
+                                for k, v in self._values.items()]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help_text, labels=(), buckets=(1, 5, 10, 30, 60, 120)):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            counts, total, n = self._values.get(key, ([0] * len(self.buckets), 0.0, 0))
+            i = bisect_left(self.buckets, value)
+            if i < len(counts):
+                counts[i] += 1
+            self._values[key] = (counts, total + value, n + 1)
+
+    def render(self):
+        lines = self.header()
+        for key, (counts, total, n) in self._values.items():
+            running = 0
+            for bound, c in zip(self.buckets, counts):
+                running += c
+                labels = _label_str(self.labels + ("le",), key + (bound,))
+                lines.append(f"{self.name}_bucket{labels} {running}")
+            labels = _label_str(self.labels + ("le",), key + ("+Inf",))
+            lines.append(f"{self.name}_bucket{labels} {n}")
+            lines.append(f"{self.name}_sum{_label_str(self.labels, key)} {total}")
+            lines.append(f"{self.name}_count{_label_str(self.labels, key)} {n}")
+        return lines
+
+
+def render():
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+# ============================================================
+# SHARED SCRAPE METRICS
+# ============================================================
+
+SCRAPE_SECONDS = Histogram(
+    "bestdeal_scrape_seconds", "Wall time of one vendor scrape", ["vendor"],
+    buckets=(2, 5, 10, 15, 20, 30, 45, 60, 90, 120, 180)
+)
+SCRAPE_CPU_SECONDS = Histogram(
+    "bestdeal_scrape_cpu_seconds", "CPU time used by a scrape's browser process tree", ["vendor"],
+    buckets=(1, 2, 5, 10, 20, 40, 80, 160)
+)
+SCRAPE_PEAK_RSS_MB = Histogram(
+    "bestdeal_scrape_peak_rss_mb", "Peak memory of a scrape's browser process tree", ["vendor"],
+    buckets=(128, 256, 512, 768, 1024, 1536, 2048, 4096)
+)
+SCRAPE_BUDGET_KILLS = Counter(
+    "bestdeal_scrape_budget_kills_total", "Scrapes killed for exceeding a resource budget",
+    ["vendor", "resource"]
+)
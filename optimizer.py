@@ -0,0 +1,218 @@
+# optimizer.py
+import re
+import time
+from itertools import combinations
+
+
+# Baskets up to this size are solved exactly, larger ones heuristically
+EXACT_MAX_ITEMS = 12
+
+
+# ============================================================
+# OFFER PREP
+# ============================================================
+
+def parse_price(text):
+    """'₹1,299' / '₹45.50' -> float, None when there is no number."""
+    m = re.search(r"\d[\d,]*(?:\.\d+)?", str(text or ""))
+    if not m:
+        return None
+    return float(m.group(0).replace(",", ""))
+
+
+def cheapest_offers(items):
+    """
+    {item: {vendor: [products]}} -> {item: {vendor: (price, product)}}
+    keeping only the cheapest priced product per item and vendor.
+    """
+    offers = {}
+    for item, by_vendor in items.items():
+        offers[item] = {}
+        for vendor, products in (by_vendor or {}).items():
+            best = None
+            for p in products or []:
+                price = parse_price(p.get("price"))
+                if price is not None and (best is None or price < best[0]):
+                    best = (price, p)
+            if best:
+                offers[item][vendor] = best
+    return offers
+
+
+# ============================================================
+# SOLVERS
+# ============================================================
+
+def _subset_cost(assign, offers, subset, min_order, delivery_fee):
+    """Total for an assignment, or None if a vendor is unused or below its minimum."""
+    subtotal = {v: 0.0 for v in subset}
+    for item, vendor in assign.items():
+        subtotal[vendor] += offers[item][vendor][0]
+
+    for v in subset:
+        if subtotal[v] <= 0 or subtotal[v] < min_order.get(v, 0):
+            return None
+    return sum(subtotal.values()) + sum(delivery_fee.get(v, 0) for v in subset)
+
+
+def _exact_for_subset(items, offers, subset, min_order, delivery_fee, best_total):
+    """Branch and bound over item -> vendor choices inside one vendor subset."""
+    # Items with the widest price spread first, so bad branches die early
+    items = sorted(items, key=lambda i: -(max(offers[i][v][0] for v in subset if v in offers[i])
+                                          - min(offers[i][v][0] for v in subset if v in offers[i])))
+    choices = [sorted((offers[i][v][0], v) for v in subset if v in offers[i]) for i in items]
+
+    # Suffix sums for bounds: cheapest remaining cost, and most each vendor could still get
+    n = len(items)
+    floor = [0.0] * (n + 1)
+    ceiling = {v: [0.0] * (n + 1) for v in subset}
+    for k in range(n - 1, -1, -1):
+        floor[k] = floor[k + 1] + choices[k][0][0]
+        for v in subset:
+            ceiling[v][k] = ceiling[v][k + 1] + offers[items[k]].get(v, (0.0,))[0]
+
+    fees = sum(delivery_fee.get(v, 0) for v in subset)
+    subtotal = {v: 0.0 for v in subset}
+    assign = {}
+    best = {"total": best_total, "assign": None}
+
+    def dfs(k, spent):
+        if spent + floor[k] + fees >= best["total"]:
+            return
+        for v in subset:
+            if subtotal[v] + ceiling[v][k] < max(min_order.get(v, 0), 1e-9):
+                return
+        if k == n:
+            best["total"] = spent + fees
+            best["assign"] = dict(assign)
+            return
+
+        for price, v in choices[k]:
+            assign[items[k]] = v
+            subtotal[v] += price
+            dfs(k + 1, spent + price)
+            subtotal[v] -= price
+        assign.pop(items[k], None)
+
+    dfs(0, 0.0)
+    return best["assign"], best["total"]
+
+
+def _greedy_for_subset(items, offers, subset, min_order, delivery_fee):
+    """Cheapest vendor per item, then move items to vendors under their minimum."""
+    assign = {i: min((v for v in subset if v in offers[i]), key=lambda v: offers[i][v][0])
+              for i in items}
+
+    def subtotals():
+        s = {v: 0.0 for v in subset}
+        for i, v in assign.items():
+            s[v] += offers[i][v][0]
+        return s
+
+    # Repair: pull the cheapest-to-move items onto vendors below their minimum
+    for _ in range(len(items) * len(subset)):
+        sub = subtotals()
+        short = [v for v in subset if sub[v] <= 0 or sub[v] < min_order.get(v, 0)]
+        if not short:
+            break
+        target = short[0]
+
+        moves = []
+        for i, v in assign.items():
+            if v == target or target not in offers[i]:
+                continue
+            price_here = offers[i][v][0]
+            if sub[v] - price_here < min_order.get(v, 0) or sub[v] - price_here <= 0:
+                continue
+            moves.append((offers[i][target][0] - price_here, i))
+        if not moves:
+            return None, None
+        _, item = min(moves)
+        assign[item] = target
+
+    # Improve: single-item moves that keep every vendor feasible
+    improved = True
+    while improved:
+        improved = False
+        sub = subtotals()
+        for i, v in list(assign.items()):
+            for w in subset:
+                if w == v or w not in offers[i]:
+                    continue
+                delta = offers[i][w][0] - offers[i][v][0]
+                left = sub[v] - offers[i][v][0]
+                if delta < 0 and left > 0 and left >= min_order.get(v, 0):
+                    assign[i] = w
+                    sub[v] = left
+                    sub[w] += offers[i][w][0]
+                    v = w
+                    improved = True
+
+    total = _subset_cost(assign, offers, subset, min_order, delivery_fee)
+    if total is None:
+        return None, None
+    return assign, total
+
+
+def optimize_basket(items, max_vendors=None, min_order=None, delivery_fee=None, exact=None):
+    """
+    Cheapest way to buy every available item across vendors.
+
+    items: {item: {vendor: [products]}} as returned by /search/basket.
+    Returns the per-vendor split, totals, and the items no vendor has.
+    """
+    start = time.perf_counter()
+    min_order = min_order or {}
+    delivery_fee = delivery_fee or {}
+
+    offers = cheapest_offers(items)
+    unavailable = [i for i, o in offers.items() if not o]
+    wanted = [i for i, o in offers.items() if o]
+    vendors = sorted({v for o in offers.values() for v in o})
+
+    if exact is None:
+        exact = len(wanted) <= EXACT_MAX_ITEMS
+
+    best_assign, best_total = None, float("inf")
+    max_k = min(max_vendors or len(vendors), len(vendors))
+
+    for k in range(1, max_k + 1):
+        for subset in combinations(vendors, k):
+            # Every wanted item must be buyable inside the subset
+            if any(not any(v in offers[i] for v in subset) for i in wanted):
+                continue
+
+            if exact:
+                assign, total = _exact_for_subset(wanted, offers, subset, min_order, delivery_fee, best_total)
+            else:
+                assign, total = _greedy_for_subset(wanted, offers, subset, min_order, delivery_fee)
+
+            if assign is not None and total < best_total:
+                best_assign, best_total = assign, total
+
+    result = {
+        "solver": "exact" if exact else "heuristic",
+        "solve_ms": None,
+        "unavailable": unavailable,
+    }
+
+    if best_assign is None and wanted:
+        result.update({"feasible": False})
+    else:
+        best_assign = best_assign or {}
+        split = {}
+        for item in wanted:
+            v = best_assign[item]
+            price, product = offers[item][v]
+            entry = split.setdefault(v, {"items": [], "subtotal": 0.0, "delivery_fee": delivery_fee.get(v, 0)})
+            entry["items"].append({"item": item, "name": product.get("name", ""), "price": price})
+            entry["subtotal"] = round(entry["subtotal"] + price, 2)
+
+        result.update({
+            "feasible": True,
+            "total": round(best_total if wanted else 0.0, 2),
+            "vendors": split,
+        })
+
+    result["solve_ms"] = round((time.perf_counter() - start) * 1000, 3)
+    return result
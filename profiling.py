@@ -0,0 +1,317 @@
+# profiling.py
+"""
+On-demand profiling of single /search requests, for finding out where a
+slow query spends its Python time without redeploying.
+
+A request carrying `X-Profile-Token: $PROFILE_TOKEN` is profiled: cProfile
+runs on the event loop for the whole of search_all (routing, cache, JSON
+encoding, and any coroutine scrapers) and, separately, in each vendor's
+scrape thread. The vendor's browser reports Chrome's own counters
+(Performance.getMetrics: script, layout, style and task time, JS heap)
+over the scrape. Everything lands in PROFILE_DIR/<id>/:
+
+    summary.json        wall times, top functions, Chrome metrics
+    <label>.prof        pstats dumps, e.g. for `snakeviz` or `python -m pstats`
+
+and is served by GET /profiles, /profiles/<id> and /profiles/<id>/<label>.prof
+with the same header. The response carries the id in X-Profile-Id.
+
+The event loop profile sees everything the loop ran meanwhile, other
+requests included, so profile on a quiet replica when that matters. In
+queue mode the scrapes run on workers and only the API side is profiled.
+One profiled request runs at a time. Without PROFILE_TOKEN it's all off.
+"""
+import os
+import io
+import json
+import time
+import uuid
+import hmac
+import shutil
+import pstats
+import cProfile
+import tempfile
+import threading
+import contextvars
+import functools
+from contextlib import contextmanager, asynccontextmanager
+
+
+# ============================================================
+# CONFIG
+# ============================================================
+
+PROFILE_TOKEN = os.getenv("PROFILE_TOKEN", "")
+PROFILE_HEADER = "x-profile-token"
+PROFILE_DIR = os.getenv("PROFILE_DIR", os.path.join(tempfile.gettempdir(), "bestdeal-profiles"))
+
+# Profiles kept on disk, oldest deleted first
+PROFILE_KEEP = int(os.getenv("PROFILE_KEEP", "50"))
+# Functions listed per profile in summary.json
+PROFILE_TOP = int(os.getenv("PROFILE_TOP", "40"))
+PROFILE_CHROME = os.getenv("PROFILE_CHROME", "1") == "1"
+
+# Chrome counters that accumulate; reported as the change over the scrape
+CHROME_DURATIONS = ("ScriptDuration", "LayoutDuration", "RecalcStyleDuration", "TaskDuration",
+                    "Nodes", "LayoutCount", "RecalcStyleCount", "JSEventListeners")
+# Reported as they are at the end
+CHROME_GAUGES = ("JSHeapUsedSize", "JSHeapTotalSize", "Documents", "Frames")
+
+
+def authorized(token):
+    # As bytes: compare_digest refuses non-ASCII str, which a header can hold
+    return bool(PROFILE_TOKEN) and hmac.compare_digest(token.encode(), PROFILE_TOKEN.encode())
+
+
+# The session of the request being handled; asyncio tasks inherit it
+_session = contextvars.ContextVar("profile_session", default=None)
+# (session, label) of the scrape running in this thread, for the browser pool
+_local = threading.local()
+
+_running = threading.Lock()
+
+
+def current_session():
+    return _session.get()
+
+
+def current_scrape():
+    return getattr(_local, "scrape", None)
+
+
+# ============================================================
+# SESSION
+# ============================================================
+
+class ProfileSession:
+    """One profiled request: a cProfile per thread it ran on, by label."""
+
+    def __init__(self, endpoint, detail):
+        self.id = time.strftime("%Y%m%d-%H%M%S") + "-" + uuid.uuid4().hex[:6]
+        self.endpoint = endpoint
+        self.detail = detail
+        self.started = time.time()
+        self.parts = {}      # label -> (cProfile.Profile, wall seconds)
+        self.chrome = {}     # label -> metrics
+        self._lock = threading.Lock()
+
+    def _label(self, label):
+        # A hedged scrape runs twice under the same vendor
+        with self._lock:
+            n = 1
+            unique = label
+            while unique in self.parts:
+                n += 1
+                unique = f"{label}#{n}"
+            self.parts[unique] = None
+            return unique
+
+    @contextmanager
+    def profile(self, label):
+        """cProfile whatever this thread runs inside the block."""
+        label = self._label(label)
+        prof = cProfile.Profile()
+        _local.scrape = (self, label)
+        started = time.perf_counter()
+        prof.enable()
+        try:
+            yield label
+        finally:
+            prof.disable()
+            _local.scrape = None
+            with self._lock:
+                self.parts[label] = (prof, time.perf_counter() - started)
+
+    def wrap(self, label, func):
+        """`func` profiled under `label` in whichever thread ends up calling it."""
+        @functools.wraps(func)
+        def profiled(*args, **kwargs):
+            with self.profile(label):
+                return func(*args, **kwargs)
+        return profiled
+
+    def add_chrome(self, label, metrics):
+        with self._lock:
+            self.chrome[label] = metrics
+
+    def save(self, directory=PROFILE_DIR):
+        path = os.path.join(directory, self.id)
+        os.makedirs(path, exist_ok=True)
+
+        parts = {}
+        with self._lock:
+            finished = {label: part for label, part in self.parts.items() if part is not None}
+        for label, (prof, wall_s) in finished.items():
+            prof.dump_stats(os.path.join(path, f"{label}.prof"))
+            parts[label] = {"wall_s": round(wall_s, 3), "file": f"{label}.prof", "top": top_functions(prof)}
+
+        summary = {
+            "id": self.id,
+            "endpoint": self.endpoint,
+            "detail": self.detail,
+            "started_at": self.started,
+            "wall_s": round(time.time() - self.started, 3),
+            "parts": parts,
+            "chrome": self.chrome,
+        }
+        with open(os.path.join(path, "summary.json"), "w") as f:
+            json.dump(summary, f, ensure_ascii=False, indent=1)
+
+        prune(directory)
+        print(f"🔬 Profile {self.id} saved ({', '.join(parts)})")
+        return summary
+
+
+def top_functions(prof, limit=PROFILE_TOP):
+    """The `limit` functions with the most cumulative time, as plain dicts."""
+    stats = pstats.Stats(prof, stream=io.StringIO())
+    rows = []
+    for (filename, line, name), (cc, nc, tt, ct, _) in stats.stats.items():
+        rows.append({
+            "function": f"{filename}:{line}({name})",
+            "calls": nc,
+            "tottime_s": round(tt, 4),
+            "cumtime_s": round(ct, 4),
+        })
+    rows.sort(key=lambda r: r["cumtime_s"], reverse=True)
+    return rows[:limit]
+
+
+@asynccontextmanager
+async def profile_request(endpoint, detail):
+    """
+    Profile the enclosed part of a request on the event loop and make the
+    session visible to the scrapes it starts. Yields None if another
+    profiled request is still running.
+    """
+    if not _running.acquire(blocking=False):
+        yield None
+        return
+    session = ProfileSession(endpoint, detail)
+    token = _session.set(session)
+    try:
+        with session.profile(endpoint):
+            yield session
+    finally:
+        _session.reset(token)
+        _running.release()
+
+
+# ============================================================
+# CHROME METRICS
+# ============================================================
+
+def _metrics(result):
+    return {m["name"]: m["value"] for m in result.get("metrics", [])}
+
+
+def _chrome_delta(before, after):
+    out = {k: round(after[k] - before.get(k, 0), 4) for k in CHROME_DURATIONS if k in after}
+    out.update({k: after[k] for k in CHROME_GAUGES if k in after})
+    return out
+
+
+class ChromeProbe:
+    """Performance.getMetrics on a Selenium driver, before and after a scrape."""
+
+    def __init__(self, driver, session, label):
+        self.driver = driver
+        self.session = session
+        self.label = label
+        self.before = None
+        try:
+            driver.execute_cdp_cmd("Performance.enable", {})
+            self.before = _metrics(driver.execute_cdp_cmd("Performance.getMetrics", {}))
+        except Exception as e:
+            print(f"⚠️ Chrome metrics unavailable: {e}")
+
+    def finish(self):
+        if self.before is None:
+            return
+        try:
+            after = _metrics(self.driver.execute_cdp_cmd("Performance.getMetrics", {}))
+            self.driver.execute_cdp_cmd("Performance.disable", {})
+            self.session.add_chrome(self.label, _chrome_delta(self.before, after))
+        except Exception as e:
+            print(f"⚠️ Chrome metrics unavailable: {e}")
+
+
+def chrome_probe(driver):
+    """A ChromeProbe when this thread's scrape is being profiled, else None."""
+    scrape = current_scrape()
+    if scrape is None or not PROFILE_CHROME:
+        return None
+    return ChromeProbe(driver, *scrape)
+
+
+@asynccontextmanager
+async def chrome_metrics_async(page, label):
+    """The CDP engine's ChromeProbe, around the block using `page`."""
+    session = current_session()
+    before = None
+    if session is not None and PROFILE_CHROME:
+        try:
+            await page.send("Performance.enable")
+            before = _metrics(await page.send("Performance.getMetrics"))
+        except Exception as e:
+            print(f"⚠️ Chrome metrics unavailable: {e}")
+    try:
+        yield
+    finally:
+        if before is not None:
+            try:
+                after = _metrics(await page.send("Performance.getMetrics"))
+                await page.send("Performance.disable")
+                session.add_chrome(label, _chrome_delta(before, after))
+            except Exception as e:
+                print(f"⚠️ Chrome metrics unavailable: {e}")
+
+
+# ============================================================
+# STORAGE
+# ============================================================
+
+def profile_ids(directory=PROFILE_DIR):
+    """Saved profile ids, newest first (ids start with their timestamp)."""
+    if not os.path.isdir(directory):
+        return []
+    return sorted((d for d in os.listdir(directory) if os.path.isdir(os.path.join(directory, d))),
+                  reverse=True)
+
+
+def prune(directory=PROFILE_DIR, keep=PROFILE_KEEP):
+    for old in profile_ids(directory)[keep:]:
+        shutil.rmtree(os.path.join(directory, old), ignore_errors=True)
+
+
+def _inside(directory, *parts):
+    """Path under `directory`, or None if `parts` would step outside it."""
+    root = os.path.realpath(directory)
+    path = os.path.realpath(os.path.join(root, *parts))
+    return path if path.startswith(root + os.sep) else None
+
+
+def load_summary(profile_id, directory=PROFILE_DIR):
+    path = _inside(directory, profile_id, "summary.json")
+    if path is None or not os.path.isfile(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def list_profiles(directory=PROFILE_DIR):
+    out = []
+    for profile_id in profile_ids(directory):
+        summary = load_summary(profile_id, directory)
+        if summary is not None:
+            out.append({k: summary[k] for k in ("id", "endpoint", "detail", "started_at", "wall_s")}
+                       | {"parts": list(summary["parts"])})
+    return out
+
+
+def profile_file(profile_id, name, directory=PROFILE_DIR):
+    """Path of one saved .prof file, or None."""
+    if not name.endswith(".prof"):
+        return None
+    path = _inside(directory, profile_id, name)
+    return path if path is not None and os.path.isfile(path) else None
@@ -0,0 +1,281 @@
+# resources.py
+import os
+import json
+import time
+import signal
+import threading
+from contextlib import contextmanager
+
+from metrics import SCRAPE_SECONDS, SCRAPE_CPU_SECONDS, SCRAPE_PEAK_RSS_MB, SCRAPE_BUDGET_KILLS
+
+
+# ============================================================
+# /proc PROCESS TREE HELPERS (Linux only, the container target)
+# ============================================================
+
+def children(pid):
+    kids = []
+    try:
+        for tid in os.listdir(f"/proc/{pid}/task"):
+            with open(f"/proc/{pid}/task/{tid}/children") as f:
+                kids.extend(int(c) for c in f.read().split())
+    except OSError:
+        pass
+    return kids
+
+
+def process_tree(*roots):
+    """All live pids under (and including) the given root pids."""
+    seen, stack = set(), [p for p in roots if p]
+    while stack:
+        pid = stack.pop()
+        if pid in seen or not os.path.exists(f"/proc/{pid}"):
+            continue
+        seen.add(pid)
+        stack.extend(children(pid))
+    return seen
+
+
+def memory_kb(pid):
+    """
+    PSS when the kernel exposes it (shared Chrome pages are split between
+    processes instead of counted once per process), otherwise RSS.
+    """
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                if line.startswith("Pss:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return 0
+
+
+def tree_memory_mb(*roots):
+    return sum(memory_kb(pid) for pid in process_tree(*roots)) / 1024
+
+
+CLOCK_TICKS = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+
+
+def cpu_seconds(pid):
+    """utime + stime of one process."""
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            # The command name may contain spaces, fields start after ')'
+            fields = f.read().rsplit(")", 1)[1].split()
+        return (int(fields[11]) + int(fields[12])) / CLOCK_TICKS
+    except (OSError, IndexError, ValueError):
+        return 0.0
+
+
+def sample_tree(*roots):
+    """(cpu seconds, memory MB) summed over the process tree."""
+    pids = process_tree(*roots)
+    return sum(cpu_seconds(p) for p in pids), sum(memory_kb(p) for p in pids) / 1024
+
+
+def kill_tree(*roots):
+    for pid in process_tree(*roots):
+        try:
+            os.kill(pid, signal.SIGKILL)
+        except OSError:
+            pass
+
+
+# ============================================================
+# PER-SCRAPE BUDGETS
+# ============================================================
+
+SAMPLE_INTERVAL = float(os.getenv("RESOURCE_SAMPLE_SECONDS", "1.0"))
+DEFAULT_CPU_BUDGET = float(os.getenv("SCRAPE_CPU_BUDGET_SECONDS", "120"))
+DEFAULT_RSS_BUDGET_MB = float(os.getenv("SCRAPE_RSS_BUDGET_MB", "2048"))
+
+# Per-vendor overrides, e.g. RESOURCE_BUDGETS='{"Instamart": {"cpu_s": 60, "rss_mb": 1200}}'
+VENDOR_BUDGETS = json.loads(os.getenv("RESOURCE_BUDGETS", "{}"))
+
+
+def budget_for(vendor):
+    b = VENDOR_BUDGETS.get(vendor, {})
+    return b.get("cpu_s", DEFAULT_CPU_BUDGET), b.get("rss_mb", DEFAULT_RSS_BUDGET_MB)
+
+
+class ResourceBudgetExceeded(Exception):
+    pass
+
+
+class ScrapeCancelled(Exception):
+    pass
+
+
+class ScrapeUsage:
+    """What one scrape's browser cost; filled in by the monitor thread."""
+
+    def __init__(self, vendor):
+        self.vendor = vendor
+        self.started = time.time()
+        self.wall_s = 0.0
+        self.cpu_s = 0.0
+        self.peak_rss_mb = 0.0
+        self.killed = None
+        self.cancelled = False
+        self.shared = False
+        self.roots = []
+        self.kill = None
+        self._cpu_base = 0.0
+
+    def attach(self, roots, kill, shared=False):
+        """Called when the scrape gets its browser."""
+        self.roots = list(roots)
+        self.kill = kill
+        self.shared = shared
+        # Pooled browsers carry CPU from earlier scrapes, only count ours
+        self._cpu_base = sample_tree(*self.roots)[0]
+        # Cancelled before it even got a browser
+        if self.killed:
+            kill()
+
+    def cancel(self, reason):
+        """
+        Stop the scrape from outside: its browser is killed (or, on the
+        context backend, its context closed) so WebDriver calls fail fast
+        and the pool replaces it.
+        """
+        self.cancelled = True
+        self.killed = reason
+        if self.kill is not None:
+            self.kill()
+
+    def sample(self):
+        if not self.roots:
+            return
+        cpu, rss = sample_tree(*self.roots)
+        self.cpu_s = max(self.cpu_s, cpu - self._cpu_base)
+        self.peak_rss_mb = max(self.peak_rss_mb, rss)
+
+    def as_dict(self):
+        return {
+            "wall_s": round(self.wall_s, 2),
+            "cpu_s": round(self.cpu_s, 2),
+            "peak_rss_mb": round(self.peak_rss_mb, 1),
+            "shared_browser": self.shared,
+            "killed": self.killed,
+        }
+
+
+class ResourceMonitor:
+    """
+    Background thread sampling every active scrape's process tree. Scrapes
+    over their vendor's CPU or memory budget get their browser killed, so
+    their WebDriver calls fail fast. Trees shared between scrapes (context
+    backend) are reported but never killed.
+    """
+
+    def __init__(self, interval=SAMPLE_INTERVAL):
+        self.interval = interval
+        self._active = set()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def add(self, usage):
+        with self._lock:
+            self._active.add(usage)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="resource-monitor", daemon=True)
+                self._thread.start()
+
+    def remove(self, usage):
+        with self._lock:
+            self._active.discard(usage)
+
+    def check(self, usage):
+        usage.sample()
+        if usage.killed or usage.shared or usage.kill is None:
+            return
+
+        cpu_budget, rss_budget = budget_for(usage.vendor)
+        if usage.cpu_s > cpu_budget:
+            usage.killed = f"cpu {usage.cpu_s:.1f}s > {cpu_budget}s"
+            resource = "cpu"
+        elif usage.peak_rss_mb > rss_budget:
+            usage.killed = f"rss {usage.peak_rss_mb:.0f}MB > {rss_budget}MB"
+            resource = "rss"
+        else:
+            return
+
+        print(f"💀 Killing {usage.vendor} scrape: {usage.killed}")
+        SCRAPE_BUDGET_KILLS.inc(vendor=usage.vendor, resource=resource)
+        usage.kill()
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            with self._lock:
+                active = list(self._active)
+            for usage in active:
+                try:
+                    self.check(usage)
+                except Exception as e:
+                    print(f"⚠️ Resource sampling failed: {e}")
+
+
+MONITOR = ResourceMonitor()
+_local = threading.local()
+
+
+def current_usage():
+    return getattr(_local, "usage", None)
+
+
+@contextmanager
+def track_scrape(vendor, usage=None):
+    """
+    Account for everything the wrapped scrape does in this thread. Raises
+    ResourceBudgetExceeded if the monitor had to kill its browser, or
+    ScrapeCancelled if it was cancelled through a `usage` handed in by the
+    caller. Either way, and when the scrape itself raises, the exception
+    carries the usage as `.usage`.
+    """
+    if usage is None:
+        usage = ScrapeUsage(vendor)
+    usage.started = time.time()
+    _local.usage = usage
+    MONITOR.add(usage)
+    failure = None
+    try:
+        yield usage
+    except Exception as e:
+        # Usually the fallout of a kill; judged below once usage is final
+        failure = e
+    finally:
+        MONITOR.remove(usage)
+        _local.usage = None
+        try:
+            usage.sample()
+        except Exception:
+            pass
+        usage.wall_s = time.time() - usage.started
+
+        SCRAPE_SECONDS.observe(usage.wall_s, vendor=vendor)
+        if usage.roots:
+            SCRAPE_CPU_SECONDS.observe(usage.cpu_s, vendor=vendor)
+            SCRAPE_PEAK_RSS_MB.observe(usage.peak_rss_mb, vendor=vendor)
+
+    if usage.cancelled:
+        error = ScrapeCancelled(f"{vendor} scrape cancelled: {usage.killed}")
+        error.usage = usage
+        raise error from failure
+    if usage.killed:
+        error = ResourceBudgetExceeded(f"{vendor} scrape killed: {usage.killed}")
+        error.usage = usage
+        raise error from failure
+    if failure is not None:
+        failure.usage = usage
+        raise failure
@@ -0,0 +1,215 @@
+# retry.py
+import os
+import json
+import time
+import random
+import asyncio
+import contextvars
+from contextlib import contextmanager
+
+from resources import current_usage
+
+
+# ============================================================
+# POLICIES
+# ============================================================
+
+class RetryPolicy:
+    """Attempts for one step, with capped exponential backoff and full jitter."""
+
+    def __init__(self, attempts=2, base_delay=1.0, max_delay=8.0, multiplier=2.0):
+        self.attempts = attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.multiplier = multiplier
+
+    def delay(self, attempt):
+        """Sleep before attempt `attempt + 1`: uniform(0, capped exponential)."""
+        ceiling = min(self.max_delay, self.base_delay * self.multiplier ** (attempt - 1))
+        return random.uniform(0, ceiling)
+
+
+DEFAULT_POLICY = RetryPolicy()
+
+# (vendor or "*", step) -> policy; the vendor-specific entry wins
+POLICIES = {
+    ("*", "page_load"): RetryPolicy(attempts=3, base_delay=1.0, max_delay=4.0),
+    ("*", "click"): RetryPolicy(attempts=3, base_delay=0.5, max_delay=2.0),
+    ("*", "set_location"): RetryPolicy(attempts=1),
+    ("*", "open_search"): RetryPolicy(attempts=1),
+    ("*", "search"): RetryPolicy(attempts=1),
+    ("*", "wait_for_products"): RetryPolicy(attempts=3, base_delay=1.0, max_delay=4.0),
+
+    # Instamart's location flow is flaky enough to be worth extra tries
+    ("Instamart", "set_location"): RetryPolicy(attempts=3, base_delay=2.0, max_delay=6.0),
+    ("Instamart", "open_search"): RetryPolicy(attempts=3, base_delay=1.5, max_delay=6.0),
+
+    # Flipkart runs on a tighter latency budget: fail fast rather than retry
+    ("Flipkart", "page_load"): RetryPolicy(attempts=2, base_delay=0.5, max_delay=2.0),
+    ("Flipkart", "wait_for_products"): RetryPolicy(attempts=2, base_delay=0.5, max_delay=2.0),
+}
+
+# Overrides, e.g. RETRY_POLICIES='{"Zepto/wait_for_products": {"attempts": 4}}'
+for _key, _cfg in json.loads(os.getenv("RETRY_POLICIES", "{}")).items():
+    _vendor, _step = _key.split("/", 1)
+    POLICIES[(_vendor, _step)] = RetryPolicy(**_cfg)
+
+
+def policy_for(vendor, step):
+    return POLICIES.get((vendor, step)) or POLICIES.get(("*", step)) or DEFAULT_POLICY
+
+
+# ============================================================
+# PER-SCRAPE BUDGET
+# ============================================================
+
+# Wall time for opening a vendor and setting the location, plus per query
+SCRAPE_TIME_BUDGET = float(os.getenv("SCRAPE_TIME_BUDGET_SECONDS", "90"))
+QUERY_TIME_BUDGET = float(os.getenv("QUERY_TIME_BUDGET_SECONDS", "45"))
+
+# Attempts across every nesting level (a click retry inside a location retry
+# counts against the same cap)
+MAX_TOTAL_ATTEMPTS = int(os.getenv("MAX_TOTAL_ATTEMPTS", "25"))
+ATTEMPTS_PER_QUERY = int(os.getenv("ATTEMPTS_PER_QUERY", "10"))
+
+
+class RetryBudget:
+    def __init__(self, seconds, attempts):
+        self.deadline = time.time() + seconds
+        self.attempts_left = attempts
+
+    def remaining(self):
+        return max(0.0, self.deadline - time.time())
+
+    def take(self):
+        if self.attempts_left <= 0 or self.remaining() <= 0:
+            return False
+        self.attempts_left -= 1
+        return True
+
+
+# A context variable rather than a thread-local, so coroutine scrapes
+# sharing one thread (cdp_scrapers) each see their own budget
+_budget = contextvars.ContextVar("retry_budget", default=None)
+
+
+def current_budget():
+    return _budget.get()
+
+
+def remaining_time(default):
+    """Cap a wait so it never outlives the scrape's budget."""
+    budget = current_budget()
+    if budget is None:
+        return default
+    return max(0.1, min(default, budget.remaining()))
+
+
+@contextmanager
+def retry_budget(queries=1, deadline=None):
+    """
+    Budget for one scrape of `queries` searches. Nested inside another
+    budget (or given an absolute deadline) it never extends past it.
+    """
+    outer = current_budget()
+    budget = RetryBudget(
+        SCRAPE_TIME_BUDGET + QUERY_TIME_BUDGET * queries,
+        MAX_TOTAL_ATTEMPTS + ATTEMPTS_PER_QUERY * (queries - 1)
+    )
+    if outer is not None:
+        budget.deadline = min(budget.deadline, outer.deadline)
+    if deadline is not None:
+        budget.deadline = min(budget.deadline, deadline)
+
+    token = _budget.set(budget)
+    try:
+        yield budget
+    finally:
+        _budget.reset(token)
+
+
+# ============================================================
+# RETRY LOOP
+# ============================================================
+
+def retry(vendor, step, attempt, on_retry=None):
+    """
+    Call `attempt()` until it returns something truthy, following the
+    vendor/step policy. Exceptions count as failed attempts. Stops early
+    once the scrape's attempt cap or time budget is used up, so the worst
+    case is bounded no matter how deeply retries nest, and at once when
+    the scrape's browser has been killed. Returns the first truthy result,
+    or None.
+    """
+    policy = policy_for(vendor, step)
+    budget = current_budget()
+    usage = current_usage()
+
+    for n in range(1, policy.attempts + 1):
+        # The browser was killed (budget or cancellation), retrying is pointless
+        if usage is not None and usage.killed:
+            return None
+        if budget is not None and not budget.take():
+            print(f"⏱️ {vendor} {step}: retry budget exhausted")
+            return None
+
+        try:
+            result = attempt()
+            if result:
+                return result
+            print(f"⚠️ {vendor} {step} attempt {n}/{policy.attempts} failed")
+        except Exception as e:
+            print(f"⚠️ {vendor} {step} attempt {n}/{policy.attempts} failed: {e}")
+
+        if n == policy.attempts:
+            break
+
+        delay = policy.delay(n)
+        if budget is not None and budget.remaining() <= delay:
+            print(f"⏱️ {vendor} {step}: no time left to retry")
+            return None
+
+        if on_retry is not None:
+            try:
+                on_retry()
+            except Exception:
+                pass
+        time.sleep(delay)
+
+    return None
+
+
+async def retry_async(vendor, step, attempt, on_retry=None):
+    """retry() for coroutine scrapers: `attempt` and `on_retry` are awaited."""
+    policy = policy_for(vendor, step)
+    budget = current_budget()
+
+    for n in range(1, policy.attempts + 1):
+        if budget is not None and not budget.take():
+            print(f"⏱️ {vendor} {step}: retry budget exhausted")
+            return None
+
+        try:
+            result = await attempt()
+            if result:
+                return result
+            print(f"⚠️ {vendor} {step} attempt {n}/{policy.attempts} failed")
+        except Exception as e:
+            print(f"⚠️ {vendor} {step} attempt {n}/{policy.attempts} failed: {e}")
+
+        if n == policy.attempts:
+            break
+
+        delay = policy.delay(n)
+        if budget is not None and budget.remaining() <= delay:
+            print(f"⏱️ {vendor} {step}: no time left to retry")
+            return None
+
+        if on_retry is not None:
+            try:
+                await on_retry()
+            except Exception:
+                pass
+        await asyncio.sleep(delay)
+
+    return None
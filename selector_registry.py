@@ -0,0 +1,348 @@
+# selector_registry.py
+import os
+import time
+import threading
+from collections import deque
+
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import TimeoutException, StaleElementReferenceException
+
+from retry import remaining_time
+
+
+# ============================================================
+# CONFIG
+# ============================================================
+
+WAIT_TIME = 25
+
+# How long a step whose selectors are all known-broken is given
+PROBE_TIMEOUT = 2
+
+# ...except that every this often it gets one full-length wait again, so
+# a slow page or a popup can't leave a step marked broken for good
+PROBE_COOLDOWN = float(os.getenv("SELECTOR_PROBE_COOLDOWN_SECONDS", "120"))
+
+# Consecutive misses before a selector counts as broken
+BROKEN_AFTER = 3
+
+# Window of recent outcomes used for the success rate
+HISTORY = 20
+
+
+# ============================================================
+# SELECTORS PER VENDOR AND STEP (first match wins, in order)
+# ============================================================
+
+CSS, XPATH = By.CSS_SELECTOR, By.XPATH
+
+SELECTORS = {
+    "Zepto": {
+        "location_button": [
+            (CSS, "button[aria-label='Select Location']"),
+            (XPATH, "//button[contains(., 'Select Location')]"),
+        ],
+        "location_input": [
+            (CSS, "input[placeholder='Search a new address']"),
+            (CSS, "input[placeholder*='address']"),
+        ],
+        "location_suggestion": [
+            (CSS, "div[data-testid='address-search-item']"),
+            (CSS, "div[data-testid*='address-search-item']"),
+        ],
+        "location_confirm": [
+            (CSS, "button[data-testid='location-confirm-btn']"),
+            (XPATH, "//button[contains(., 'Confirm')]"),
+        ],
+        "search_icon": [
+            (CSS, "a[data-testid='search-bar-icon']"),
+            (CSS, "a[href*='/search']"),
+        ],
+        "search_input": [
+            (CSS, "input[placeholder*='Search for over']"),
+            (CSS, "input[placeholder*='Search']"),
+        ],
+    },
+    "Blinkit": {
+        "location_input": [
+            (CSS, "input[name='select-locality']"),
+            (CSS, "input[placeholder*='delivery location']"),
+        ],
+        "location_suggestion": [
+            (CSS, "div.LocationSearchList__LocationListContainer-sc-93rfr7-0 div"),
+            # styled-components keep the readable prefix when the hash changes
+            (CSS, "div[class*='LocationSearchList__LocationListContainer'] div"),
+        ],
+        "search_button": [
+            (CSS, "a.SearchBar__Button-sc-16lps2d-4"),
+            (CSS, "a[class*='SearchBar__Button']"),
+        ],
+        "search_input": [
+            (CSS, "input.SearchBarContainer__Input-sc-hl8pft-3"),
+            (CSS, "input[class*='SearchBarContainer__Input']"),
+        ],
+        "product_grid": [
+            (XPATH, "//div[contains(@style,'grid-template-columns: repeat(12, 1fr)')]"),
+        ],
+    },
+    "Instamart": {
+        "address_container": [
+            (CSS, "div[data-testid='DEFAULT_ADDRESS_CONTAINER']"),
+        ],
+        "search_location": [
+            (CSS, "div[data-testid='search-location']"),
+        ],
+        "location_input": [
+            (CSS, "input[placeholder*='Search for area']"),
+            (CSS, "input[placeholder*='area']"),
+        ],
+        "location_suggestion": [
+            (CSS, "div._11n32"),
+        ],
+        "location_confirm": [
+            (XPATH, "//button[.//span[text()='Confirm Location']]"),
+            (XPATH, "//button[contains(., 'Confirm Location')]"),
+        ],
+        "home_search": [
+            (CSS, "div._1AaZg"),
+        ],
+        "search_page": [
+            (CSS, "div._3y3yB"),
+            (CSS, "input[data-testid='search-page-header-search-bar-input']"),
+        ],
+        "search_input": [
+            (CSS, "input[data-testid='search-page-header-search-bar-input']"),
+            (CSS, "input[placeholder*='Search for']"),
+        ],
+    },
+    "Flipkart": {
+        "location_modal": [
+            (CSS, "main.Ff3t7M"),
+            (XPATH, "//main[.//div[contains(text(),'Enter location manually')]]"),
+        ],
+        "location_manual": [
+            (XPATH, "//div[contains(text(),'Enter location manually')]"),
+        ],
+        "location_input": [
+            (CSS, "input#search"),
+            (CSS, "main input[type='text']"),
+        ],
+        "location_suggestion": [
+            (XPATH, "//ul/li[contains(@class,'_')]"),
+            (CSS, "main ul li"),
+        ],
+        "location_confirm": [
+            (XPATH, "//input[@type='submit' and @value='Confirm']"),
+            (XPATH, "//*[self::button or self::input][contains(@value,'Confirm') or contains(., 'Confirm')]"),
+        ],
+        "search_input": [
+            (CSS, "input.Pke_EE[placeholder*='Search in Flipkart Minutes']"),
+            (CSS, "input[placeholder*='Search in Flipkart Minutes']"),
+        ],
+    },
+    "BigBasket": {
+        "location_button": [
+            (XPATH, "//button[contains(., 'Select Location')]"),
+        ],
+        "location_input": [
+            (CSS, "input[placeholder='Search for area or street name']"),
+            (CSS, "input[placeholder*='area or street']"),
+        ],
+        "location_suggestion": [
+            (CSS, "li.AddressDropdown___StyledMenuItem-sc-i4k67t-7"),
+            (CSS, "li[class*='AddressDropdown___StyledMenuItem']"),
+        ],
+        "search_input": [
+            (CSS, "input[placeholder*='Search for Products']"),
+            (CSS, "input[placeholder*='Search for']"),
+        ],
+    },
+}
+
+
+# ============================================================
+# HEALTH STATE
+# ============================================================
+
+class SelectorHealth:
+    def __init__(self):
+        self.outcomes = deque(maxlen=HISTORY)
+        self.consecutive_misses = 0
+        self.last_success = None
+        self.last_failure = None
+
+    def record(self, ok):
+        self.outcomes.append(ok)
+        if ok:
+            self.consecutive_misses = 0
+            self.last_success = time.time()
+        else:
+            self.consecutive_misses += 1
+            self.last_failure = time.time()
+
+    @property
+    def state(self):
+        if not self.outcomes:
+            return "unknown"
+        if self.consecutive_misses >= BROKEN_AFTER:
+            return "broken"
+        if self.success_rate < 0.7:
+            return "degraded"
+        return "healthy"
+
+    @property
+    def success_rate(self):
+        if not self.outcomes:
+            return None
+        return sum(self.outcomes) / len(self.outcomes)
+
+
+_health = {}
+_full_waits = {}   # (vendor, step) -> last full-length wait while broken
+_lock = threading.Lock()
+
+
+def health(vendor, step, selector):
+    key = (vendor, step, selector)
+    with _lock:
+        if key not in _health:
+            _health[key] = SelectorHealth()
+        return _health[key]
+
+
+def step_timeout(vendor, step, timeout):
+    """
+    How long this lookup may wait: never past the scrape's retry budget,
+    and only PROBE_TIMEOUT while every selector in the chain is broken,
+    apart from one full-length wait per PROBE_COOLDOWN (half-open).
+    """
+    timeout = remaining_time(timeout)
+    if not all(health(vendor, step, sel).state == "broken" for _, sel in SELECTORS[vendor][step]):
+        return timeout
+    now = time.time()
+    with _lock:
+        if now - _full_waits.get((vendor, step), 0) >= PROBE_COOLDOWN:
+            _full_waits[(vendor, step)] = now
+            return timeout
+    return min(timeout, PROBE_TIMEOUT)
+
+
+def record_misses(vendor, step, page_ready):
+    """
+    Nothing in the chain matched. Only held against the selectors when the
+    page itself had finished loading; a page that never did says nothing
+    about them.
+    """
+    if not page_ready:
+        return
+    for _, sel in SELECTORS[vendor][step]:
+        health(vendor, step, sel).record(False)
+
+
+# ============================================================
+# LOOKUP
+# ============================================================
+
+PRESENT = EC.presence_of_element_located
+ALL_PRESENT = EC.presence_of_all_elements_located
+CLICKABLE = EC.element_to_be_clickable
+VISIBLE = EC.visibility_of_element_located
+
+
+def page_ready(driver):
+    try:
+        return driver.execute_script("return document.readyState") == "complete"
+    except Exception:
+        return False
+
+
+def find(driver, vendor, step, condition=PRESENT, timeout=WAIT_TIME, record=True):
+    """
+    Wait for the first selector in the step's chain that satisfies
+    `condition`. All candidates are polled together, so a dead primary
+    selector costs nothing extra when a fallback matches. If every selector
+    in the chain is known-broken, the wait is cut to a short probe (see
+    step_timeout), and it never outlives the scrape's retry budget.
+    Raises TimeoutException when nothing matches. Pass record=False for
+    elements that are often legitimately absent, so their absence isn't
+    held against the selectors.
+    """
+    chain = SELECTORS[vendor][step]
+    timeout = step_timeout(vendor, step, timeout)
+
+    def any_match(d):
+        for by, sel in chain:
+            try:
+                found = condition((by, sel))(d)
+            except StaleElementReferenceException:
+                found = None
+            if found:
+                return sel, found
+        return False
+
+    try:
+        matched, element = WebDriverWait(driver, timeout).until(any_match)
+    except TimeoutException:
+        if record:
+            record_misses(vendor, step, page_ready(driver))
+        raise TimeoutException(f"{vendor}/{step}: no selector matched within {timeout}s")
+
+    if not record:
+        return element
+
+    # Selectors ahead of the winner missed; everything after wasn't needed
+    for _, sel in chain:
+        if sel == matched:
+            health(vendor, step, sel).record(True)
+            break
+        health(vendor, step, sel).record(False)
+
+    return element
+
+
+# ============================================================
+# REPORT
+# ============================================================
+
+def health_report():
+    """Every registered selector with its live state, worst first per step."""
+    order = {"broken": 0, "degraded": 1, "unknown": 2, "healthy": 3}
+    report = {}
+    for vendor, steps in SELECTORS.items():
+        report[vendor] = {}
+        for step, chain in steps.items():
+            rows = []
+            for priority, (_, sel) in enumerate(chain):
+                h = health(vendor, step, sel)
+                rows.append({
+                    "selector": sel,
+                    "priority": priority,
+                    "state": h.state,
+                    "success_rate": None if h.success_rate is None else round(h.success_rate, 2),
+                    "last_success": h.last_success,
+                    "last_failure": h.last_failure,
+                })
+            rows.sort(key=lambda r: order[r["state"]])
+            report[vendor][step] = rows
+    return report
+
+
+def broken_steps(vendor):
+    """The vendor's steps where every selector is currently broken."""
+    return [
+        step for step, chain in SELECTORS.get(vendor, {}).items()
+        if all(health(vendor, step, sel).state == "broken" for _, sel in chain)
+    ]
+
+
+def degrading():
+    """Flat list of selectors that are not healthy, for alerts and logs."""
+    return [
+        {"vendor": v, "step": s, **row}
+        for v, steps in health_report().items()
+        for s, rows in steps.items()
+        for row in rows
+        if row["state"] in ("broken", "degraded")
+    ]
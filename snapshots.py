@@ -0,0 +1,302 @@
+# snapshots.py
+"""
+Archive of rendered search pages, for catching markup changes and testing
+extraction without a browser.
+
+With SNAPSHOT_ENABLED=1 a sample of scrapes (SNAPSHOT_SAMPLE, overridable
+per vendor) saves the page's HTML right after wait_for_products, gzipped,
+under SNAPSHOT_DIR/<vendor>/. The archive is capped at SNAPSHOT_MAX_MB,
+oldest first.
+
+Offline, the vendor's current CARD/FIELDS run over the archive with lxml
+instead of Chrome:
+
+    python snapshots.py [--vendor Zepto] [--dir DIR] [--show 3]
+
+which reports products per page, how often each field comes back empty
+and pages/s, i.e. a regression check and a benchmark for extraction
+changes. lxml and cssselect are only needed for that.
+"""
+import os
+import sys
+import gzip
+import json
+import time
+import random
+import asyncio
+import hashlib
+import argparse
+import tempfile
+import threading
+from collections import deque
+from urllib.parse import urljoin
+
+import metrics
+
+try:
+    from lxml import html as lxml_html, etree
+except ImportError:
+    lxml_html = etree = None
+
+try:
+    from cssselect import HTMLTranslator
+except ImportError:
+    HTMLTranslator = None
+
+
+# ============================================================
+# CONFIG
+# ============================================================
+
+SNAPSHOT_ENABLED = os.getenv("SNAPSHOT_ENABLED", "0") == "1"
+SNAPSHOT_DIR = os.getenv("SNAPSHOT_DIR", os.path.join(tempfile.gettempdir(), "bestdeal-snapshots"))
+
+# Share of scrapes archived, e.g. SNAPSHOT_SAMPLE_BY_VENDOR='{"Flipkart": 0.5}'
+SNAPSHOT_SAMPLE = float(os.getenv("SNAPSHOT_SAMPLE", "0.05"))
+SNAPSHOT_SAMPLE_BY_VENDOR = json.loads(os.getenv("SNAPSHOT_SAMPLE_BY_VENDOR", "{}"))
+
+SNAPSHOT_MAX_MB = float(os.getenv("SNAPSHOT_MAX_MB", "500"))
+# Pages bigger than this (uncompressed) aren't kept
+SNAPSHOT_MAX_PAGE_MB = float(os.getenv("SNAPSHOT_MAX_PAGE_MB", "8"))
+
+SNAPSHOT_JS = "return [document.documentElement.outerHTML, location.href];"
+
+
+SNAPSHOTS = metrics.Counter(
+    "bestdeal_snapshots_total", "Rendered pages archived (saved, too_large, error)", ["vendor", "result"]
+)
+
+
+def should_capture(vendor):
+    if not SNAPSHOT_ENABLED:
+        return False
+    return random.random() < SNAPSHOT_SAMPLE_BY_VENDOR.get(vendor, SNAPSHOT_SAMPLE)
+
+
+# ============================================================
+# ARCHIVE
+# ============================================================
+
+class SnapshotArchive:
+    """Gzipped JSON files, one per page, deleted oldest first past `max_bytes`."""
+
+    def __init__(self, directory=SNAPSHOT_DIR, max_bytes=SNAPSHOT_MAX_MB * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._files = None     # deque of (path, size), oldest first
+        self.total = 0
+        self._lock = threading.Lock()
+
+    def _index(self):
+        if self._files is None:
+            entries = []
+            for path in self.paths():
+                st = os.stat(path)
+                entries.append((st.st_mtime, path, st.st_size))
+            self._files = deque((path, size) for _, path, size in sorted(entries))
+            self.total = sum(size for _, size in self._files)
+        return self._files
+
+    def paths(self, vendor=None):
+        root = os.path.join(self.directory, vendor) if vendor else self.directory
+        for dirpath, _, names in os.walk(root):
+            for name in sorted(names):
+                if name.endswith(".json.gz"):
+                    yield os.path.join(dirpath, name)
+
+    def save(self, vendor, query, url, html):
+        if len(html.encode()) > SNAPSHOT_MAX_PAGE_MB * 1024 * 1024:
+            SNAPSHOTS.inc(vendor=vendor, result="too_large")
+            return None
+
+        with self._lock:
+            self._index()   # scanned before the new file exists, so it isn't counted twice
+
+        captured = time.time()
+        digest = hashlib.sha1(f"{url}|{captured}".encode()).hexdigest()[:8]
+        name = time.strftime("%Y%m%d-%H%M%S", time.gmtime(captured)) + f"-{digest}.json.gz"
+        os.makedirs(os.path.join(self.directory, vendor), exist_ok=True)
+        path = os.path.join(self.directory, vendor, name)
+
+        record = {"vendor": vendor, "query": query, "url": url, "captured_at": captured, "html": html}
+        data = gzip.compress(json.dumps(record, ensure_ascii=False).encode(), compresslevel=6)
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+
+        with self._lock:
+            files = self._files
+            files.append((path, len(data)))
+            self.total += len(data)
+            while self.total > self.max_bytes and len(files) > 1:
+                old, size = files.popleft()
+                self.total -= size
+                try:
+                    os.remove(old)
+                except OSError:
+                    pass
+
+        SNAPSHOTS.inc(vendor=vendor, result="saved")
+        return path
+
+    def stats(self):
+        with self._lock:
+            files = self._index()
+            return {"pages": len(files), "mb": round(self.total / 1024 / 1024, 1),
+                    "max_mb": round(self.max_bytes / 1024 / 1024, 1)}
+
+
+ARCHIVE = SnapshotArchive()
+
+
+def load(path):
+    with gzip.open(path, "rb") as f:
+        return json.loads(f.read())
+
+
+# ============================================================
+# CAPTURE (called by the scrapers after wait_for_products)
+# ============================================================
+
+def capture(driver, vendor, query):
+    """Maybe archive the page the driver is on. Never fails the scrape."""
+    if not should_capture(vendor):
+        return None
+    try:
+        html, url = driver.execute_script(SNAPSHOT_JS)
+        return ARCHIVE.save(vendor, query, url, html)
+    except Exception as e:
+        SNAPSHOTS.inc(vendor=vendor, result="error")
+        print(f"⚠️ {vendor} snapshot failed: {e}")
+        return None
+
+
+async def capture_async(page, vendor, query):
+    """capture() for the CDP engine; the file is written off the event loop."""
+    if not should_capture(vendor):
+        return None
+    try:
+        html, url = await page.call(SNAPSHOT_JS)
+        return await asyncio.to_thread(ARCHIVE.save, vendor, query, url, html)
+    except Exception as e:
+        SNAPSHOTS.inc(vendor=vendor, result="error")
+        print(f"⚠️ {vendor} snapshot failed: {e}")
+        return None
+
+
+# ============================================================
+# OFFLINE EXTRACTION
+# ============================================================
+
+def compile_selector(by, sel, prefix):
+    if by == "css":
+        if HTMLTranslator is None:
+            raise RuntimeError("CSS selectors need the cssselect package")
+        return etree.XPath(HTMLTranslator().css_to_xpath(sel, prefix=prefix))
+    return etree.XPath(sel)
+
+
+class Extractor:
+    """
+    A vendor's CARD/FIELDS compiled to lxml XPath once, then applied to any
+    number of pages. Same rules as extract.collect_products: text is the
+    element's text, attributes resolve against the page URL, cards without
+    a name are skipped and repeated cards dropped.
+    """
+
+    def __init__(self, card, fields):
+        if lxml_html is None:
+            raise RuntimeError("Offline extraction needs lxml")
+        self.card = compile_selector(*card, prefix="descendant-or-self::")
+        self.names = list(fields)
+        self.fields = [
+            (name, compile_selector(spec[0], spec[1], prefix="descendant::"), spec[2])
+            for name, spec in fields.items() if spec
+        ]
+
+    def extract(self, html, url=""):
+        root = lxml_html.fromstring(html)
+        products, seen = [], set()
+        for card in self.card(root):
+            row = {}
+            for name, find, attr in self.fields:
+                found = find(card)
+                el = found[0] if found else None
+                if el is None:
+                    value = ""
+                elif attr:
+                    value = urljoin(url, el.get(attr, "")) if el.get(attr) else ""
+                else:
+                    value = " ".join(el.text_content().split())
+                row[name] = value.strip()
+            # Fields the vendor doesn't show stay "", in the vendor's order
+            row = {name: row.get(name, "") for name in self.names}
+            key = tuple(row.values())
+            if not row.get("name") or key in seen:
+                continue
+            seen.add(key)
+            products.append(row)
+        return products
+
+
+def replay(vendor, directory=SNAPSHOT_DIR, show=0):
+    """Run the vendor's current extraction over its archive and summarise."""
+    from vendors import REGISTRY
+
+    found = REGISTRY.get(vendor)
+    if found is None:
+        raise SystemExit(f"Unknown vendor {vendor}")
+    module = found.load()
+    extractor = Extractor(module.CARD, module.FIELDS)
+    archive = SnapshotArchive(directory)
+
+    pages = rows = empty_pages = 0
+    empty = {name: 0 for name, spec in module.FIELDS.items() if spec}
+    parse_s = 0.0
+    for path in archive.paths(vendor):
+        snap = load(path)
+        started = time.perf_counter()
+        products = extractor.extract(snap["html"], snap["url"])
+        parse_s += time.perf_counter() - started
+
+        pages += 1
+        rows += len(products)
+        empty_pages += not products
+        for p in products:
+            for name in empty:
+                empty[name] += not p[name]
+        if show and pages <= show:
+            print(f"  {os.path.basename(path)} '{snap['query']}': {len(products)} products")
+            for p in products[:3]:
+                print(f"    {p}")
+
+    return {
+        "vendor": vendor,
+        "pages": pages,
+        "empty_pages": empty_pages,
+        "products_per_page": round(rows / pages, 1) if pages else None,
+        "empty_field_rate": {k: round(v / rows, 2) for k, v in empty.items()} if rows else {},
+        "pages_per_s": round(pages / parse_s, 1) if parse_s else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-run extraction over archived snapshots")
+    parser.add_argument("--dir", default=SNAPSHOT_DIR)
+    parser.add_argument("--vendor", action="append", help="repeatable; default: every vendor in the archive")
+    parser.add_argument("--show", type=int, default=0, help="print the first N pages' products")
+    args = parser.parse_args()
+
+    vendors = args.vendor
+    if not vendors and os.path.isdir(args.dir):
+        vendors = sorted(d for d in os.listdir(args.dir) if os.path.isdir(os.path.join(args.dir, d)))
+    if not vendors:
+        sys.exit(f"No snapshots under {args.dir}")
+
+    for vendor in vendors:
+        print(json.dumps(replay(vendor, args.dir, args.show), ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
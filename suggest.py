@@ -0,0 +1,154 @@
+# suggest.py
+import os
+import math
+import time
+import heapq
+import threading
+
+from sortedcontainers import SortedList
+
+from cache import normalize
+from warm_crawl import POPULARITY_HALF_LIFE
+
+
+# Prefixes up to this long are answered from per-prefix buckets and
+# ranked over every name they match; longer ones scan the sorted suffixes
+BUCKET_PREFIX = 3
+
+# Stop scanning a (longer) prefix range after this many index entries
+MAX_SCAN = 5000
+
+# Names kept; past this the least popular EVICT_FRACTION are dropped
+SUGGEST_MAX_NAMES = int(os.getenv("SUGGEST_MAX_NAMES", "50000"))
+EVICT_FRACTION = 0.1
+
+# Names that start with the prefix beat names that merely contain a word with it
+LEADING_MATCH_BONUS = 2.0
+
+# Longer queries are cut to this before matching (and the typo back-off)
+MAX_QUERY = 64
+
+
+class SuggestIndex:
+    """
+    In-memory prefix index over product names seen in scrape results.
+
+    Every word position of a normalized name is stored as a suffix in a
+    sorted list, so a prefix lookup is a binary search plus a short range
+    scan: "toned" finds "Amul Taaza Toned Milk". Short prefixes, whose
+    ranges are long, come from buckets instead so every match is ranked.
+    Inserts are incremental; popularity decays like the warm crawler's
+    (POPULARITY_HALF_LIFE) and the least popular names are evicted past
+    `max_names`, so new names can overtake old favourites.
+    """
+
+    def __init__(self, max_names=SUGGEST_MAX_NAMES, half_life=POPULARITY_HALF_LIFE):
+        self.max_names = max_names
+        self.decay = math.log(2) / half_life
+        self._entries = SortedList()   # (suffix, name_id, word_position)
+        self._buckets = {}             # short prefix -> {name_id: position bonus}
+        self._names = {}               # name_id -> display name
+        self._keys = {}                # name_id -> normalized name
+        self._ids = {}                 # normalized name -> name_id
+        self._scores = {}              # name_id -> (popularity, last_update)
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._names)
+
+    def _current(self, name_id, now):
+        score, ts = self._scores[name_id]
+        return score * math.exp(-self.decay * (now - ts))
+
+    def _word_starts(self, key):
+        pos = 0
+        for position, word in enumerate(key.split(" ")):
+            yield pos, position
+            pos += len(word) + 1
+
+    def add(self, name, weight=1.0):
+        key = normalize(name)
+        if not key:
+            return
+
+        now = time.time()
+        with self._lock:
+            name_id = self._ids.get(key)
+            if name_id is not None:
+                self._scores[name_id] = (self._current(name_id, now) + weight, now)
+                return
+
+            name_id = self._next_id
+            self._next_id += 1
+            self._ids[key] = name_id
+            self._keys[name_id] = key
+            self._names[name_id] = name.strip()
+            self._scores[name_id] = (weight, now)
+
+            for pos, position in self._word_starts(key):
+                self._entries.add((key[pos:], name_id, position))
+                bonus = LEADING_MATCH_BONUS if position == 0 else 1.0
+                for n in range(2, BUCKET_PREFIX + 1):
+                    if pos + n <= len(key):
+                        bucket = self._buckets.setdefault(key[pos:pos + n], {})
+                        bucket[name_id] = max(bucket.get(name_id, 0), bonus)
+
+            if len(self._names) > self.max_names:
+                self._evict(max(1, int(self.max_names * EVICT_FRACTION)), now)
+
+    def _evict(self, n, now):
+        for name_id in heapq.nsmallest(n, self._scores, key=lambda i: self._current(i, now)):
+            key = self._keys.pop(name_id)
+            for pos, position in self._word_starts(key):
+                self._entries.discard((key[pos:], name_id, position))
+                for size in range(2, BUCKET_PREFIX + 1):
+                    bucket = self._buckets.get(key[pos:pos + size])
+                    if bucket is not None:
+                        bucket.pop(name_id, None)
+                        if not bucket:
+                            del self._buckets[key[pos:pos + size]]
+            del self._ids[key], self._names[name_id], self._scores[name_id]
+
+    def add_products(self, products):
+        for p in products or []:
+            self.add(p.get("name", ""))
+
+    def _lookup(self, prefix, limit, now):
+        if len(prefix) <= BUCKET_PREFIX:
+            bucket = self._buckets.get(prefix, {})
+            top = heapq.nlargest(limit, ((i, self._current(i, now) * bonus) for i, bonus in bucket.items()),
+                                 key=lambda kv: kv[1])
+            return [{"name": self._names[i], "score": round(s, 2)} for i, s in top]
+
+        best = {}
+        upper = prefix + "\uffff"
+
+        for scanned, (_, name_id, position) in enumerate(
+                self._entries.irange((prefix,), (upper,))):
+            if scanned >= MAX_SCAN:
+                break
+            score = self._current(name_id, now) * (LEADING_MATCH_BONUS if position == 0 else 1.0)
+            if score > best.get(name_id, 0):
+                best[name_id] = score
+
+        top = heapq.nlargest(limit, best.items(), key=lambda kv: kv[1])
+        return [{"name": self._names[i], "score": round(s, 2)} for i, s in top]
+
+    def suggest(self, query, limit=10):
+        """
+        Top `limit` names matching `query` by popularity. When nothing
+        matches, trailing characters are dropped one at a time so small
+        typos at the end ("milkk") still return something useful. Only
+        the first MAX_QUERY characters count, which bounds the back-off.
+        """
+        prefix = normalize(query)[:MAX_QUERY].rstrip()
+        now = time.time()
+
+        with self._lock:
+            while len(prefix) >= 2:
+                hits = self._lookup(prefix, limit, now)
+                if hits:
+                    return hits
+                prefix = prefix[:-1]
+        return []
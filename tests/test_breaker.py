@@ -0,0 +1,148 @@
+# tests/test_breaker.py
+import pytest
+
+import breaker
+from breaker import CircuitBreaker, CircuitOpen, VendorUnavailable, CLOSED, HALF_OPEN, OPEN, outcome_of
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1_000_000.0]
+    monkeypatch.setattr(breaker.time, "time", lambda: now[0])
+    return now
+
+
+def call(b, outcome):
+    b.record(b.allow(), outcome)
+
+
+def trip(b):
+    for _ in range(breaker.BREAKER_MIN_CALLS):
+        call(b, "failure")
+    assert b.state == OPEN
+
+
+def test_stays_closed_below_min_calls(clock):
+    b = CircuitBreaker("Zepto")
+    for _ in range(breaker.BREAKER_MIN_CALLS - 1):
+        call(b, "failure")
+    assert b.state == CLOSED
+
+
+def test_stays_closed_under_failure_rate(clock):
+    b = CircuitBreaker("Zepto")
+    for outcome in ["ok", "ok", "ok", "failure", "ok", "failure"]:
+        call(b, outcome)
+    assert b.state == CLOSED
+
+
+def test_opens_on_failure_rate_and_rejects(clock):
+    b = CircuitBreaker("Zepto")
+    trip(b)
+    with pytest.raises(CircuitOpen) as e:
+        b.allow()
+    assert e.value.retry_in == pytest.approx(breaker.BREAKER_OPEN_SECONDS)
+
+
+def test_old_outcomes_leave_the_window(clock):
+    b = CircuitBreaker("Zepto")
+    for _ in range(breaker.BREAKER_MIN_CALLS - 1):
+        call(b, "failure")
+    clock[0] += breaker.BREAKER_WINDOW + 1
+    call(b, "failure")
+    assert b.state == CLOSED
+
+
+def test_half_open_probes_close_the_breaker(clock):
+    b = CircuitBreaker("Zepto")
+    trip(b)
+    clock[0] += breaker.BREAKER_OPEN_SECONDS
+
+    for _ in range(breaker.BREAKER_PROBE_SUCCESSES):
+        ticket = b.allow()
+        assert ticket == HALF_OPEN
+        # Only BREAKER_PROBES calls at a time while half-open
+        with pytest.raises(CircuitOpen):
+            b.allow()
+        b.record(ticket, "ok")
+
+    assert b.state == CLOSED
+    assert b.snapshot()["window_calls"] == 0
+    assert b.open_for == breaker.BREAKER_OPEN_SECONDS
+
+
+def test_failed_probe_reopens_for_longer(clock):
+    b = CircuitBreaker("Zepto")
+    trip(b)
+    clock[0] += breaker.BREAKER_OPEN_SECONDS
+    b.record(b.allow(), "timeout")
+    assert b.state == OPEN
+    assert b.open_for == 2 * breaker.BREAKER_OPEN_SECONDS
+
+    clock[0] += breaker.BREAKER_OPEN_SECONDS
+    with pytest.raises(CircuitOpen):
+        b.allow()
+
+
+def test_open_time_is_capped(clock):
+    b = CircuitBreaker("Zepto")
+    trip(b)
+    for _ in range(20):
+        clock[0] += b.open_for
+        b.record(b.allow(), "failure")
+    assert b.open_for == breaker.BREAKER_MAX_OPEN_SECONDS
+
+
+def test_cancelled_probe_hands_back_its_slot(clock):
+    b = CircuitBreaker("Zepto")
+    trip(b)
+    clock[0] += breaker.BREAKER_OPEN_SECONDS
+    b.record(b.allow(), None)
+    assert b.state == HALF_OPEN
+    assert b.allow() == HALF_OPEN
+
+
+def test_outcome_of():
+    assert outcome_of([{"name": "Milk"}], 1) == "ok"
+    assert outcome_of({"milk": [{"name": "Milk"}], "bread": []}, 1) == "ok"
+    assert outcome_of(None, 1, RuntimeError("boom")) == "failure"
+    assert outcome_of([{"name": "Milk"}], breaker.BREAKER_SLOW_CALL + 1) == "timeout"
+
+
+def test_queries_without_matches_never_open_the_breaker(clock):
+    b = CircuitBreaker("Zepto")
+    for _ in range(breaker.BREAKER_MIN_CALLS * 2):
+        call(b, outcome_of([], 1))
+    assert b.state == CLOSED
+
+
+def test_scrape_that_cannot_reach_the_site_is_a_failure():
+    assert outcome_of(None, 1, VendorUnavailable("Zepto", "home page did not load")) == "failure"
+
+
+def test_site_that_does_not_load_trips_the_breaker(clock, monkeypatch):
+    pytest.importorskip("selenium")
+    import zepto
+    from selenium.common.exceptions import WebDriverException
+
+    class DeadDriver:
+        title = ""
+
+        def get(self, url):
+            raise WebDriverException("net::ERR_CONNECTION_REFUSED")
+
+        def execute_cdp_cmd(self, cmd, params):
+            return {}
+
+        def find_elements(self, *args):
+            return []
+
+    monkeypatch.setattr(zepto.time, "sleep", lambda s: None)
+    b = CircuitBreaker("Zepto")
+    for _ in range(breaker.BREAKER_MIN_CALLS):
+        ticket = b.allow()
+        with pytest.raises(VendorUnavailable) as e:
+            zepto.get_basket("Bengaluru", ["milk"], driver=DeadDriver())
+        b.record(ticket, outcome_of(None, 1, e.value, vendor="Zepto"))
+
+    assert b.state == OPEN
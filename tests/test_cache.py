@@ -0,0 +1,91 @@
+# tests/test_cache.py
+import pytest
+
+import cache
+from cache import ResultCache, normalize
+
+
+PRODUCTS = [{"name": f"Milk {i}"} for i in range(5)]
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1_000_000.0]
+    monkeypatch.setattr(cache.time, "time", lambda: now[0])
+    return now
+
+
+def test_keys_are_normalized():
+    c = ResultCache()
+    c.set("Zepto", " Bengaluru ", "Amul  Milk", PRODUCTS)
+    assert c.get("Zepto", "bengaluru", "amul milk") == PRODUCTS
+    assert normalize("  Amul   MILK ") == "amul milk"
+
+
+def test_complete_entry_answers_any_limit():
+    c = ResultCache()
+    c.set("Zepto", "blr", "milk", PRODUCTS)
+    assert c.get("Zepto", "blr", "milk") == PRODUCTS
+    assert c.get("Zepto", "blr", "milk", limit=2) == PRODUCTS[:2]
+    assert c.get("Zepto", "blr", "milk", limit=50) == PRODUCTS
+
+
+def test_truncated_entry_only_answers_smaller_limits():
+    c = ResultCache()
+    # Scraped with max_results=5 and got 5: there may be more
+    c.set("Zepto", "blr", "milk", PRODUCTS, limit=5)
+    assert c.get("Zepto", "blr", "milk", limit=3) == PRODUCTS[:3]
+    assert c.get("Zepto", "blr", "milk", limit=5) == PRODUCTS
+    assert c.get("Zepto", "blr", "milk", limit=6) is None
+    assert c.get("Zepto", "blr", "milk") is None
+
+
+def test_short_limited_scrape_is_complete():
+    c = ResultCache()
+    # Asked for up to 10, the vendor only had 5: that's everything
+    c.set("Zepto", "blr", "milk", PRODUCTS, limit=10)
+    assert c.get("Zepto", "blr", "milk") == PRODUCTS
+    assert c.get("Zepto", "blr", "milk", limit=50) == PRODUCTS
+
+
+def test_truncated_scrape_does_not_replace_fresh_complete_one():
+    c = ResultCache()
+    c.set("Zepto", "blr", "milk", PRODUCTS)
+    c.set("Zepto", "blr", "milk", PRODUCTS[:2], limit=2)
+    assert c.get("Zepto", "blr", "milk") == PRODUCTS
+
+
+def test_empty_results_are_not_cached():
+    c = ResultCache()
+    c.set("Zepto", "blr", "milk", [])
+    assert c.get("Zepto", "blr", "milk") is None
+    assert c.stats()["entries"] == 0
+
+
+def test_entries_expire_after_ttl(clock):
+    c = ResultCache(ttl=60)
+    c.set("Zepto", "blr", "milk", PRODUCTS)
+    clock[0] += 59
+    assert c.get("Zepto", "blr", "milk") == PRODUCTS
+    assert c.expires_in("Zepto", "blr", "milk") == pytest.approx(1)
+    clock[0] += 2
+    assert c.get("Zepto", "blr", "milk") is None
+
+
+def test_expired_complete_entry_can_be_replaced_by_truncated_one(clock):
+    c = ResultCache(ttl=60)
+    c.set("Zepto", "blr", "milk", PRODUCTS)
+    clock[0] += 61
+    c.set("Zepto", "blr", "milk", PRODUCTS[:2], limit=2)
+    assert c.get("Zepto", "blr", "milk", limit=2) == PRODUCTS[:2]
+
+
+def test_least_recently_used_entry_is_evicted():
+    c = ResultCache(max_entries=2)
+    c.set("Zepto", "blr", "milk", PRODUCTS)
+    c.set("Zepto", "blr", "bread", PRODUCTS)
+    c.get("Zepto", "blr", "milk")
+    c.set("Zepto", "blr", "eggs", PRODUCTS)
+    assert c.get("Zepto", "blr", "bread") is None
+    assert c.get("Zepto", "blr", "milk") == PRODUCTS
+    assert c.get("Zepto", "blr", "eggs") == PRODUCTS
@@ -0,0 +1,107 @@
+# tests/test_delta.py
+import pytest
+
+pytest.importorskip("fastapi")
+
+from delta import delta, available, if_none_match, product_key, snapshot, content_version, VersionStore
+
+
+class FakeRequest:
+    def __init__(self, headers=None):
+        self.headers = {k.lower(): v for k, v in (headers or {}).items()}
+
+
+def payload(results, errors=None):
+    return {"query": "milk", "location_used": "Bengaluru", "results": results, "errors": errors or {}}
+
+
+MILK = {"name": "Amul Taaza", "weight": "500 ml", "price": "₹27", "discount": ""}
+CURD = {"name": "Amul Dahi", "weight": "400 g", "price": "₹35", "discount": ""}
+
+
+def test_product_key_falls_back_to_pack():
+    assert product_key({"name": "Atta", "pack": "5 kg"}) == "Atta|5 kg"
+    assert product_key({"name": "Atta"}) == "Atta|"
+
+
+def test_unchanged_products_are_left_out():
+    base = snapshot({"Zepto": [MILK, CURD]})
+    out = delta(base, payload({"Zepto": [MILK, CURD]}))
+    assert out["results"] == {}
+    assert out["delta"]["removed"] == {}
+
+
+def test_price_change_and_new_product_are_included():
+    base = snapshot({"Zepto": [MILK]})
+    cheaper = {**MILK, "price": "₹25"}
+    out = delta(base, payload({"Zepto": [cheaper, CURD]}))
+    assert out["results"] == {"Zepto": [cheaper, CURD]}
+
+
+def test_untracked_field_change_is_not_a_change():
+    base = snapshot({"Zepto": [MILK]})
+    out = delta(base, payload({"Zepto": [{**MILK, "image_url": "https://img/new.png"}]}))
+    assert out["results"] == {}
+
+
+def test_gone_products_are_listed_as_removed():
+    base = snapshot({"Zepto": [MILK, CURD], "Blinkit": [MILK]})
+    out = delta(base, payload({"Zepto": [MILK], "Blinkit": [MILK]}))
+    assert out["delta"]["removed"] == {"Zepto": [product_key(CURD)]}
+
+
+def test_failed_vendor_products_are_unknown_not_removed():
+    base = snapshot({"Zepto": [MILK], "Blinkit": [CURD]})
+    out = delta(base, payload({"Zepto": [MILK]}, errors={"Blinkit": "timeout"}))
+    assert out["delta"]["removed"] == {}
+
+
+def test_version_ignores_timings_but_not_failures():
+    a = payload({"Zepto": [MILK]})
+    assert content_version(a) == content_version({**a, "meta": {"resources": {"Zepto": 1}}})
+    assert content_version(a) != content_version(payload({"Zepto": [MILK]}, errors={"Blinkit": "x"}))
+
+
+def test_version_store_evicts_oldest():
+    store = VersionStore(max_versions=2)
+    for v in ("a", "b", "c"):
+        store.put(v, {"Zepto": [MILK]})
+    assert store.get("a") is None
+    assert store.get("c") == snapshot({"Zepto": [MILK]})
+
+
+@pytest.mark.parametrize("header, matches", [
+    (None, False),
+    ('W/"v1"', True),
+    ('"v1"', True),
+    ('"v0", W/"v1"', True),
+    ("*", True),
+    ('W/"v2"', False),
+])
+def test_if_none_match(header, matches):
+    request = FakeRequest({"If-None-Match": header} if header else {})
+    assert if_none_match(request, 'W/"v1"') is matches
+
+
+@pytest.mark.parametrize("change", [
+    {"price": ""},
+    {"price": "Sold Out"},
+    {"delivery_time": "Out of Stock"},
+    {"discount": "Notify Me"},
+])
+def test_going_out_of_stock_is_a_change(change):
+    base = snapshot({"Zepto": [MILK]})
+    gone = {**MILK, **change}
+    out = delta(base, payload({"Zepto": [gone]}))
+    assert out["results"] == {"Zepto": [gone]}
+
+    # ...and coming back in stock is one too
+    out = delta(snapshot({"Zepto": [gone]}), payload({"Zepto": [MILK]}))
+    assert out["results"] == {"Zepto": [MILK]}
+
+
+def test_availability():
+    assert available(MILK)
+    assert available({**MILK, "name": "Sold Out Special Chocolate"})
+    assert not available({**MILK, "price": None})
+    assert not available({**MILK, "delivery_time": "Currently unavailable"})
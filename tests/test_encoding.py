@@ -0,0 +1,74 @@
+# tests/test_encoding.py
+import pytest
+
+pytest.importorskip("fastapi")
+
+import encoding
+from encoding import accepted, choose_encoding, choose_media_type, to_columns, JSON, COLUMNAR, ARROW
+
+
+class FakeRequest:
+    def __init__(self, headers=None, query=None):
+        self.headers = {k.lower(): v for k, v in (headers or {}).items()}
+        self.query_params = query or {}
+
+
+@pytest.mark.parametrize("header, expected", [
+    (None, []),
+    ("", []),
+    ("application/json", ["application/json"]),
+    ("text/html;q=0.5, application/json", ["application/json", "text/html"]),
+    ("a/b;q=0.8, c/d;q=0.8, e/f", ["e/f", "a/b", "c/d"]),
+    ("application/json;q=0, */*", ["*/*"]),
+    ("application/json;q=oops", []),
+    ("Application/JSON", ["application/json"]),
+])
+def test_accepted(header, expected):
+    assert accepted(header) == expected
+
+
+@pytest.mark.parametrize("accept, expected", [
+    (None, JSON),
+    ("*/*", JSON),
+    ("text/html", JSON),
+    ("text/plain", JSON),
+    (COLUMNAR, COLUMNAR),
+    (f"{JSON};q=0.5, {COLUMNAR}", COLUMNAR),
+])
+def test_choose_media_type(accept, expected):
+    assert choose_media_type(FakeRequest({"Accept": accept} if accept else {})) == expected
+
+
+def test_format_query_overrides_accept():
+    assert choose_media_type(FakeRequest({"Accept": JSON}, {"format": "columnar"})) == COLUMNAR
+
+
+def test_unknown_format_is_rejected():
+    with pytest.raises(encoding.HTTPException) as e:
+        choose_media_type(FakeRequest(query={"format": "xml"}))
+    assert e.value.status_code == 400
+
+
+def test_arrow_alone_without_pyarrow_is_refused(monkeypatch):
+    monkeypatch.setattr(encoding, "pa", None)
+    with pytest.raises(encoding.HTTPException) as e:
+        choose_media_type(FakeRequest({"Accept": ARROW}))
+    assert e.value.status_code == 406
+    assert choose_media_type(FakeRequest({"Accept": f"{ARROW}, text/html"})) == JSON
+
+
+@pytest.mark.parametrize("header, expected", [
+    (None, None),
+    ("gzip", "gzip"),
+    ("gzip;q=0", None),
+    ("deflate, gzip;q=0.5", "gzip"),
+    ("identity", None),
+])
+def test_choose_encoding(monkeypatch, header, expected):
+    monkeypatch.setattr(encoding, "brotli", None)
+    assert choose_encoding(FakeRequest({"Accept-Encoding": header} if header else {})) == expected
+
+
+def test_to_columns_pads_missing_fields():
+    columns = to_columns({"Zepto": [{"name": "Milk", "eta": "8 mins"}], "Blinkit": [{"name": "Curd"}]})
+    assert columns == {"source": ["Zepto", "Blinkit"], "name": ["Milk", "Curd"], "eta": ["8 mins", None]}
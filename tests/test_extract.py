@@ -0,0 +1,42 @@
+# tests/test_extract.py
+import time
+
+import pytest
+
+from extract import extract_cards, field_spec, scroll_allowance, MAX_SCROLLS, SCROLL_SETTLE
+from retry import retry_budget
+
+
+def test_scroll_allowance_without_budget():
+    assert scroll_allowance() == MAX_SCROLLS
+
+
+def test_scroll_allowance_fits_the_budget():
+    with retry_budget(1, deadline=time.time() + 3 * SCROLL_SETTLE + 0.5):
+        assert scroll_allowance() == 3
+    with retry_budget(1, deadline=time.time() - 1):
+        assert scroll_allowance() == 0
+
+
+def test_fields_without_selector_are_not_read():
+    fields = {"name": ("css", "h3", None), "delivery_time": None, "image_url": ("css", "img", "src")}
+    assert field_spec(fields) == [["name", "css", "h3", None], ["image_url", "css", "img", "src"]]
+
+
+def test_extracted_rows_carry_every_field():
+    class Driver:
+        def execute_script(self, script, by, sel, spec):
+            assert [f[0] for f in spec] == ["name", "weight"]
+            return [{"weight": "1 kg", "name": "Atta"}]
+
+    fields = {"name": ("css", "h3", None), "delivery_time": None, "weight": ("css", "span", None)}
+    assert extract_cards(Driver(), ("css", "li"), fields) == [
+        {"name": "Atta", "delivery_time": "", "weight": "1 kg"}
+    ]
+
+
+def test_bigbasket_products_have_the_common_keys():
+    pytest.importorskip("selenium")
+    import zepto
+    import bigbasket
+    assert set(zepto.FIELDS) <= set(bigbasket.FIELDS)
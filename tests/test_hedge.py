@@ -0,0 +1,111 @@
+# tests/test_hedge.py
+import time
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import hedge
+from hedge import Hedger, HedgeBudget
+
+
+MILK = [{"name": "Milk"}]
+
+
+@pytest.fixture
+def pool():
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        yield executor
+
+
+@pytest.fixture(autouse=True)
+def fast_hedges(monkeypatch):
+    monkeypatch.setattr(hedge, "HEDGE_MIN_DELAY", 0.05)
+
+
+def warmed(budget=None):
+    """A hedger that has seen enough quick Zepto scrapes to start hedging."""
+    hedger = Hedger(budget or HedgeBudget(ratio=1.0, max_inflight=1), enabled=True)
+    for _ in range(hedge.HEDGE_MIN_SAMPLES):
+        hedger.observe("Zepto", 0.01)
+    return hedger
+
+
+def scrape_factory(*behaviours):
+    """make_call for Hedger.run: the n-th attempt runs behaviours[n](usage)."""
+    usages = []
+
+    def make_call(usage):
+        behaviour = behaviours[len(usages)]
+        usages.append(usage)
+        return lambda: (behaviour(usage), usage)
+
+    return make_call, usages
+
+
+def stuck(usage):
+    # Like a hung browser: only comes back once it's been killed
+    deadline = time.time() + 5
+    while not usage.cancelled and time.time() < deadline:
+        time.sleep(0.01)
+    return []
+
+
+def test_no_hedging_without_history(pool):
+    hedger = Hedger(HedgeBudget(ratio=1.0), enabled=True)
+    make_call, usages = scrape_factory(lambda usage: MILK)
+    data, _ = asyncio.run(hedger.run("Zepto", pool, make_call))
+    assert data == MILK
+    assert len(usages) == 1
+    assert hedger.hedge_after("Zepto") is None
+
+
+def test_fast_primary_is_not_hedged(pool):
+    hedger = warmed()
+    make_call, usages = scrape_factory(lambda usage: MILK)
+    data, usage = asyncio.run(hedger.run("Zepto", pool, make_call))
+    assert data == MILK
+    assert usages == [usage]
+
+
+def test_hedge_wins_and_losing_attempt_is_cancelled(pool):
+    hedger = warmed()
+    make_call, usages = scrape_factory(stuck, lambda usage: MILK)
+    data, usage = asyncio.run(hedger.run("Zepto", pool, make_call))
+
+    primary, second = usages
+    assert data == MILK
+    assert usage is second
+    assert primary.cancelled and primary.killed == "lost hedge race"
+    assert not second.cancelled
+    assert hedger.budget.stats()["inflight"] == 0
+
+
+def test_primary_result_kept_when_both_come_back_empty(pool):
+    hedger = warmed()
+    slow_empty = lambda usage: time.sleep(0.2) or []
+    make_call, usages = scrape_factory(slow_empty, lambda usage: [])
+    data, usage = asyncio.run(hedger.run("Zepto", pool, make_call))
+    assert data == []
+    assert usage is usages[0]
+
+
+def test_no_hedge_without_budget(pool):
+    hedger = warmed(HedgeBudget(ratio=0.0))
+    slow = lambda usage: time.sleep(0.2) or MILK
+    make_call, usages = scrape_factory(slow)
+    data, _ = asyncio.run(hedger.run("Zepto", pool, make_call))
+    assert data == MILK
+    assert len(usages) == 1
+
+
+def test_budget_caps_ratio_and_concurrency():
+    budget = HedgeBudget(ratio=0.5, max_inflight=1)
+    for _ in range(4):
+        budget.record_scrape()
+    assert budget.take()
+    assert not budget.take()          # one already running
+    budget.release()
+    assert budget.take()              # 2 hedges for 4 scrapes
+    budget.release()
+    assert not budget.take()          # would be 3 for 4
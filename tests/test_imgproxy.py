@@ -0,0 +1,137 @@
+# tests/test_imgproxy.py
+import io
+import time
+import threading
+
+import pytest
+from fastapi import HTTPException
+
+import imgproxy
+from imgproxy import ImageProxy, DiskLRU, allowed, thumbnail_url, fetch
+
+
+def png(size=(400, 400)):
+    from PIL import Image
+
+    out = io.BytesIO()
+    Image.new("RGB", size, "red").save(out, "PNG")
+    return out.getvalue()
+
+
+class FakeResponse:
+    def __init__(self, status=200, body=b"", location=None):
+        self.status_code = status
+        self.is_redirect = location is not None
+        self.headers = {"location": location} if location else {}
+        self._body = body
+
+    def iter_content(self, size):
+        for i in range(0, len(self._body), size):
+            yield self._body[i:i + size]
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def proxy(tmp_path):
+    return ImageProxy(DiskLRU(str(tmp_path), max_bytes=1024 * 1024))
+
+
+def test_only_vendor_cdns_are_allowed():
+    assert allowed("https://cdn.zeptonow.com/a.png")
+    assert allowed("https://www.bbassets.com/a.png")
+    assert not allowed("https://evilbbassets.com/a.png")
+    assert not allowed("http://169.254.169.254/latest/meta-data")
+    assert not allowed("https://cdn.zeptonow.com:8443/a.png")
+    assert not allowed("file:///etc/passwd")
+    assert thumbnail_url("http://localhost/a.png") is None
+
+
+def test_redirect_off_the_allowlist_is_refused(monkeypatch):
+    monkeypatch.setattr(imgproxy.requests, "get",
+                        lambda url, **kw: FakeResponse(302, location="http://127.0.0.1/a.png"))
+    with pytest.raises(HTTPException) as err:
+        fetch("https://cdn.zeptonow.com/a.png")
+    assert err.value.status_code == 403
+
+
+def test_thumbnail_is_cached(proxy, monkeypatch):
+    calls = []
+    monkeypatch.setattr(imgproxy, "fetch", lambda url: calls.append(url) or png())
+
+    first = proxy.serve("https://cdn.zeptonow.com/a.png", 150)
+    second = proxy.serve("https://cdn.zeptonow.com/a.png", 150)
+
+    assert first.body == second.body
+    assert first.media_type == "image/webp"
+    assert len(calls) == 1
+
+    etag = first.headers["ETag"]
+    assert proxy.serve("https://cdn.zeptonow.com/a.png", 150, if_none_match=etag).status_code == 304
+
+
+def test_one_fetch_per_image_under_concurrency(proxy, monkeypatch):
+    calls = []
+
+    def slow_fetch(url):
+        calls.append(url)
+        time.sleep(0.05)
+        return png()
+
+    monkeypatch.setattr(imgproxy, "fetch", slow_fetch)
+    start = threading.Barrier(20)
+
+    def request():
+        start.wait()
+        proxy.serve("https://cdn.zeptonow.com/a.png", 150)
+
+    threads = [threading.Thread(target=request) for _ in range(20)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(calls) == 1
+    assert proxy._locks == {}
+
+
+def test_waiters_share_the_lock_until_the_last_one_leaves(proxy):
+    entered = threading.Event()
+    release = threading.Event()
+    held = []
+
+    def holder():
+        with proxy._locked("k"):
+            held.append(proxy._locks["k"][0])
+            entered.set()
+            release.wait()
+
+    def waiter():
+        with proxy._locked("k"):
+            held.append(proxy._locks["k"][0])
+
+    first = threading.Thread(target=holder)
+    first.start()
+    entered.wait()
+    second = threading.Thread(target=waiter)
+    second.start()
+    while proxy._locks["k"][1] < 2:
+        time.sleep(0.001)
+
+    # The first one leaving mustn't hand later requests a fresh lock
+    release.set()
+    first.join()
+    second.join()
+    assert held[0] is held[1]
+    assert proxy._locks == {}
+
+
+def test_failed_fetch_leaves_no_lock_behind(proxy, monkeypatch):
+    def broken(url):
+        raise HTTPException(502, "Image fetch failed with 500")
+
+    monkeypatch.setattr(imgproxy, "fetch", broken)
+    with pytest.raises(HTTPException):
+        proxy.serve("https://cdn.zeptonow.com/missing.png", 150)
+    assert proxy._locks == {}
@@ -0,0 +1,164 @@
+# tests/test_jobqueue.py
+import sys
+import time
+import types
+import asyncio
+
+import pytest
+
+import jobqueue
+import worker
+from jobqueue import LocalBroker, new_job, job_timeout, expired, submit, JobFailed, JobTimeout
+from vendors import Vendor, VendorRegistry
+
+
+def job(vendor="Zepto", timeout=60):
+    return new_job(vendor, "get_products", ["Bengaluru", "milk"], {}, timeout)
+
+
+@pytest.fixture
+def fake_vendor(monkeypatch):
+    """A "Fake" vendor whose scrape runs whatever `calls` says."""
+    module = types.ModuleType("fake_vendor")
+    calls = []
+    module.get_products = lambda location, product: calls.append(product) or [{"name": product}]
+    monkeypatch.setitem(sys.modules, "fake_vendor", module)
+    monkeypatch.setattr(worker, "REGISTRY", VendorRegistry(builtin=[Vendor("Fake", "fake_vendor")]))
+    monkeypatch.setattr("vendors.entry_points", lambda group: [])
+    return module, calls
+
+
+def test_timeout_covers_the_retry_budget_per_query():
+    from retry import QUERY_TIME_BUDGET
+    assert job_timeout(1) == jobqueue.JOB_TIMEOUT
+    assert job_timeout(4) - job_timeout(1) == pytest.approx(3 * QUERY_TIME_BUDGET)
+    assert new_job("Zepto", "get_basket", [], {}, job_timeout(4))["deadline"] >= time.time() + job_timeout(3)
+
+
+def test_expiry():
+    assert not expired(job(timeout=60))
+    assert expired(job(timeout=0))
+
+
+def test_unacked_job_is_redelivered_after_lease():
+    broker = LocalBroker(lease=0.05)
+    broker.enqueue(job())
+    first = broker.reserve(timeout=0)
+    assert broker.reserve(timeout=0) is None
+    time.sleep(0.06)
+    second = broker.reserve(timeout=0)
+    assert second["id"] == first["id"]
+    assert second["deliveries"] == 2
+
+
+def test_extended_lease_is_not_redelivered():
+    broker = LocalBroker(lease=0.1)
+    broker.enqueue(job())
+    held = broker.reserve(timeout=0)
+    for _ in range(3):
+        time.sleep(0.05)
+        broker.extend(held)
+    assert broker.reserve(timeout=0) is None
+    assert broker.depth() == {"ready": 0, "inflight": 1}
+
+
+def test_late_ack_does_not_clear_redelivery():
+    broker = LocalBroker(lease=0.05)
+    broker.enqueue(job())
+    first = broker.reserve(timeout=0)
+    time.sleep(0.06)
+    second = broker.reserve(timeout=0)
+
+    broker.ack(first)
+    broker.extend(first)
+    assert broker.depth()["inflight"] == 1
+    broker.ack(second)
+    assert broker.depth() == {"ready": 0, "inflight": 0}
+
+
+def test_dead_letter_after_max_deliveries():
+    broker = LocalBroker(lease=0.01, max_deliveries=2)
+    j = job()
+    broker.enqueue(j)
+    for _ in range(2):
+        assert broker.reserve(timeout=0) is not None
+        time.sleep(0.02)
+    assert broker.reserve(timeout=0) is None
+    result = broker.wait_result(j["id"], 0)
+    assert result["error"] == "Gave up after 2 deliveries"
+
+
+def test_result_is_published_once():
+    broker = LocalBroker()
+    assert broker.publish("abc", {"data": [1]})
+    assert not broker.publish("abc", {"data": [2]})
+    assert broker.wait_result("abc", 0) == {"data": [1]}
+    assert broker.wait_result("nope", 0.01) is None
+
+
+def test_worker_runs_job_and_publishes(fake_vendor):
+    _, calls = fake_vendor
+    broker = LocalBroker()
+    j = new_job("Fake", "get_products", ["Bengaluru", "milk"], {})
+    broker.enqueue(j)
+    worker.Worker(broker, threads=1).handle(broker.reserve(timeout=0))
+
+    result = broker.wait_result(j["id"], 0)
+    assert result["data"] == [{"name": "milk"}]
+    assert result["error"] is None
+    assert calls == ["milk"]
+    assert broker.depth() == {"ready": 0, "inflight": 0}
+
+
+def test_worker_drops_expired_job(fake_vendor):
+    _, calls = fake_vendor
+    broker = LocalBroker()
+    j = new_job("Fake", "get_products", ["Bengaluru", "milk"], {}, timeout=0)
+    broker.enqueue(j)
+    worker.Worker(broker, threads=1).handle(broker.reserve(timeout=0))
+
+    assert calls == []
+    assert broker.wait_result(j["id"], 0) is None
+    assert broker.depth() == {"ready": 0, "inflight": 0}
+
+
+def test_worker_keeps_lease_on_slow_scrape(fake_vendor):
+    module, calls = fake_vendor
+    module.get_products = lambda location, product: time.sleep(0.3) or [{"name": product}]
+    broker = LocalBroker(lease=0.1)
+    j = new_job("Fake", "get_products", ["Bengaluru", "milk"], {})
+    broker.enqueue(j)
+    w = worker.Worker(broker, threads=1).start()
+    try:
+        result = broker.wait_result(j["id"], 2)
+        # Still leased throughout, so nobody took it a second time
+        assert result["data"] == [{"name": "milk"}]
+        time.sleep(0.05)
+        assert broker.depth() == {"ready": 0, "inflight": 0}
+    finally:
+        w.stop()
+
+
+def test_worker_reports_scraper_errors(fake_vendor):
+    module, _ = fake_vendor
+
+    def broken(location, product):
+        raise RuntimeError("selector gone")
+
+    module.get_products = broken
+    broker = LocalBroker()
+
+    async def run():
+        w = worker.Worker(broker, threads=1).start()
+        try:
+            return await submit(broker, "Fake", "get_products", "Bengaluru", "milk", timeout=2)
+        finally:
+            w.stop()
+
+    with pytest.raises(JobFailed, match="selector gone"):
+        asyncio.run(run())
+
+
+def test_submit_times_out_without_workers():
+    with pytest.raises(JobTimeout):
+        asyncio.run(submit(LocalBroker(), "Zepto", "get_products", "Bengaluru", "milk", timeout=0.05))
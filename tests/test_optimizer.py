@@ -0,0 +1,116 @@
+# tests/test_optimizer.py
+import random
+from itertools import product as cartesian
+
+import pytest
+
+from optimizer import optimize_basket, parse_price
+
+
+def basket(prices):
+    """{item: {vendor: price}} -> the {item: {vendor: [products]}} shape /search/basket returns."""
+    return {
+        item: {v: [{"name": f"{item} @ {v}", "price": f"₹{p}"}] for v, p in by_vendor.items()}
+        for item, by_vendor in prices.items()
+    }
+
+
+def brute_force(prices, max_vendors, min_order, delivery_fee):
+    """Cheapest total over every item -> vendor assignment, or None if none is feasible."""
+    items = [i for i in prices if prices[i]]
+    best = None
+    for choice in cartesian(*(sorted(prices[i]) for i in items)):
+        subtotal = {}
+        for item, vendor in zip(items, choice):
+            subtotal[vendor] = subtotal.get(vendor, 0) + prices[item][vendor]
+        if max_vendors and len(subtotal) > max_vendors:
+            continue
+        if any(s < min_order.get(v, 0) for v, s in subtotal.items()):
+            continue
+        total = sum(subtotal.values()) + sum(delivery_fee.get(v, 0) for v in subtotal)
+        if best is None or total < best:
+            best = total
+    return best
+
+
+def random_instance(rng):
+    vendors = ["Zepto", "Blinkit", "Instamart", "BigBasket"][:rng.randint(2, 4)]
+    prices = {}
+    for n in range(rng.randint(1, 6)):
+        offered = [v for v in vendors if rng.random() < 0.75]
+        prices[f"item{n}"] = {v: rng.randint(10, 200) for v in offered}
+    min_order = {v: rng.choice([0, 0, 100, 250]) for v in vendors}
+    delivery_fee = {v: rng.choice([0, 15, 30]) for v in vendors}
+    max_vendors = rng.choice([None, 1, 2])
+    return prices, max_vendors, min_order, delivery_fee
+
+
+@pytest.mark.parametrize("seed", range(150))
+def test_exact_solver_matches_brute_force(seed):
+    prices, max_vendors, min_order, delivery_fee = random_instance(random.Random(seed))
+    result = optimize_basket(basket(prices), max_vendors=max_vendors, min_order=min_order,
+                             delivery_fee=delivery_fee, exact=True)
+    expected = brute_force(prices, max_vendors, min_order, delivery_fee)
+
+    if expected is None:
+        assert result["feasible"] is False
+        return
+    assert result["feasible"] is True
+    assert result["total"] == pytest.approx(expected)
+
+    # The split adds up to the total and respects every constraint
+    split = result["vendors"]
+    assert sum(v["subtotal"] + v["delivery_fee"] for v in split.values()) == pytest.approx(expected)
+    assert not max_vendors or len(split) <= max_vendors
+    for vendor, entry in split.items():
+        assert entry["subtotal"] >= min_order.get(vendor, 0)
+
+
+def test_min_order_makes_basket_infeasible():
+    result = optimize_basket(basket({"milk": {"Zepto": 50, "Blinkit": 60}}),
+                             min_order={"Zepto": 100, "Blinkit": 100})
+    assert result["feasible"] is False
+    assert "total" not in result
+
+
+def test_min_order_moves_items_to_one_vendor():
+    # Splitting is cheaper on price alone, but only one vendor can reach its minimum
+    prices = {"milk": {"Zepto": 50, "Blinkit": 55}, "bread": {"Zepto": 45, "Blinkit": 42}}
+    result = optimize_basket(basket(prices), min_order={"Zepto": 90, "Blinkit": 90})
+    assert result["feasible"] is True
+    assert list(result["vendors"]) == ["Zepto"]
+    assert result["total"] == 95
+
+
+def test_unavailable_items_are_listed_not_fatal():
+    items = basket({"milk": {"Zepto": 50}})
+    items["saffron"] = {"Zepto": [], "Blinkit": [{"name": "no price", "price": "Sold out"}]}
+    result = optimize_basket(items)
+    assert result["unavailable"] == ["saffron"]
+    assert result["feasible"] is True
+    assert result["total"] == 50
+
+
+def test_delivery_fee_can_outweigh_cheaper_price():
+    prices = {"milk": {"Zepto": 50, "Blinkit": 45}, "bread": {"Zepto": 40, "Blinkit": 42}}
+    result = optimize_basket(basket(prices), delivery_fee={"Zepto": 0, "Blinkit": 30})
+    assert list(result["vendors"]) == ["Zepto"]
+    assert result["total"] == 90
+
+
+def test_heuristic_is_feasible_and_not_better_than_exact():
+    rng = random.Random(42)
+    for _ in range(50):
+        prices, max_vendors, min_order, delivery_fee = random_instance(rng)
+        exact = optimize_basket(basket(prices), max_vendors, min_order, delivery_fee, exact=True)
+        greedy = optimize_basket(basket(prices), max_vendors, min_order, delivery_fee, exact=False)
+        if greedy["feasible"]:
+            assert exact["feasible"]
+            assert greedy["total"] >= exact["total"] - 1e-6
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("₹1,299", 1299.0), ("₹45.50", 45.5), ("MRP 60", 60.0), ("", None), (None, None), ("Free", None),
+])
+def test_parse_price(text, expected):
+    assert parse_price(text) == expected
@@ -0,0 +1,57 @@
+# tests/test_profiling.py
+import asyncio
+
+import pytest
+
+import profiling
+from profiling import ProfileSession, authorized, profile_request, load_summary, profile_file
+
+
+@pytest.fixture
+def token(monkeypatch):
+    monkeypatch.setattr(profiling, "PROFILE_TOKEN", "s3cret")
+
+
+def test_matching_token_is_authorized(token):
+    assert authorized("s3cret")
+    assert not authorized("wrong")
+    assert not authorized("")
+
+
+def test_non_ascii_token_is_refused_not_an_error(token):
+    assert not authorized("sécret")
+
+
+def test_nothing_is_authorized_without_a_token(monkeypatch):
+    monkeypatch.setattr(profiling, "PROFILE_TOKEN", "")
+    assert not authorized("")
+
+
+def test_one_profiled_request_at_a_time():
+    async def run():
+        async with profile_request("/search", "milk") as first:
+            async with profile_request("/search", "bread") as second:
+                return first, second
+
+    first, second = asyncio.run(run())
+    assert first is not None
+    assert second is None
+
+
+def test_saved_profile_is_listed_and_served(tmp_path):
+    session = ProfileSession("/search", "milk")
+    with session.profile("Zepto"):
+        sum(range(1000))
+    summary = session.save(str(tmp_path))
+
+    assert "Zepto" in summary["parts"]
+    assert load_summary(session.id, str(tmp_path))["detail"] == "milk"
+    assert profile_file(session.id, "Zepto.prof", str(tmp_path))
+
+
+def test_paths_outside_the_profile_dir_are_refused(tmp_path):
+    (tmp_path / "outside.prof").write_text("")
+    inner = tmp_path / "profiles"
+    inner.mkdir()
+    assert profile_file("..", "outside.prof", str(inner)) is None
+    assert load_summary("../..", str(inner)) is None
@@ -0,0 +1,97 @@
+# tests/test_retry.py
+import time
+
+import pytest
+
+import retry
+from retry import RetryPolicy, policy_for, remaining_time, retry_budget
+
+
+@pytest.fixture(autouse=True)
+def no_sleep(monkeypatch):
+    monkeypatch.setattr(retry.time, "sleep", lambda s: None)
+
+
+def failing(calls):
+    def attempt():
+        calls.append(1)
+        return False
+    return attempt
+
+
+def test_policy_lookup_prefers_vendor_entry():
+    assert policy_for("Instamart", "set_location").attempts == 3
+    assert policy_for("Zepto", "set_location").attempts == 1
+    assert policy_for("Zepto", "no_such_step") is retry.DEFAULT_POLICY
+
+
+def test_backoff_is_capped():
+    policy = RetryPolicy(base_delay=1.0, max_delay=4.0)
+    assert all(0 <= policy.delay(n) <= 4.0 for n in range(1, 20) for _ in range(20))
+
+
+def test_retry_returns_first_truthy_result():
+    results = iter([None, "done"])
+    assert retry.retry("Zepto", "page_load", lambda: next(results)) == "done"
+
+
+def test_exceptions_count_as_failed_attempts():
+    calls = []
+
+    def attempt():
+        calls.append(1)
+        raise RuntimeError("stale element")
+
+    assert retry.retry("Zepto", "page_load", attempt) is None
+    assert len(calls) == policy_for("Zepto", "page_load").attempts
+
+
+def test_attempt_cap_is_shared_across_nested_retries(monkeypatch):
+    monkeypatch.setattr(retry, "MAX_TOTAL_ATTEMPTS", 4)
+    calls = []
+    with retry_budget(1):
+        # page_load allows 3 attempts per call; the scrape as a whole only 4
+        for _ in range(3):
+            retry.retry("Zepto", "page_load", failing(calls))
+    assert len(calls) == 4
+
+
+def test_attempt_cap_grows_per_query(monkeypatch):
+    monkeypatch.setattr(retry, "MAX_TOTAL_ATTEMPTS", 2)
+    monkeypatch.setattr(retry, "ATTEMPTS_PER_QUERY", 3)
+    with retry_budget(3) as budget:
+        assert budget.attempts_left == 2 + 3 * 2
+
+
+def test_no_attempts_once_time_is_up():
+    calls = []
+    with retry_budget(1, deadline=time.time() - 1):
+        assert retry.retry("Zepto", "page_load", failing(calls)) is None
+    assert calls == []
+
+
+def test_nested_budget_never_outlives_outer():
+    with retry_budget(1, deadline=time.time() + 5) as outer:
+        with retry_budget(10) as inner:
+            assert inner.deadline <= outer.deadline
+        assert retry.current_budget() is outer
+    assert retry.current_budget() is None
+
+
+def test_remaining_time_caps_waits():
+    assert remaining_time(25) == 25
+    with retry_budget(1, deadline=time.time() + 2):
+        assert remaining_time(25) <= 2
+        assert remaining_time(1) == 1
+    with retry_budget(1, deadline=time.time() - 1):
+        assert remaining_time(25) == 0.1
+
+
+def test_killed_browser_stops_retries(monkeypatch):
+    class Usage:
+        killed = "cpu budget"
+
+    monkeypatch.setattr(retry, "current_usage", lambda: Usage())
+    calls = []
+    assert retry.retry("Zepto", "page_load", failing(calls)) is None
+    assert calls == []
@@ -0,0 +1,86 @@
+# tests/test_snapshots.py
+import os
+import sys
+import types
+
+import pytest
+
+import snapshots
+import vendors
+from snapshots import SnapshotArchive, Extractor, load, replay
+from vendors import Vendor, VendorRegistry
+
+
+PAGE = """<html><body><ul>
+  <li><h3>Amul Taaza</h3><span class="price">₹27</span><img src="/img/1.png"></li>
+  <li><h3>Amul Gold</h3><span class="price">₹34</span></li>
+  <li><h3>Amul Gold</h3><span class="price">₹34</span></li>
+  <li><span class="price">₹0</span></li>
+</ul></body></html>"""
+
+CARD = ("css", "ul > li")
+FIELDS = {
+    "name": ("xpath", ".//h3", None),
+    "price": ("css", "span.price", None),
+    "delivery_time": None,
+    "image_url": ("css", "img", "src"),
+}
+
+
+@pytest.fixture(autouse=True)
+def needs_lxml():
+    pytest.importorskip("lxml")
+    pytest.importorskip("cssselect")
+
+
+def test_extractor_follows_live_extraction_rules():
+    products = Extractor(CARD, FIELDS).extract(PAGE, "https://shop.example/search?q=milk")
+    assert products == [
+        {"name": "Amul Taaza", "price": "₹27", "delivery_time": "", "image_url": "https://shop.example/img/1.png"},
+        {"name": "Amul Gold", "price": "₹34", "delivery_time": "", "image_url": ""},
+    ]
+
+
+def test_saved_page_round_trips(tmp_path):
+    archive = SnapshotArchive(str(tmp_path))
+    path = archive.save("Zepto", "milk", "https://zepto.example/", PAGE)
+    snap = load(path)
+    assert (snap["vendor"], snap["query"], snap["html"]) == ("Zepto", "milk", PAGE)
+    assert archive.stats()["pages"] == 1
+
+
+def test_archive_drops_oldest_past_cap(tmp_path):
+    probe = SnapshotArchive(str(tmp_path / "probe"))
+    size = os.path.getsize(probe.save("Zepto", "milk", "u", PAGE))
+
+    archive = SnapshotArchive(str(tmp_path / "archive"), max_bytes=size * 2.5)
+    paths = [archive.save("Zepto", f"milk {i}", "u", PAGE) for i in range(4)]
+    assert [os.path.exists(p) for p in paths] == [False, False, True, True]
+    assert archive.stats()["pages"] == 2
+
+
+def test_page_size_cap_counts_bytes(tmp_path, monkeypatch):
+    monkeypatch.setattr(snapshots, "SNAPSHOT_MAX_PAGE_MB", 1 / 1024)    # 1 KiB
+    archive = SnapshotArchive(str(tmp_path))
+    # 400 characters, but 1200 bytes in UTF-8
+    assert archive.save("Zepto", "milk", "u", "₹" * 400) is None
+    assert archive.save("Zepto", "milk", "u", "x" * 400) is not None
+
+
+def test_replay_reports_extraction_over_archive(tmp_path, monkeypatch):
+    module = types.ModuleType("fake_shop")
+    module.CARD, module.FIELDS = CARD, FIELDS
+    monkeypatch.setitem(sys.modules, "fake_shop", module)
+    monkeypatch.setattr("vendors.entry_points", lambda group: [])
+    monkeypatch.setattr(vendors, "REGISTRY", VendorRegistry(builtin=[Vendor("Shop", "fake_shop")]))
+
+    archive = SnapshotArchive(str(tmp_path))
+    archive.save("Shop", "milk", "https://shop.example/", PAGE)
+    archive.save("Shop", "eggs", "https://shop.example/", "<html><body><ul></ul></body></html>")
+
+    report = replay("Shop", str(tmp_path))
+    assert report["pages"] == 2
+    assert report["empty_pages"] == 1
+    assert report["products_per_page"] == 1.0
+    # Fields the vendor doesn't show aren't reported as broken
+    assert report["empty_field_rate"] == {"name": 0.0, "price": 0.0, "image_url": 0.5}
@@ -0,0 +1,91 @@
+# tests/test_suggest.py
+import time
+
+import pytest
+
+import suggest
+from suggest import SuggestIndex
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1_000_000.0]
+    monkeypatch.setattr(suggest.time, "time", lambda: now[0])
+    return now
+
+
+def names(hits):
+    return [h["name"] for h in hits]
+
+
+def test_ranked_by_popularity_with_leading_matches_first():
+    index = SuggestIndex()
+    index.add("Amul Taaza Toned Milk", weight=3)
+    index.add("Milk Bikis")
+    index.add("Nandini Milk", weight=5)
+    # Leading matches count double: "Milk Bikis" scores 2, still behind 5 and 3
+    assert names(index.suggest("milk")) == ["Nandini Milk", "Amul Taaza Toned Milk", "Milk Bikis"]
+    assert names(index.suggest("ton")) == ["Amul Taaza Toned Milk"]
+
+
+def test_names_are_deduplicated_and_counted():
+    index = SuggestIndex()
+    for name in ("Amul Butter", "amul  butter ", "Amul Cheese"):
+        index.add(name)
+    assert len(index) == 2
+    assert index.suggest("amul")[0] == {"name": "Amul Butter", "score": 4.0}
+
+
+def test_short_prefix_ranks_every_match(monkeypatch):
+    monkeypatch.setattr(suggest, "MAX_SCAN", 10)
+    index = SuggestIndex()
+    for i in range(50):
+        index.add(f"mango {i:02d}")
+    # Sorts after the first MAX_SCAN "mango" entries, still found
+    index.add("maz favourite", weight=100)
+    assert names(index.suggest("m", limit=1)) == []          # too short
+    assert names(index.suggest("ma", limit=1)) == ["maz favourite"]
+
+
+def test_trailing_typos_back_off():
+    index = SuggestIndex()
+    index.add("Milk")
+    assert names(index.suggest("milkk")) == ["Milk"]
+    assert index.suggest("xy") == []
+
+
+def test_long_query_is_cut_before_backing_off():
+    index = SuggestIndex()
+    index.add("Milk")
+    started = time.perf_counter()
+    assert names(index.suggest("milk" + "z" * 100_000)) == ["Milk"]
+    assert time.perf_counter() - started < 0.5
+
+
+def test_least_popular_names_are_evicted():
+    index = SuggestIndex(max_names=10)
+    for i in range(10):
+        index.add(f"popular {i}", weight=5)
+    index.add("rare")
+    assert len(index) <= 10
+    assert index.suggest("rare") == []
+    assert len(index.suggest("popular")) == 10
+
+
+def test_popularity_decays(clock):
+    index = SuggestIndex(half_life=60)
+    index.add("Old Favourite Milk", weight=8)
+    clock[0] += 240                      # four half-lives: 8 -> 0.5
+    index.add("New Milk")
+    assert names(index.suggest("milk")) == ["New Milk", "Old Favourite Milk"]
+    assert index.suggest("old")[0]["score"] == pytest.approx(1.0)   # 0.5 x leading bonus
+
+
+def test_decayed_names_are_evicted_first(clock):
+    index = SuggestIndex(max_names=2, half_life=60)
+    index.add("Old Favourite", weight=8)
+    clock[0] += 600
+    index.add("New One")
+    index.add("New Two")
+    assert index.suggest("old") == []
+    assert len(index) == 2
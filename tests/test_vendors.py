@@ -0,0 +1,89 @@
+# tests/test_vendors.py
+import sys
+import types
+
+import pytest
+
+import vendors
+from vendors import Vendor, VendorRegistry
+
+
+class FakeEntryPoint:
+    def __init__(self, name, target, dist="bestdeal-dmart"):
+        self.name = name
+        self.value = f"{dist.replace('-', '_')}.plugin:VENDOR"
+        self.dist = types.SimpleNamespace(name=dist) if dist else None
+        self._target = target
+
+    def load(self):
+        if isinstance(self._target, Exception):
+            raise self._target
+        return self._target
+
+
+@pytest.fixture
+def plugins(monkeypatch):
+    """Entry points the registry will discover."""
+    found = []
+    monkeypatch.setattr(vendors, "entry_points", lambda group: list(found))
+    return found
+
+
+@pytest.fixture
+def fake_module(monkeypatch):
+    module = types.ModuleType("fake_vendor")
+    module.get_products = lambda location, product, max_results=None: [{"name": product, "at": location}]
+    monkeypatch.setitem(sys.modules, "fake_vendor", module)
+    return module
+
+
+def test_unknown_capability_is_rejected():
+    with pytest.raises(ValueError):
+        Vendor("DMart", "dmart", ["eta", "teleport"])
+
+
+def test_scraper_module_is_imported_on_first_call(monkeypatch, fake_module):
+    vendor = Vendor("Fake", "fake_vendor")
+    monkeypatch.delitem(sys.modules, "fake_vendor")
+    get_products = vendor.function("get_products")
+    assert not vendor.loaded
+    assert get_products.vendor_call == "get_products"
+
+    monkeypatch.setitem(sys.modules, "fake_vendor", fake_module)
+    assert get_products("Bengaluru", "milk") == [{"name": "milk", "at": "Bengaluru"}]
+    assert vendor.loaded
+
+
+def test_builtins_come_first_and_lookup_ignores_case(plugins):
+    registry = VendorRegistry()
+    assert list(registry.all())[:5] == ["Zepto", "Blinkit", "Instamart", "Flipkart", "BigBasket"]
+    assert registry.get(" bigbasket ").name == "BigBasket"
+    assert registry.get("DMart") is None
+
+
+def test_plugins_are_added_from_entry_points(plugins):
+    dmart = Vendor("DMart", "bestdeal_dmart.scraper", ["mrp"])
+    plugins.append(FakeEntryPoint("dmart", dmart))
+    registry = VendorRegistry()
+    assert registry.get("dmart") is dmart
+    assert dmart.source == "bestdeal-dmart"
+    assert dmart in registry.with_capability("mrp")
+    assert dmart not in registry.with_capability("basket")
+
+
+def test_broken_plugins_are_skipped(plugins):
+    plugins.extend([
+        FakeEntryPoint("crashes", ImportError("no module named bestdeal_dmart")),
+        FakeEntryPoint("not_a_vendor", object()),
+        FakeEntryPoint("clash", Vendor("Zepto", "evil_zepto")),
+    ])
+    registry = VendorRegistry()
+    assert list(registry.all()) == [v.name for v in vendors.BUILTIN]
+    assert registry.get("Zepto").module == "zepto"
+
+
+def test_entry_points_are_read_once(plugins):
+    registry = VendorRegistry()
+    registry.all()
+    plugins.append(FakeEntryPoint("dmart", Vendor("DMart", "dmart")))
+    assert registry.get("DMart") is None
@@ -0,0 +1,96 @@
+# tests/test_warm_crawl.py
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import warm_crawl
+from breaker import CircuitOpen
+from cache import ResultCache
+from warm_crawl import PopularityTracker, WarmCrawler, BrowserBudget
+
+
+MILK = [{"name": "Milk"}]
+
+
+@pytest.fixture
+def executor():
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        yield pool
+
+
+def crawler(scrapers, executor, busy=False, budget=None):
+    popularity = PopularityTracker()
+    for product in ("milk", "bread"):
+        popularity.record("Bengaluru", product)
+    return WarmCrawler(scrapers, ResultCache(), popularity, executor, lambda: busy, budget=budget)
+
+
+def test_off_by_default():
+    assert warm_crawl.WARM_CRAWL_ENABLED is False
+
+
+def test_popular_pairs_are_refreshed(executor):
+    calls = []
+    c = crawler({"Zepto": lambda loc, product: calls.append(product) or MILK}, executor)
+    asyncio.run(c.tick())
+    assert sorted(calls) == ["bread", "milk"]
+    assert c.cache.get("Zepto", "Bengaluru", "milk") == MILK
+    assert c.due() == []
+
+
+def test_open_breaker_skips_the_vendor(executor):
+    rejected = []
+
+    def open_vendor(loc, product):
+        rejected.append(product)
+        raise CircuitOpen("Blinkit", 30)
+
+    c = crawler({"Blinkit": open_vendor, "Zepto": lambda loc, product: MILK}, executor)
+    asyncio.run(c.tick())
+    assert len(rejected) == 1
+    assert c.warmed == 2
+
+
+def test_yields_to_live_traffic(executor):
+    calls = []
+    c = crawler({"Zepto": lambda loc, product: calls.append(product) or MILK}, executor, busy=True)
+    asyncio.run(c.tick())
+    assert calls == []
+
+
+def test_stops_when_budget_is_spent(executor):
+    calls = []
+    budget = BrowserBudget(seconds=1)
+    budget.charge(1)
+    c = crawler({"Zepto": lambda loc, product: calls.append(product) or MILK}, executor, budget=budget)
+    asyncio.run(c.tick())
+    assert calls == []
+
+
+def test_popularity_ranks_recent_queries_first():
+    popularity = PopularityTracker()
+    for _ in range(3):
+        popularity.record("Bengaluru", "Milk")
+    popularity.record(" bengaluru", "Bread")
+    assert popularity.top(2) == [("Bengaluru", "Milk"), (" bengaluru", "Bread")]
+
+
+def test_background_scrapes_go_through_the_breaker(monkeypatch):
+    pytest.importorskip("fastapi")
+    import main
+    from breaker import BreakerBoard, VendorUnavailable, BREAKER_MIN_CALLS, OPEN
+
+    board = BreakerBoard()
+    monkeypatch.setattr(main, "BREAKERS", board)
+
+    def down(location, product):
+        raise VendorUnavailable("Zepto", "home page did not load")
+
+    scrape = main.tracked("Zepto", down)
+    for _ in range(BREAKER_MIN_CALLS):
+        with pytest.raises(VendorUnavailable):
+            scrape("Bengaluru", "milk")
+    assert board["Zepto"].state == OPEN
+    with pytest.raises(CircuitOpen):
+        scrape("Bengaluru", "milk")
@@ -1,9 +1,24 @@
+import os
+import json
+import hashlib
+
 import streamlit as st
 import requests
 import pandas as pd
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 BACKEND_URL = "http://127.0.0.1:8000"
 
+# One array per field: loads straight into a DataFrame, no per-row dicts
+COLUMNAR = "application/vnd.bestdeal.columnar+json"
+
+CARDS_PER_PAGE = 12
+
+# How long a search may take before we give up on it. Past the server's own
+# budget (90s scrape + 45s query, plus queue slack in queue mode), so a slow
+# vendor still arrives but a hung one doesn't hold its thread forever
+SEARCH_TIMEOUT = float(os.getenv("SEARCH_TIMEOUT_SECONDS", "240"))
+
 st.set_page_config(
     page_title="BestDeal – Grocery Price Compare",
     page_icon="🛒",
@@ -14,14 +29,103 @@ st.set_page_config(
 if "location" not in st.session_state:
     st.session_state.location = None
 if "products" not in st.session_state:
-    st.session_state.products = []
+    st.session_state.products = {}
+if "products_hash" not in st.session_state:
+    st.session_state.products_hash = None
+if "card_page" not in st.session_state:
+    st.session_state.card_page = 1
 if "view" not in st.session_state:
     st.session_state.view = "card"
 
 
+# ------------------------ HELPERS ------------------------
+@st.cache_data(ttl=60, show_spinner=False)
+def get_vendors():
+    """Vendor names the backend searches; empty if it can't say."""
+    try:
+        vendors = requests.get(f"{BACKEND_URL}/vendors", timeout=2).json().get("vendors", [])
+        return [v["name"] for v in vendors]
+    except:
+        return []
+
+
+def search_vendor(vendor, product, location):
+    """One /search/{vendor} call; runs on a worker thread, so no st.* in here."""
+    return requests.post(
+        f"{BACKEND_URL}/search/{vendor}",
+        json={"product": product, "location": location},
+        headers={"Accept": COLUMNAR},
+        timeout=SEARCH_TIMEOUT,
+    ).json()
+
+
+def merge_columns(parts):
+    """Columnar results from several responses as one set of columns."""
+    parts = [pd.DataFrame(p) for p in parts if p.get("source")]
+    if not parts:
+        return {}
+    df = pd.concat(parts, ignore_index=True)
+    # Fields only some vendors have come back as NaN; keep them as None
+    return df.astype(object).where(df.notna(), None).to_dict("list")
+
+
+def set_products(columns):
+    """New results: store them with the hash the derived frame is cached under."""
+    st.session_state.products = columns
+    st.session_state.products_hash = hashlib.sha1(
+        json.dumps(columns, sort_keys=True, default=str).encode()
+    ).hexdigest()
+    st.session_state.card_page = 1
+
+
+@st.cache_data(max_entries=8, show_spinner=False)
+def prepare(result_hash, _columns):
+    """
+    DataFrame with the parsed sort/filter columns. Keyed on the result hash
+    only (the columns themselves aren't hashed), so a rerun from a widget
+    doesn't rebuild or re-parse anything.
+    """
+    df = pd.DataFrame(_columns)
+
+    df["price_num"] = pd.to_numeric(
+        df["price"].astype(str).str.replace(r"[₹,]", "", regex=True), errors="coerce"
+    )
+
+    discount = df["discount"] if "discount" in df else pd.Series("", index=df.index)
+    df["discount_num"] = pd.to_numeric(discount.astype(str).str.extract(r"(\d+)")[0], errors="coerce")
+    df["has_discount"] = discount.astype(str).str.contains("%", regex=False)
+
+    # "10 mins", "1 hour" -> minutes; anything else sorts last
+    delivery = df["delivery_time"] if "delivery_time" in df else pd.Series("", index=df.index)
+    parts = delivery.astype(str).str.lower().str.extract(r"^\s*(\d+(?:\.\d+)?)\s*(min|hour|hr)")
+    amount = pd.to_numeric(parts[0], errors="coerce")
+    df["delivery_mins"] = amount.where(parts[1] == "min", amount * 60).fillna(9999)
+
+    return df
+
+
+def render_card(row):
+    with st.container(border=True):
+        # Small cached thumbnail from our proxy, not the full-size CDN image
+        if row.get("thumbnail_url"):
+            st.image(BACKEND_URL + row["thumbnail_url"], width=150)
+        elif row.get("image_url"):
+            st.image(row["image_url"], width=150)
+
+        st.markdown(f"**{row['name']}**")
+        st.write(f"💰 **{row['price']}**")
+        st.write(f"🏷️ MRP: {row.get('mrp', '-')}")
+        st.write(f"⚖️ {row.get('weight') or row.get('pack') or '-'}")
+        st.write(f"🛍️ {row['source']}")
+        st.write(f"🚚 {row.get('delivery_time', '-')}")
+
+        if row.get("product_url"):
+            st.link_button("Open Product", row["product_url"])
+
+
 # ------------------------ HEADER ------------------------
 st.title("🛒 BestDeal")
-st.caption("Compare grocery prices across Flipkart Minutes, Blinkit, Zepto & Instamart")
+st.caption("Compare grocery prices across Flipkart Minutes, Blinkit, Zepto, Instamart & BigBasket")
 
 
 # ------------------------ STEP 1 – LOCATION ------------------------
@@ -40,7 +144,7 @@ with col2:
 
 if st.button("Use Auto Location"):
     try:
-        res = requests.get(f"{BACKEND_URL}/get-location").json()
+        res = requests.get(f"{BACKEND_URL}/get-location", timeout=10).json()
         loc = res.get("formatted_location")
         if loc:
             st.session_state.location = loc
@@ -56,38 +160,102 @@ st.subheader("🔎 Step 2: Search Product")
 
 query = st.text_input("Enter product name (e.g., Onion, Milk, Eggs)")
 
+# Autocomplete from names the scrapers have already seen
+if len(query.strip()) >= 2:
+    try:
+        suggestions = requests.get(
+            f"{BACKEND_URL}/suggest", params={"q": query, "limit": 8}, timeout=1
+        ).json().get("suggestions", [])
+    except:
+        suggestions = []
+
+    if suggestions:
+        pick = st.selectbox("Suggestions", ["(search as typed)"] + [s["name"] for s in suggestions])
+        if pick != "(search as typed)":
+            query = pick
+
+# Skipping vendors you don't need saves their browser time on the server
+all_vendors = get_vendors()
+chosen_vendors = st.multiselect("Vendors", all_vendors, default=all_vendors) if all_vendors else []
+
+# One request per vendor: each vendor shows up as soon as it's done instead
+# of everyone waiting for the slowest
+progressive = st.checkbox("Show each vendor as it arrives", value=True)
+
 if st.button("Search"):
     if not query.strip():
         st.warning("Enter a valid product name.")
     elif not st.session_state.location:
         st.error("Set your location first.")
+    elif all_vendors and not chosen_vendors:
+        st.warning("Pick at least one vendor.")
+    elif progressive and (vendors := chosen_vendors):
+        slots = {v: st.empty() for v in vendors}
+        for v, slot in slots.items():
+            slot.info(f"⏳ {v}: fetching prices…")
+
+        parts = []
+        with ThreadPoolExecutor(max_workers=len(vendors)) as pool:
+            futures = {
+                pool.submit(search_vendor, v, query, st.session_state.location): v
+                for v in vendors
+            }
+            for future in as_completed(futures):
+                v = futures[future]
+                try:
+                    res = future.result()
+                except Exception as e:
+                    slots[v].error(f"❌ {v}: {e}")
+                    continue
+
+                columns = res.get("columns", {})
+                error = res.get("errors", {}).get(v) or res.get("detail")
+                if error:
+                    slots[v].warning(f"⚠️ {v}: {error}")
+                    continue
+
+                parts.append(columns)
+                with slots[v].container():
+                    st.markdown(f"**{v}** – {len(columns.get('source', []))} products")
+                    preview = pd.DataFrame(columns).head(3)
+                    for col, (_, row) in zip(st.columns(3), preview.iterrows()):
+                        with col:
+                            render_card(row)
+
+        # The full list (with filters) takes over below
+        for slot in slots.values():
+            slot.empty()
+
+        set_products(merge_columns(parts))
+        st.success(f"Found {len(st.session_state.products.get('source', []))} products!")
     else:
         with st.spinner("Fetching best prices…"):
             try:
                 res = requests.post(
                     f"{BACKEND_URL}/search",
-                    json={"product": query, "location": st.session_state.location}
+                    json={
+                        "product": query,
+                        "location": st.session_state.location,
+                        "vendors": chosen_vendors or None
+                    },
+                    headers={"Accept": COLUMNAR},
+                    timeout=SEARCH_TIMEOUT,
                 ).json()
 
-                results = res.get("results", {})
-
-                data = []
-                for source, items in results.items():
-                    for p in items:
-                        p["source"] = source
-                        data.append(p)
+                # {"source": [...], "name": [...], ...}, one entry per product
+                columns = res.get("columns", {})
 
-                st.session_state.products = data
-                st.success(f"Found {len(data)} products!")
+                set_products(columns)
+                st.success(f"Found {len(columns.get('source', []))} products!")
             except Exception as e:
                 st.error(f"Server error: {e}")
 
 
 # ------------------------ STEP 3 – RESULTS ------------------------
-if st.session_state.products:
+if st.session_state.products.get("source"):
     st.subheader("🧾 Results")
 
-    df = pd.DataFrame(st.session_state.products)
+    df = prepare(st.session_state.products_hash, st.session_state.products)
 
     # -------------------- FILTERS --------------------
     st.markdown("### 🔍 Filters & Sorting")
@@ -104,7 +272,6 @@ if st.session_state.products:
         only_discount = st.checkbox("Discount Only")
 
     # Price Range Filter
-    df["price_num"] = pd.to_numeric(df["price"].str.replace("₹", "").str.replace(",", ""), errors="coerce")
     min_price, max_price = df["price_num"].min(), df["price_num"].max()
 
     with colC:
@@ -123,7 +290,7 @@ if st.session_state.products:
     ]
 
     if only_discount:
-        filtered_df = filtered_df[filtered_df["discount"].astype(str).str.contains("%")]
+        filtered_df = filtered_df[filtered_df["has_discount"]]
 
     # -------------------- SORTING --------------------
     st.markdown("### ↕ Sorting")
@@ -133,25 +300,11 @@ if st.session_state.products:
         ["Price: Low → High", "Price: High → Low", "Discount", "Delivery Time", "Vendor", "Name"]
     )
 
-    def extract_delivery_minutes(x):
-        try:
-            t = x.lower().split()
-            if "min" in t:
-                return float(t[0])
-            elif "hour" in t:
-                return float(t[0]) * 60
-        except:
-            pass
-        return 9999
-
-    filtered_df["delivery_mins"] = filtered_df["delivery_time"].apply(extract_delivery_minutes)
-
     if sort_by == "Price: Low → High":
         filtered_df = filtered_df.sort_values("price_num")
     elif sort_by == "Price: High → Low":
         filtered_df = filtered_df.sort_values("price_num", ascending=False)
     elif sort_by == "Discount":
-        filtered_df["discount_num"] = filtered_df["discount"].str.extract(r'(\d+)').astype(float)
         filtered_df = filtered_df.sort_values("discount_num", ascending=False)
     elif sort_by == "Delivery Time":
         filtered_df = filtered_df.sort_values("delivery_mins")
@@ -167,34 +320,32 @@ if st.session_state.products:
     if view == "Card View":
         st.markdown("### 🛍️ Products")
 
-        cols = st.columns(3)
-
         if filtered_df.empty:
             st.warning("No items match filters.")
         else:
-            for i, row in filtered_df.iterrows():
-                col = cols[i % 3]
-                with col:
-                    with st.container(border=True):
-                        if row.get("image_url"):
-                            st.image(row["image_url"], width=150)
-
-                        st.markdown(f"**{row['name']}**")
-                        st.write(f"💰 **{row['price']}**")
-                        st.write(f"🏷️ MRP: {row.get('mrp', '-')}")
-                        st.write(f"⚖️ {row.get('weight', '-')}")
-                        st.write(f"🛍️ {row['source']}")
-                        st.write(f"🚚 {row.get('delivery_time', '-')}")
-                        
-                        if row.get("product_url"):
-                            st.link_button("Open Product", row["product_url"])
+            # Only the visible page is rendered
+            pages = -(-len(filtered_df) // CARDS_PER_PAGE)
+            page = st.number_input(
+                f"Page (of {pages})", min_value=1, max_value=pages,
+                value=min(st.session_state.card_page, pages), step=1
+            )
+            st.session_state.card_page = page
+
+            start = (page - 1) * CARDS_PER_PAGE
+            visible = filtered_df.iloc[start:start + CARDS_PER_PAGE]
+            st.caption(f"Showing {start + 1}–{start + len(visible)} of {len(filtered_df)}")
+
+            cols = st.columns(3)
+            for i, (_, row) in enumerate(visible.iterrows()):
+                with cols[i % 3]:
+                    render_card(row)
 
     # ------------------------ TABLE VIEW ------------------------
     else:
         st.markdown("### 📊 Table View")
 
         tbl = filtered_df.copy()
-        tbl.drop(columns=["image_url", "price_num", "delivery_mins"], inplace=True, errors="ignore")
+        tbl.drop(columns=["image_url", "thumbnail_url", "price_num", "discount_num", "has_discount", "delivery_mins"], inplace=True, errors="ignore")
 
         st.dataframe(tbl, use_container_width=True)
 
@@ -0,0 +1,126 @@
+# vendors.py
+"""
+Which vendors exist and what their products carry. The built-in vendors are
+listed here; other packages add their own through the "bestdeal.vendors"
+entry point group, each entry pointing at a Vendor object:
+
+    [project.entry-points."bestdeal.vendors"]
+    DMart = "bestdeal_dmart.plugin:VENDOR"
+
+Nothing in here imports a scraper. A vendor's module (and Selenium with it)
+is imported on the vendor's first call, so unused vendors cost nothing.
+"""
+import sys
+import threading
+import importlib
+from importlib.metadata import entry_points
+
+
+ENTRY_POINT_GROUP = "bestdeal.vendors"
+
+# What a vendor can offer beyond name and price:
+#   eta, mrp, discount, weight, image, product_url, brand, pack -> product fields
+#   basket -> has get_basket(location, [products]) for /search/basket
+CAPABILITIES = ("eta", "mrp", "discount", "weight", "image", "product_url", "brand", "pack", "basket")
+
+
+class Vendor:
+    """
+    A vendor and the module holding its scraper, which must provide
+    get_products(location, product, max_results=None) and, with the
+    "basket" capability, get_basket(location, [products], max_results=None).
+    """
+
+    def __init__(self, name, module, capabilities=()):
+        unknown = set(capabilities) - set(CAPABILITIES)
+        if unknown:
+            raise ValueError(f"{name}: unknown capabilities {sorted(unknown)}")
+        self.name = name
+        self.module = module
+        self.capabilities = frozenset(capabilities)
+        self.source = "builtin"
+
+    @property
+    def loaded(self):
+        return self.module in sys.modules
+
+    def load(self):
+        return importlib.import_module(self.module)
+
+    def function(self, attr):
+        """module.attr, resolved on the first call."""
+        def call(*args, **kwargs):
+            return getattr(self.load(), attr)(*args, **kwargs)
+        call.__qualname__ = f"{self.module}.{attr}"
+        # Lets EXECUTION_MODE=queue send the call to a worker instead
+        call.vendor_call = attr
+        return call
+
+    def as_dict(self):
+        return {
+            "name": self.name,
+            "capabilities": [c for c in CAPABILITIES if c in self.capabilities],
+            "source": self.source,
+            "loaded": self.loaded,
+        }
+
+
+BUILTIN = [
+    Vendor("Zepto", "zepto", ["eta", "mrp", "discount", "weight", "image", "basket"]),
+    Vendor("Blinkit", "blinkit", ["eta", "mrp", "discount", "weight", "image", "basket"]),
+    Vendor("Instamart", "instamart", ["eta", "mrp", "discount", "weight", "image", "basket"]),
+    Vendor("Flipkart", "flipkart_minutes", ["discount", "image", "product_url", "basket"]),
+    Vendor("BigBasket", "bigbasket", ["mrp", "discount", "weight", "image", "product_url", "brand", "basket"]),
+]
+
+
+# ============================================================
+# REGISTRY
+# ============================================================
+
+class VendorRegistry:
+    def __init__(self, builtin=BUILTIN, group=ENTRY_POINT_GROUP):
+        self.builtin = builtin
+        self.group = group
+        self._vendors = None
+        self._lock = threading.Lock()
+
+    def _discover(self):
+        vendors = {v.name: v for v in self.builtin}
+        for ep in entry_points(group=self.group):
+            try:
+                vendor = ep.load()
+            except Exception as e:
+                print(f"⚠️ Vendor plugin '{ep.name}' failed to load: {e}")
+                continue
+            if not isinstance(vendor, Vendor):
+                print(f"⚠️ Vendor plugin '{ep.name}' is not a vendors.Vendor, skipped")
+                continue
+            if vendor.name in vendors:
+                print(f"⚠️ Vendor plugin '{ep.name}' reuses the name {vendor.name}, skipped")
+                continue
+            vendor.source = ep.dist.name if ep.dist else ep.value
+            vendors[vendor.name] = vendor
+            print(f"🧩 Vendor plugin {vendor.name} ({ep.value})")
+        return vendors
+
+    def all(self):
+        """{name: Vendor}, built-ins first. Entry points are read once."""
+        if self._vendors is None:
+            with self._lock:
+                if self._vendors is None:
+                    self._vendors = self._discover()
+        return self._vendors
+
+    def get(self, name):
+        """Vendor by name, case-insensitive, or None."""
+        vendors = self.all()
+        return vendors.get(name) or next(
+            (v for n, v in vendors.items() if n.lower() == name.strip().lower()), None
+        )
+
+    def with_capability(self, capability):
+        return [v for v in self.all().values() if capability in v.capabilities]
+
+
+REGISTRY = VendorRegistry()
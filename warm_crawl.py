@@ -0,0 +1,187 @@
+# warm_crawl.py
+import os
+import time
+import math
+import asyncio
+import logging
+import threading
+from collections import deque
+
+from cache import normalize
+from breaker import CircuitOpen
+
+
+logger = logging.getLogger("BestDealAPI.warm")
+
+
+# ============================================================
+# CONFIG
+# ============================================================
+
+# Off unless asked for: it drives Chrome in the background on its own
+WARM_CRAWL_ENABLED = os.getenv("WARM_CRAWL_ENABLED", "0") == "1"
+WARM_TOP_N = int(os.getenv("WARM_TOP_N", "10"))
+WARM_INTERVAL = float(os.getenv("WARM_INTERVAL_SECONDS", "30"))
+
+# Refresh an entry once less than this fraction of its TTL is left
+WARM_REFRESH_AHEAD = float(os.getenv("WARM_REFRESH_AHEAD", "0.25"))
+
+# Browser-seconds the warmer may spend per rolling window
+WARM_BUDGET_SECONDS = float(os.getenv("WARM_BUDGET_SECONDS", "300"))
+WARM_BUDGET_WINDOW = float(os.getenv("WARM_BUDGET_WINDOW_SECONDS", "3600"))
+
+# Popularity half-life, so yesterday's spike doesn't crowd out today's queries
+POPULARITY_HALF_LIFE = float(os.getenv("POPULARITY_HALF_LIFE_SECONDS", "21600"))
+
+
+# ============================================================
+# POPULARITY TRACKING
+# ============================================================
+
+class PopularityTracker:
+    """Exponentially decayed hit counts per (location, product)."""
+
+    def __init__(self, half_life=POPULARITY_HALF_LIFE, max_keys=5000):
+        self.decay = math.log(2) / half_life
+        self.max_keys = max_keys
+        self._scores = {}      # key -> (score, last_update)
+        self._display = {}     # key -> (location, product) as last typed
+        self._lock = threading.Lock()
+
+    def _current(self, key, now):
+        score, ts = self._scores.get(key, (0.0, now))
+        return score * math.exp(-self.decay * (now - ts))
+
+    def record(self, location, product):
+        key = (normalize(location), normalize(product))
+        now = time.time()
+        with self._lock:
+            self._scores[key] = (self._current(key, now) + 1.0, now)
+            self._display[key] = (location, product)
+
+            if len(self._scores) > self.max_keys:
+                coldest = min(self._scores, key=lambda k: self._current(k, now))
+                self._scores.pop(coldest, None)
+                self._display.pop(coldest, None)
+
+    def top(self, n):
+        now = time.time()
+        with self._lock:
+            ranked = sorted(self._scores, key=lambda k: self._current(k, now), reverse=True)
+            return [self._display[k] for k in ranked[:n]]
+
+
+# ============================================================
+# BROWSER-TIME BUDGET
+# ============================================================
+
+class BrowserBudget:
+    """Rolling window of browser-seconds spent by background work."""
+
+    def __init__(self, seconds=WARM_BUDGET_SECONDS, window=WARM_BUDGET_WINDOW):
+        self.seconds = seconds
+        self.window = window
+        self._spent = deque()
+
+    def _trim(self):
+        cutoff = time.time() - self.window
+        while self._spent and self._spent[0][0] < cutoff:
+            self._spent.popleft()
+
+    def remaining(self):
+        self._trim()
+        return self.seconds - sum(s for _, s in self._spent)
+
+    def charge(self, seconds):
+        self._spent.append((time.time(), seconds))
+
+
+# ============================================================
+# SCHEDULER
+# ============================================================
+
+class WarmCrawler:
+    """
+    Periodically re-scrapes the most popular (location, product) pairs for
+    every vendor before their cached results expire. Runs one scrape at a
+    time and backs off whenever live /search scrapes are in flight. A
+    scraper raising CircuitOpen skips that vendor for the rest of the tick.
+    """
+
+    def __init__(self, scrapers, cache, popularity, executor, is_busy,
+                 top_n=WARM_TOP_N, interval=WARM_INTERVAL, budget=None, on_result=None):
+        self.scrapers = scrapers
+        self.cache = cache
+        self.popularity = popularity
+        self.executor = executor
+        self.is_busy = is_busy
+        self.top_n = top_n
+        self.interval = interval
+        self.budget = budget or BrowserBudget()
+        self.on_result = on_result or cache.set
+        self.warmed = 0
+        self._task = None
+
+    def due(self):
+        """(vendor, location, product) entries that are missing or about to expire."""
+        threshold = self.cache.ttl * WARM_REFRESH_AHEAD
+        jobs = []
+        for location, product in self.popularity.top(self.top_n):
+            for vendor in self.scrapers:
+                if self.cache.expires_in(vendor, location, product) <= threshold:
+                    jobs.append((vendor, location, product))
+        return jobs
+
+    async def tick(self):
+        loop = asyncio.get_running_loop()
+        skipped = set()
+
+        for vendor, location, product in self.due():
+            if vendor in skipped:
+                continue
+            if self.is_busy():
+                logger.info("⏸️ Warm crawl yielding to live traffic")
+                return
+            if self.budget.remaining() <= 0:
+                logger.info("💸 Warm crawl budget exhausted for this window")
+                return
+
+            func = self.scrapers[vendor]
+            start = time.time()
+            try:
+                data = await loop.run_in_executor(self.executor, lambda: func(location, product))
+                self.on_result(vendor, location, product, data)
+                self.warmed += 1
+                logger.info(f"🔥 Warmed {vendor} '{product}' @ {location} ({len(data)} items)")
+            except CircuitOpen as e:
+                logger.info(f"⏭️ Warm crawl skipping {vendor}: {e}")
+                skipped.add(vendor)
+            except Exception as e:
+                logger.warning(f"Warm crawl {vendor} FAILED: {e}")
+            finally:
+                self.budget.charge(time.time() - start)
+
+    async def run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.tick()
+            except Exception as e:
+                logger.error(f"Warm crawl tick failed: {e}")
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self.run())
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def stats(self):
+        return {
+            "enabled": self._task is not None,
+            "warmed": self.warmed,
+            "budget_remaining_s": round(self.budget.remaining(), 1),
+            "top": self.popularity.top(self.top_n),
+        }
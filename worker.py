@@ -0,0 +1,176 @@
+# worker.py
+"""
+Browser worker for EXECUTION_MODE=queue. Takes scrape jobs off the broker,
+runs them on this machine's browser pool and publishes each result under
+its job id, so browser capacity scales separately from the API:
+
+    BROKER_URL=redis://redis:6379/0 python worker.py [--threads N] [--metrics-port 9100]
+
+Run as many as the browsers need; the API replicas only enqueue and wait.
+"""
+import os
+import sys
+import time
+import signal
+import socket
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import metrics
+from jobqueue import make_broker, expired, LocalBroker, JOB_EVENTS
+from resources import track_scrape
+from vendors import REGISTRY
+
+
+# ============================================================
+# CONFIG
+# ============================================================
+
+# One job per pooled browser by default (browser.py: one per vendor)
+WORKER_THREADS = int(os.getenv("WORKER_THREADS", "0")) or int(os.getenv("BROWSER_POOL_SIZE", "0")) \
+    or len(REGISTRY.all())
+WORKER_METRICS_PORT = int(os.getenv("WORKER_METRICS_PORT", "0"))
+
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}"
+
+
+def execute(job):
+    """
+    Run one job's scraper call; the result dict is what gets published.
+    None if the API stopped waiting for it, so no browser time is spent.
+    """
+    if expired(job):
+        return None
+
+    vendor = REGISTRY.get(job["vendor"])
+    if vendor is None:
+        return {"data": None, "error": f"Unknown vendor {job['vendor']}", "usage": None, "worker": WORKER_ID}
+
+    usage = None
+    try:
+        func = getattr(vendor.load(), job["call"])
+        with track_scrape(vendor.name) as usage:
+            data = func(*job["args"], **job["kwargs"])
+        return {"data": data, "error": None, "usage": usage.as_dict(), "worker": WORKER_ID}
+    except Exception as e:
+        usage = getattr(e, "usage", usage)
+        print(f"❌ Job {job['id']} ({job['vendor']}) failed: {e}")
+        return {"data": None, "error": str(e), "usage": usage.as_dict() if usage else None, "worker": WORKER_ID}
+
+
+class Worker:
+    """`threads` loops, each taking one job at a time off the broker."""
+
+    def __init__(self, broker, threads=WORKER_THREADS):
+        self.broker = broker
+        self.threads = threads
+        self._stop = threading.Event()
+        self._threads = []
+
+    def start(self):
+        for i in range(self.threads):
+            t = threading.Thread(target=self._loop, name=f"worker-{i}", daemon=True)
+            t.start()
+            self._threads.append(t)
+        print(f"👷 {self.threads} scrape workers on {type(self.broker).__name__}")
+        return self
+
+    def _loop(self):
+        while not self._stop.is_set():
+            try:
+                job = self.broker.reserve(timeout=1)
+            except Exception as e:
+                print(f"⚠️ Broker unavailable: {e}")
+                time.sleep(1)
+                continue
+            if job is not None:
+                self.handle(job)
+
+    def handle(self, job):
+        done = threading.Event()
+        threading.Thread(target=self._keep_leased, args=(job, done), daemon=True).start()
+        try:
+            result = execute(job)
+        finally:
+            done.set()
+        if result is None:
+            JOB_EVENTS.inc(vendor=job["vendor"], event="expired")
+            self.broker.ack(job)
+            return
+        event = "failed" if result["error"] else "completed"
+        # At-least-once: if this job already has a result, ours is a duplicate
+        if not self.broker.publish(job["id"], result):
+            event = "duplicate"
+        JOB_EVENTS.inc(vendor=job["vendor"], event=event)
+        self.broker.ack(job)
+
+    def _keep_leased(self, job, done):
+        """Renew the job's lease while it runs, until the API stops waiting."""
+        while not done.wait(self.broker.lease / 3):
+            if expired(job):
+                return
+            try:
+                self.broker.extend(job)
+            except Exception as e:
+                print(f"⚠️ Could not renew lease of job {job['id']}: {e}")
+
+    def stop(self, timeout=None):
+        """Finish the jobs in hand and take no new ones."""
+        self._stop.set()
+        for t in self._threads:
+            t.join(timeout)
+
+
+# ============================================================
+# ENTRY POINT
+# ============================================================
+
+def serve_metrics(broker, port):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            broker.depth()
+            body = metrics.render().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("0.0.0.0", port), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    print(f"📈 Worker metrics on :{port}/metrics")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="BestDeal browser worker")
+    parser.add_argument("--threads", type=int, default=WORKER_THREADS)
+    parser.add_argument("--metrics-port", type=int, default=WORKER_METRICS_PORT)
+    args = parser.parse_args()
+
+    broker = make_broker()
+    if isinstance(broker, LocalBroker):
+        sys.exit("worker.py needs BROKER_URL; without it the API runs its workers in-process")
+
+    if args.metrics_port:
+        serve_metrics(broker, args.metrics_port)
+
+    worker = Worker(broker, args.threads).start()
+
+    stopping = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stopping.set())
+    signal.signal(signal.SIGINT, lambda *_: stopping.set())
+    stopping.wait()
+
+    print("🛑 Stopping, finishing jobs in hand")
+    worker.stop()
+    browser = sys.modules.get("browser")
+    if browser:
+        browser.POOL.close()
+
+
+if __name__ == "__main__":
+    main()
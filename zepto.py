@@ -1,62 +1,53 @@
 # zepto.py
 import time
-from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.common.keys import Keys
 from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.chrome.options import Options
 from selenium.common.exceptions import WebDriverException, TimeoutException
 
+from breaker import VendorUnavailable
+from browser import POOL, reset_session
+from extract import collect_products
+from retry import retry, retry_budget, remaining_time
+from selector_registry import find, PRESENT, ALL_PRESENT, CLICKABLE, VISIBLE
+from snapshots import capture
 
-MAX_RETRIES = 1
-
-
-def get_products(location, search_query):
-
-    def create_driver(headless=True):
-        options = Options()
-        
-        if headless:
-            options.add_argument("--headless=new")
-            options.add_argument("--window-size=1920,1080")
-            options.add_argument("--force-device-scale-factor=1")
-            options.add_argument("--disable-gpu")
-            options.add_argument("--hide-scrollbars")
-            options.add_argument("--ignore-certificate-errors")
-            options.add_argument("--disable-features=IsolateOrigins,site-per-process")
-            options.add_argument("--blink-settings=imagesEnabled=true")
-
-            # 🔥 Trick websites into thinking it's NOT headless
-            options.add_argument("--disable-blink-features=AutomationControlled")
-            options.add_argument("--no-sandbox")
-            options.add_argument("--disable-dev-shm-usage")
-            options.add_argument("--disable-infobars")
-            options.add_argument("--disable-notifications")
-
-            # 🔥 Fake user agent (desktop Chrome)
-            options.add_argument(
-                "--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-                "AppleWebKit/537.36 (KHTML, like Gecko) "
-                "Chrome/121.0.0.0 Safari/537.36"
-            )
 
-            # 🔥 Enable display rendering even in headless mode
-            options.add_argument("--disable-software-rasterizer")
-            options.add_argument("--use-gl=swiftshader")  # Fix hydration loading
+VENDOR = "Zepto"
+HOME_URL = "https://www.zepto.com/"
+
+# Per-attempt wait for the first product card
+PRODUCT_WAIT = 10
 
-            # Flipkart sometimes blocks headless, this bypasses:
-            options.add_experimental_option("excludeSwitches", ["enable-automation"])
-            options.add_experimental_option("useAutomationExtension", False)
+# Product card and its fields, read in one pass by extract.collect_products
+CARD = ("css", "div[data-marketplace='super_saver'] a")
+FIELDS = {
+    "name": ("css", "[data-slot-id='ProductName']", None),
+    "price": ("css", "span.cptQT7", None),
+    "mrp": ("css", "span.cx3iWL", None),
+    "discount": ("css", ".cYCsFo", None),
+    "weight": ("css", "[data-slot-id='PackSize']", None),
+    "delivery_time": ("css", "[data-slot-id='EtaInformation']", None),
+    "image_url": ("css", "img", "src"),
+}
 
-        else:
-            options.add_argument("--start-maximized")
 
-        return webdriver.Chrome(options=options)
+def get_products(location, search_query, max_results=None):
+    return get_basket(location, [search_query], max_results=max_results)[search_query]
 
 
-    driver = create_driver(headless=True)
-    wait = WebDriverWait(driver, 25)
+def get_basket(location, search_queries, driver=None, max_results=None):
+    """
+    Set the location once, then run every query in the same browser session.
+    Pass a driver to reuse an existing browser, otherwise one is borrowed
+    from the shared pool. With max_results, extraction stops as soon as
+    that many products are collected.
+    """
+    if driver is None:
+        with POOL.driver() as driver:
+            return get_basket(location, search_queries, driver, max_results)
+
+    reset_session(driver, HOME_URL)
 
 
     # ------------------------------------------------------------------
@@ -82,43 +73,34 @@ def get_products(location, search_query):
     # ------------------------------------------------------------------
     # SAFE PAGE LOAD
     # ------------------------------------------------------------------
-    def safe_get(url, retries=3):
-        for attempt in range(1, retries + 1):
-            try:
-                driver.get(url)
-                time.sleep(3)
-                click_try_again()
-
-                if "zepto" in driver.title.lower():
-                    print(f"🌐 Zepto opened (attempt {attempt})")
-                    return True
-            except:
-                pass
+    def safe_get(url):
+        def attempt():
+            driver.get(url)
+            time.sleep(3)
+            click_try_again()
+            if "zepto" in driver.title.lower():
+                print("🌐 Zepto opened")
+                return True
+            return False
 
-            print(f"⚠️ Retry opening Zepto {attempt}/{retries}")
-            time.sleep(2)
-
-        return False
+        return retry(VENDOR, "page_load", attempt)
 
 
     # ------------------------------------------------------------------
     # SAFE CLICK
     # ------------------------------------------------------------------
-    def click_element(selector, desc, by=By.CSS_SELECTOR, retries=3, js=True):
-        for i in range(retries):
-            try:
-                el = wait.until(EC.element_to_be_clickable((by, selector)))
-                if js:
-                    driver.execute_script("arguments[0].click();", el)
-                else:
-                    el.click()
-                print(f"✅ Clicked {desc}")
-                return True
-            except Exception as e:
-                print(f"⚠️ Retry {i+1}/{retries} for {desc}: {e}")
-                click_try_again()
-                time.sleep(1)
-
+    def click_element(step, desc, js=True):
+        def attempt():
+            el = find(driver, VENDOR, step, CLICKABLE)
+            if js:
+                driver.execute_script("arguments[0].click();", el)
+            else:
+                el.click()
+            print(f"✅ Clicked {desc}")
+            return True
+
+        if retry(VENDOR, "click", attempt, on_retry=click_try_again):
+            return True
         print(f"❌ Failed to click {desc}")
         return False
 
@@ -127,56 +109,45 @@ def get_products(location, search_query):
     # LOCATION SETUP
     # ------------------------------------------------------------------
     def set_location():
-        for attempt in range(1, MAX_RETRIES + 1):
+        def attempt():
+            click_try_again()
 
-            try:
-                click_try_again()
-
-                # Step 1: Open location selector
-                click_element("button[aria-label='Select Location']", "Select Location", js=True)
-
-                # Step 2: Type location
-                input_box = wait.until(
-                    EC.presence_of_element_located(
-                        (By.CSS_SELECTOR, "input[placeholder='Search a new address']")
-                    )
-                )
-                input_box.click()
-                input_box.clear()
-                for ch in location:
-                    input_box.send_keys(ch)
-                    time.sleep(0.04)
-                print(f"📍 Typed location: {location}")
-
-                time.sleep(2)
-                click_try_again()
-
-                # Step 3: Select suggestion
-                suggestions = wait.until(
-                    EC.presence_of_all_elements_located(
-                        (By.CSS_SELECTOR, "div[data-testid='address-search-item']")
-                    )
-                )
-
-                # choose best match OR fallback to first
-                s = next((x for x in suggestions if location.lower() in x.text.lower()), suggestions[0])
-
-                driver.execute_script("arguments[0].click();", s)
-                print(f"🎯 Selected: {s.text}")
-
-                time.sleep(2)
-
-                # Step 4: Confirm location
-                click_element("button[data-testid='location-confirm-btn']", "Confirm Location", js=True)
-
-                print("🏁 Location set successfully")
-                return True
+            # Step 1: Open location selector
+            if not click_element("location_button", "Select Location", js=True):
+                return False
+
+            # Step 2: Type location
+            input_box = find(driver, VENDOR, "location_input", PRESENT)
+            input_box.click()
+            input_box.clear()
+            for ch in location:
+                input_box.send_keys(ch)
+                time.sleep(0.04)
+            print(f"📍 Typed location: {location}")
+
+            time.sleep(2)
+            click_try_again()
+
+            # Step 3: Select suggestion
+            suggestions = find(driver, VENDOR, "location_suggestion", ALL_PRESENT)
+
+            # choose best match OR fallback to first
+            s = next((x for x in suggestions if location.lower() in x.text.lower()), suggestions[0])
+
+            driver.execute_script("arguments[0].click();", s)
+            print(f"🎯 Selected: {s.text}")
+
+            time.sleep(2)
 
-            except Exception as e:
-                print(f"⚠️ Location setup error attempt {attempt}: {e}")
-                driver.refresh()
-                time.sleep(3)
+            # Step 4: Confirm location
+            if not click_element("location_confirm", "Confirm Location", js=True):
+                return False
 
+            print("🏁 Location set successfully")
+            return True
+
+        if retry(VENDOR, "set_location", attempt, on_retry=driver.refresh):
+            return True
         print("❌ Could not set location")
         return False
 
@@ -185,28 +156,18 @@ def get_products(location, search_query):
     # OPEN SEARCH MODAL
     # ------------------------------------------------------------------
     def open_search_modal():
-        for attempt in range(1, MAX_RETRIES + 1):
-            try:
-                click_try_again()
-
-                btn = wait.until(
-                    EC.element_to_be_clickable((By.CSS_SELECTOR, "a[data-testid='search-bar-icon']"))
-                )
-                driver.execute_script("arguments[0].click();", btn)
-
-                wait.until(
-                    EC.visibility_of_element_located(
-                        (By.CSS_SELECTOR, "input[placeholder*='Search for over']")
-                    )
-                )
-                print("🔍 Search modal opened")
-                return True
+        def attempt():
+            click_try_again()
 
-            except Exception as e:
-                print(f"⚠️ Search modal retry {attempt}: {e}")
-                driver.refresh()
-                time.sleep(3)
+            btn = find(driver, VENDOR, "search_icon", CLICKABLE)
+            driver.execute_script("arguments[0].click();", btn)
 
+            find(driver, VENDOR, "search_input", VISIBLE)
+            print("🔍 Search modal opened")
+            return True
+
+        if retry(VENDOR, "open_search", attempt, on_retry=driver.refresh):
+            return True
         print("❌ Cannot open search modal")
         return False
 
@@ -215,30 +176,23 @@ def get_products(location, search_query):
     # PERFORM SEARCH
     # ------------------------------------------------------------------
     def search_product(q):
-        for attempt in range(1, MAX_RETRIES + 1):
-            try:
-                click_try_again()
-
-                box = wait.until(
-                    EC.element_to_be_clickable(
-                        (By.CSS_SELECTOR, "input[placeholder*='Search for over']")
-                    )
-                )
-                driver.execute_script("arguments[0].focus();", box)
-
-                box.clear()
-                for ch in q:
-                    box.send_keys(ch)
-                    time.sleep(0.05)
-                box.send_keys(Keys.ENTER)
-
-                print(f"🔎 Searching '{q}'")
-                return True
+        def attempt():
+            click_try_again()
+
+            box = find(driver, VENDOR, "search_input", CLICKABLE)
+            driver.execute_script("arguments[0].focus();", box)
 
-            except Exception as e:
-                print(f"⚠️ Search retry {attempt}: {e}")
-                time.sleep(3)
+            box.clear()
+            for ch in q:
+                box.send_keys(ch)
+                time.sleep(0.05)
+            box.send_keys(Keys.ENTER)
 
+            print(f"🔎 Searching '{q}'")
+            return True
+
+        if retry(VENDOR, "search", attempt):
+            return True
         print("❌ Search failed")
         return False
 
@@ -247,84 +201,45 @@ def get_products(location, search_query):
     # WAIT FOR PRODUCTS
     # ------------------------------------------------------------------
     def wait_for_products():
-        for attempt in range(1, 12):
+        def attempt():
             click_try_again()
-            time.sleep(2)
-
-            # Zepto uses 2 different selectors depending on category
-            cards = driver.find_elements(By.CSS_SELECTOR, "div[data-marketplace='super_saver'] a")
-            if cards:
-                print(f"🟢 Loaded {len(cards)} Zepto products")
-                return cards
-
-            print(f"⚠️ Retry loading products {attempt}/12")
-            driver.refresh()
+            # Returns as soon as the first card renders instead of a fixed sleep
+            WebDriverWait(driver, remaining_time(PRODUCT_WAIT)).until(
+                lambda d: d.find_elements(By.CSS_SELECTOR, CARD[1])
+            )
+            print("🟢 Zepto products loaded")
+            return True
 
+        if retry(VENDOR, "wait_for_products", attempt, on_retry=driver.refresh):
+            return True
         print("❌ Could not load product grid")
-        return []
-
-
-    # ------------------------------------------------------------------
-    # EXTRACT PRODUCT DATA
-    # ------------------------------------------------------------------
-    def extract_products(cards):
-        results = []
-
-        for c in cards:
-            try: name = c.find_element(By.CSS_SELECTOR, "[data-slot-id='ProductName']").text
-            except: name = ""
-
-            try: price = c.find_element(By.CSS_SELECTOR, "span.cptQT7").text
-            except: price = ""
-
-            try: mrp = c.find_element(By.CSS_SELECTOR, "span.cx3iWL").text
-            except: mrp = ""
-
-            try: discount = c.find_element(By.CSS_SELECTOR, ".cYCsFo").text
-            except: discount = ""
-
-            try: weight = c.find_element(By.CSS_SELECTOR, "[data-slot-id='PackSize']").text
-            except: weight = ""
-
-            try: eta = c.find_element(By.CSS_SELECTOR, "[data-slot-id='EtaInformation']").text
-            except: eta = ""
-
-            try: image = c.find_element(By.CSS_SELECTOR, "img").get_attribute("src")
-            except: image = ""
+        return False
 
-            results.append({
-                "name": name,
-                "price": price,
-                "mrp": mrp,
-                "discount": discount,
-                "weight": weight,
-                "delivery_time": eta,
-                "image_url": image
-            })
 
-        return results
+    # ----------------- MAIN LOGIC -------------------
 
+    results = {q: [] for q in search_queries}
 
-    # ----------------- MAIN LOGIC -------------------
+    with retry_budget(len(search_queries)):
+        if not safe_get(HOME_URL):
+            raise VendorUnavailable(VENDOR, "home page did not load")
 
-    if not safe_get("https://www.zepto.com/"):
-        driver.quit()
-        return []
+        if not set_location():
+            raise VendorUnavailable(VENDOR, f"could not set location '{location}'")
 
-    if not set_location():
-        driver.quit()
-        return []
+        for i, q in enumerate(search_queries):
+            # Location lives in the session, only the search has to be redone
+            if i > 0 and not safe_get(HOME_URL):
+                break
 
-    if not open_search_modal():
-        driver.quit()
-        return []
+            if not open_search_modal():
+                continue
 
-    if not search_product(search_query):
-        driver.quit()
-        return []
+            if not search_product(q):
+                continue
 
-    cards = wait_for_products()
-    data = extract_products(cards)
+            if wait_for_products():
+                capture(driver, VENDOR, q)
+                results[q] = collect_products(driver, CARD, FIELDS, max_results)
 
-    driver.quit()
-    return data
+    return results